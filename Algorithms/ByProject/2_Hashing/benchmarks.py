@@ -1,28 +1,41 @@
 from __future__ import annotations
 
+import argparse
 import itertools
 import os
 import time
 import warnings
 from collections import defaultdict
-from typing import Any, Hashable, Iterable, Type
+from typing import Any, Callable, Hashable, Iterable, Type
 
 import matplotlib.pyplot as plt
 import numpy as np
 
+from cache import POLICIES, CacheHashTable
 from chaining import ChainingHashTable
-from hashtable import HashTable
+from compact import CompactHashTable
+from hashtable import HashTable, PowerOfTwoGrowth
 from open_addressing import LinearProbingHashTable, QuadraticProbingHashTable
+from swiss_table import SwissHashTable
 from utils import deep_getsizeof
 
 # Keep this below 3 million. Keys are generated as permutations of 10 characters.
 KEY_COUNT = 1000000
 
 
+def generate_test_keys() -> list[str]:
+    """Generates KEY_COUNT distinct string keys in random order."""
+    test_string = "abcdefghij"  # 3,628,800 possible permutations
+    test_keys = list(map("".join, itertools.islice(itertools.permutations(test_string), KEY_COUNT)))
+    np.random.shuffle(test_keys)
+    return test_keys
+
+
 def benchmark(
     hashtable: dict | HashTable,
     test_keys: Iterable[Hashable],
     test_values: Iterable[Any],
+    batched_lookup: bool = False,
 ) -> tuple[float, float, float]:
     """Benchmarks the given hashtable using the provided keys and values.
 
@@ -34,6 +47,9 @@ def benchmark(
         Keys used in benchmark.
     test_values : Iterable[Any]
         Values used in benchmark.
+    batched_lookup : bool = False
+        If True, all keys are looked up with a single call to HashTable.get_many
+        (a list comprehension for dict) instead of one __getitem__ call per key.
 
     Returns
     -------
@@ -78,15 +94,28 @@ def benchmark(
 
     start_time = time.perf_counter()
 
-    # Iterate over answer_kv_pairs, and check correctness (admittedly has some overhead)
-    for key, value in answer_kv_pairs:
-        v = hashtable[key]
-        assert v == value, f"Value {v!r} for key {key!r} did not match expected value {value!r}"
-
-    # Iterate over extra pairs to keep runtime accurate in duplicate runs
-    for key, value in extra_kv_pairs:
-        v = hashtable[key]
-        # no assert: v likely differs from value
+    if batched_lookup:
+        answer_keys = [key for key, _ in answer_kv_pairs]
+        extra_keys = [key for key, _ in extra_kv_pairs]
+        if isinstance(hashtable, HashTable):
+            answer_values = hashtable.get_many(answer_keys)
+            hashtable.get_many(extra_keys)
+        else:
+            answer_values = [hashtable[key] for key in answer_keys]
+            _ = [hashtable[key] for key in extra_keys]
+
+        for (key, value), v in zip(answer_kv_pairs, answer_values):
+            assert v == value, f"Value {v!r} for key {key!r} did not match expected value {value!r}"
+    else:
+        # Iterate over answer_kv_pairs, and check correctness (admittedly has some overhead)
+        for key, value in answer_kv_pairs:
+            v = hashtable[key]
+            assert v == value, f"Value {v!r} for key {key!r} did not match expected value {value!r}"
+
+        # Iterate over extra pairs to keep runtime accurate in duplicate runs
+        for key, value in extra_kv_pairs:
+            v = hashtable[key]
+            # no assert: v likely differs from value
 
     lookup_time_s = time.perf_counter() - start_time
     print(f"{hashtable_description} completed lookup benchmark in {lookup_time_s:.2f} s")
@@ -103,6 +132,7 @@ def run_benchmarks(
     trial_name: str,
     maximum_load_factors: dict[Type, list[float]],
     duplicate_keys: bool = False,
+    batched_lookup: bool = False,
     plot_insert: bool = False,
     plot_lookup: bool = False,
     plot_memory: bool = False,
@@ -121,6 +151,8 @@ def run_benchmarks(
         If True, keys are created with duplicates via a resampling process.
         The set of distinct keys will be approximately 63% as large as the key list.
         (1 - 1/e is about 63%)
+    batched_lookup: bool = False
+        If True, lookups are timed through HashTable.get_many (see benchmark).
     plot_insert: bool = False
         If True, a plot is generated with insert times.
     plot_lookup: bool = False
@@ -151,9 +183,7 @@ def run_benchmarks(
     print(f'____Beginning trial "{trial_name}"____')
 
     # Generate keys and values.
-    test_string = "abcdefghij"  # 3,628,800 possible permutations
-    test_keys = list(map("".join, itertools.islice(itertools.permutations(test_string), KEY_COUNT)))
-    np.random.shuffle(test_keys)
+    test_keys = generate_test_keys()
 
     if duplicate_keys:
         # Resample with replacement to cause some duplicate keys.
@@ -174,7 +204,9 @@ def run_benchmarks(
             else:
                 hashtable = hashtable_cls(maximum_load_factor=load_factor)
 
-            insertion_time, lookup_time, memory_usage = benchmark(hashtable, test_keys, test_values)
+            insertion_time, lookup_time, memory_usage = benchmark(
+                hashtable, test_keys, test_values, batched_lookup=batched_lookup
+            )
             insert_results[hashtable_cls].append(insertion_time)
             lookup_results[hashtable_cls].append(lookup_time)
             memory_results[hashtable_cls].append(memory_usage)
@@ -184,6 +216,8 @@ def run_benchmarks(
     info_str = ""
     if duplicate_keys:
         info_str += " with duplicates"
+    if batched_lookup:
+        info_str += " (batched lookup)"
 
     with warnings.catch_warnings():
         # Suppress matplotlib warnings
@@ -226,23 +260,335 @@ def run_benchmarks(
             plt.close()
 
 
-if __name__ == "__main__":
-    # TODO: Select and run benchmarks, then look at the figures in the plots/ directory.
-
-    # You can delete/change this if you want. It is just an example.
-    maximum_load_factors = {
-        # Chaining load factor may exceed 1.0
-        ChainingHashTable: [0.1,0.2,0.3,0.4,0.5,0.6],
-        # Open addressing load factors must be less than 1.0
-        LinearProbingHashTable: [0.1,0.2,0.3,0.4,0.5,0.6],
-        QuadraticProbingHashTable: [0.1,0.2,0.3,0.4,0.5,0.6]
+def churn_benchmark(
+    hashtable: dict | HashTable,
+    test_keys: list[Hashable],
+    test_values: Iterable[Any],
+    delete_fraction: float = 0.9,
+) -> tuple[float, float, float]:
+    """Measures the memory held by a hashtable after a bulk load followed by bulk deletes.
+
+    Parameters
+    ----------
+    hashtable : dict | HashTable
+        Hashtable to benchmark.
+    test_keys : list[Hashable]
+        Distinct keys used in benchmark.
+    test_values : Iterable[Any]
+        Values used in benchmark.
+    delete_fraction : float = 0.9
+        Fraction of the keys deleted after loading.
+
+    Returns
+    -------
+    loaded_MB : float
+        Memory usage in megabytes after inserting every key.
+    deleted_MB : float
+        Memory usage in megabytes after deleting delete_fraction of the keys.
+    compacted_MB : float
+        Memory usage in megabytes after calling HashTable.compact (a copy for dict).
+    """
+    description = hashtable.__class__.__name__
+    if isinstance(hashtable, HashTable):
+        description += (
+            f"(minimum_load_factor={hashtable._minimum_load_factor}, "
+            f"growth_policy={hashtable._growth_policy})"
+        )
+
+    for key, value in zip(test_keys, test_values):
+        hashtable[key] = value
+    loaded_MB = deep_getsizeof(hashtable) / 1e6
+
+    num_deleted = int(len(test_keys) * delete_fraction)
+    start_time = time.perf_counter()
+    for key in test_keys[:num_deleted]:
+        del hashtable[key]
+    deletion_time_s = time.perf_counter() - start_time
+    print(f"{description} completed deletion benchmark in {deletion_time_s:.2f} s")
+    deleted_MB = deep_getsizeof(hashtable) / 1e6
+
+    if isinstance(hashtable, HashTable):
+        hashtable.compact()
+    else:
+        hashtable = dict(hashtable)
+    compacted_MB = deep_getsizeof(hashtable) / 1e6
+
+    for key in test_keys[num_deleted:]:
+        assert key in hashtable, f"Key {key!r} was lost"
+
+    print(
+        f"{description} used {loaded_MB:.2f} MB loaded, {deleted_MB:.2f} MB after deletes, "
+        f"{compacted_MB:.2f} MB compacted"
+    )
+    return loaded_MB, deleted_MB, compacted_MB
+
+
+def run_churn_benchmarks(
+    trial_name: str,
+    hashtable_factories: dict[str, Callable[[], dict | HashTable]],
+    delete_fraction: float = 0.9,
+):
+    """Runs churn benchmarks and plots the memory recovered by shrinking and compaction.
+
+    Parameters
+    ----------
+    trial_name: str
+        A name for the trial. Used in the filename of the output plot.
+    hashtable_factories: dict[str, Callable[[], dict | HashTable]]
+        Labels mapped to functions which create an empty hashtable to benchmark.
+    delete_fraction: float = 0.9
+        Fraction of the keys deleted after loading.
+    """
+    try:
+        os.mkdir("plots")
+    except FileExistsError:
+        pass
+
+    print(f'____Beginning trial "{trial_name}"____')
+
+    test_keys = generate_test_keys()
+    test_values = np.random.random(size=len(test_keys))
+
+    results = {
+        label: churn_benchmark(factory(), test_keys, test_values, delete_fraction)
+        for label, factory in hashtable_factories.items()
     }
 
-    run_benchmarks(
-        trial_name="Insert1MNoDupe",
-        maximum_load_factors=maximum_load_factors,
-        duplicate_keys=False,
-        plot_insert=True,
-        plot_lookup=True,
-        plot_memory=True,
+    with warnings.catch_warnings():
+        # Suppress matplotlib warnings
+        warnings.simplefilter("ignore")
+
+        plt.title(f"Memory Usage after deleting {delete_fraction:.0%} of keys")
+        plt.ylabel("Memory Used (MB)")
+
+        positions = np.arange(len(results))
+        width = 0.25
+        for offset, stage in enumerate(["loaded", "after deletes", "compacted"]):
+            plt.bar(
+                positions + (offset - 1) * width,
+                [memory[offset] for memory in results.values()],
+                width,
+                label=stage,
+            )
+        plt.xticks(positions, list(results), rotation=30, ha="right", fontsize="small")
+        plt.legend()
+        plt.tight_layout()
+        plt.savefig(f"plots/{trial_name}_memory.png")
+        plt.close()
+
+
+def generate_skewed_requests(
+    num_requests: int,
+    num_keys: int,
+    zipf_exponent: float = 1.0,
+    scan_fraction: float = 0.0,
+) -> list[int]:
+    """Generates a skewed sequence of requested keys.
+
+    Parameters
+    ----------
+    num_requests : int
+        Length of the request sequence.
+    num_keys : int
+        Number of distinct popular keys. Key k is requested with probability proportional to 1/(k+1)^zipf_exponent.
+    zipf_exponent : float = 1.0
+        Skew of the popularity distribution. Larger values concentrate requests on fewer keys.
+    scan_fraction : float = 0.0
+        Fraction of requests replaced by keys which are only requested once (as in a scan).
+
+    Returns
+    -------
+    requests : list[int]
+        The requested keys.
+    """
+    weights = 1.0 / np.arange(1, num_keys + 1) ** zipf_exponent
+    requests = np.random.choice(num_keys, size=num_requests, p=weights / weights.sum())
+
+    # One-off keys are numbered past the popular ones, so they never repeat
+    is_scan = np.random.random(num_requests) < scan_fraction
+    requests[is_scan] = num_keys + np.arange(is_scan.sum())
+    return requests.tolist()
+
+
+def cache_benchmark(cache: CacheHashTable, requests: list[Hashable]) -> tuple[float, float]:
+    """Replays requests against a read-through cache.
+
+    Every request looks the key up, and inserts it on a miss.
+
+    Parameters
+    ----------
+    cache : CacheHashTable
+        Cache to benchmark.
+    requests : list[Hashable]
+        Sequence of requested keys.
+
+    Returns
+    -------
+    hit_ratio : float
+        Fraction of requests served from the cache.
+    ops_per_s : float
+        Requests completed per second.
+    """
+    start_time = time.perf_counter()
+    for key in requests:
+        try:
+            cache[key]
+        except KeyError:
+            cache[key] = key
+    elapsed_s = time.perf_counter() - start_time
+
+    hit_ratio = cache.stats.hit_ratio
+    ops_per_s = len(requests) / elapsed_s
+    print(
+        f"CacheHashTable(maxsize={cache._capacity}, policy={cache._policy!r}) "
+        f"hit ratio {hit_ratio:.3f}, {ops_per_s:,.0f} ops/s, {cache.stats}"
+    )
+    return hit_ratio, ops_per_s
+
+
+def run_cache_benchmarks(
+    trial_name: str,
+    cache_sizes: list[int],
+    policies: Iterable[str] = POLICIES,
+    num_keys: int = 100000,
+    zipf_exponent: float = 1.0,
+    scan_fraction: float = 0.0,
+):
+    """Runs cache benchmarks on a skewed workload and plots hit ratios and throughput.
+
+    Parameters
+    ----------
+    trial_name: str
+        A name for the trial. Used in the filenames of output plots.
+    cache_sizes: list[int]
+        Values of maxsize to benchmark for each policy.
+    policies: Iterable[str] = POLICIES
+        Eviction policies to compare.
+    num_keys: int = 100000
+        Number of distinct popular keys in the workload (see generate_skewed_requests).
+    zipf_exponent: float = 1.0
+        Skew of the workload.
+    scan_fraction: float = 0.0
+        Fraction of one-off requests in the workload.
+    """
+    try:
+        os.mkdir("plots")
+    except FileExistsError:
+        pass
+
+    print(f'____Beginning trial "{trial_name}"____')
+
+    requests = generate_skewed_requests(KEY_COUNT, num_keys, zipf_exponent, scan_fraction)
+
+    hit_ratios: dict[str, list[float]] = defaultdict(list)
+    throughputs: dict[str, list[float]] = defaultdict(list)
+    for policy in policies:
+        for cache_size in cache_sizes:
+            hit_ratio, ops_per_s = cache_benchmark(CacheHashTable(cache_size, policy), requests)
+            hit_ratios[policy].append(hit_ratio)
+            throughputs[policy].append(ops_per_s)
+
+    info_str = f" (Zipf {zipf_exponent}"
+    if scan_fraction:
+        info_str += f", {scan_fraction:.0%} scans"
+    info_str += ")"
+
+    with warnings.catch_warnings():
+        # Suppress matplotlib warnings
+        warnings.simplefilter("ignore")
+
+        plt.title("Hit Ratio" + info_str)
+        plt.xlabel("Cache Size")
+        plt.ylabel("Hit Ratio")
+        plt.xscale("log")
+        for policy, results in hit_ratios.items():
+            plt.plot(cache_sizes, results, label=policy)
+        plt.legend()
+        plt.savefig(f"plots/{trial_name}_hit_ratio.png")
+        plt.close()
+
+        plt.title("Throughput" + info_str)
+        plt.xlabel("Cache Size")
+        plt.ylabel("Operations per Second")
+        plt.xscale("log")
+        for policy, results in throughputs.items():
+            plt.plot(cache_sizes, results, label=policy)
+        plt.legend()
+        plt.savefig(f"plots/{trial_name}_throughput.png")
+        plt.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the hashtable implementations.")
+    parser.add_argument(
+        "--mode",
+        choices=["hashtables", "churn", "cache", "all"],
+        default="all",
+        help="Which benchmarks to run (default: all).",
     )
+    mode = parser.parse_args().mode
+
+    if mode in ("hashtables", "all"):
+        # TODO: Select and run benchmarks, then look at the figures in the plots/ directory.
+
+        # You can delete/change this if you want. It is just an example.
+        maximum_load_factors = {
+            # Chaining load factor may exceed 1.0
+            ChainingHashTable: [0.1,0.2,0.3,0.4,0.5,0.6],
+            # Open addressing load factors must be less than 1.0
+            LinearProbingHashTable: [0.1,0.2,0.3,0.4,0.5,0.6],
+            QuadraticProbingHashTable: [0.1,0.2,0.3,0.4,0.5,0.6],
+            # Compact layout: small index array, so low load factors cost little memory
+            CompactHashTable: [0.1,0.2,0.3,0.4,0.5,0.6],
+        }
+
+        run_benchmarks(
+            trial_name="Insert1MNoDupe",
+            maximum_load_factors=maximum_load_factors,
+            duplicate_keys=False,
+            plot_insert=True,
+            plot_lookup=True,
+            plot_memory=True,
+        )
+
+        # SwissHashTable is designed to stay fast at high load factors
+        high_load_factors = {
+            LinearProbingHashTable: [0.5, 0.6, 0.7, 0.8, 0.875],
+            SwissHashTable: [0.5, 0.6, 0.7, 0.8, 0.875],
+        }
+
+        run_benchmarks(
+            trial_name="Insert1MHighLoad",
+            maximum_load_factors=high_load_factors,
+            duplicate_keys=False,
+            batched_lookup=True,
+            plot_insert=True,
+            plot_lookup=True,
+            plot_memory=True,
+        )
+
+    if mode in ("churn", "all"):
+        # Memory held after bulk deletes, with and without a minimum load factor
+        run_churn_benchmarks(
+            trial_name="Churn1M",
+            hashtable_factories={
+                "dict": dict,
+                "Chaining": ChainingHashTable,
+                "Chaining (min 0.1)": lambda: ChainingHashTable(minimum_load_factor=0.1),
+                "LinearProbing": lambda: LinearProbingHashTable(maximum_load_factor=0.5),
+                "LinearProbing (min 0.1)": lambda: LinearProbingHashTable(
+                    maximum_load_factor=0.5, minimum_load_factor=0.1
+                ),
+                "LinearProbing (min 0.1, 2^n)": lambda: LinearProbingHashTable(
+                    maximum_load_factor=0.5, minimum_load_factor=0.1, growth_policy=PowerOfTwoGrowth()
+                ),
+                "Compact (min 0.1)": lambda: CompactHashTable(minimum_load_factor=0.1),
+            },
+            delete_fraction=0.9,
+        )
+
+    if mode in ("cache", "all"):
+        # Hit ratio and throughput of each eviction policy on skewed workloads
+        cache_sizes = [100, 1000, 10000]
+        run_cache_benchmarks(trial_name="CacheZipf", cache_sizes=cache_sizes)
+        run_cache_benchmarks(trial_name="CacheZipfScan", cache_sizes=cache_sizes, scan_fraction=0.3)
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Callable, Iterable, Type
+
+from chaining import ChainingHashTable
+from hashtable import BLANK, KT, VT, HashTable
+
+POLICIES = ("lru", "lfu", "tinylfu")
+
+# Odd multipliers used to derive one Count-Min Sketch row index per hash
+_SKETCH_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+# Counters saturate at 15, as in the TinyLFU paper's 4-bit counters
+_SKETCH_MAX_COUNT = 15
+
+
+@dataclass
+class CacheStats:
+    """Counters describing how a CacheHashTable has been used."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    rejections: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+class FrequencySketch:
+    """Count-Min Sketch estimating how often keys were seen recently, used for TinyLFU admission.
+
+    Every `sample_size` increments, all counters are halved so that old popularity fades.
+
+    Parameters
+    ----------
+    width : int
+        Minimum number of counters per row (rounded up to a power of two).
+    sample_size : int
+        Number of increments between two aging steps.
+    """
+
+    def __init__(self, width: int, sample_size: int) -> None:
+        self._bits = max(4, (width - 1).bit_length())
+        self._width = 1 << self._bits
+        self._counters = array("B", [0]) * (self._width * len(_SKETCH_SEEDS))
+        self._sample_size = sample_size
+        self._num_increments = 0
+
+    def _indices(self, key: KT) -> Iterable[int]:
+        h = hash(key)
+        for row, seed in enumerate(_SKETCH_SEEDS):
+            yield row * self._width + (((h * seed) & 0xFFFFFFFFFFFFFFFF) >> (64 - self._bits))
+
+    def increment(self, key: KT):
+        counters = self._counters
+        for index in self._indices(key):
+            if counters[index] < _SKETCH_MAX_COUNT:
+                counters[index] += 1
+
+        self._num_increments += 1
+        if self._num_increments >= self._sample_size:
+            self._num_increments //= 2
+            self._counters = array("B", (count >> 1 for count in counters))
+
+    def estimate(self, key: KT) -> int:
+        counters = self._counters
+        return min(counters[index] for index in self._indices(key))
+
+
+class CacheHashTable(HashTable):
+    """A bounded HashTable which evicts entries once it holds maxsize of them.
+
+    Entries live in fixed slots. The eviction order is an intrusive doubly linked list
+    stored in two integer arrays (`_prev`/`_next`) indexed by slot, so that moving or
+    evicting an entry is O(1) and allocates nothing. A slot one past the last entry
+    is the list's sentinel; the entry after it is the next to be evicted.
+
+    Eviction policies
+    -----------------
+    "lru"
+        Evicts the least recently used entry.
+    "lfu"
+        Evicts the least frequently used entry, breaking ties by recency. The list is
+        kept sorted by access count, and the last slot of every count is remembered,
+        so an access moves the entry to the end of the next count's group in O(1).
+    "tinylfu"
+        LRU eviction with TinyLFU admission: when the cache is full, a new key is only
+        admitted if a FrequencySketch estimates it to be more popular than the entry it
+        would evict. This keeps one-off keys (e.g. scans) from flushing popular ones.
+
+    Parameters
+    ----------
+    maxsize : int = 1024
+        Maximum number of entries.
+    policy : str = "lru"
+        Eviction policy, one of POLICIES.
+    ttl : float | None = None
+        If given, entries expire this many seconds after they were last written.
+        Expired entries are removed lazily when looked up, or all at once by expire().
+    index_cls : Type[HashTable] = ChainingHashTable
+        HashTable class used to map keys to slots.
+    clock : Callable[[], float] = time.monotonic
+        Source of the current time, in seconds.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        policy: str = "lru",
+        ttl: float | None = None,
+        index_cls: Type[HashTable] = ChainingHashTable,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {POLICIES}.")
+        # The slots never need to grow: a full cache evicts instead
+        super().__init__(initial_capacity=maxsize, maximum_load_factor=1.0)
+
+        self._policy = policy
+        self._ttl = ttl
+        self._clock = clock
+        self._index = index_cls()
+        self.stats = CacheStats()
+
+        self._head = maxsize
+        self._prev = array("q", [self._head]) * (maxsize + 1)
+        self._next = array("q", [self._head]) * (maxsize + 1)
+        self._free_slots = array("q", range(maxsize - 1, -1, -1))
+
+        if policy == "lfu":
+            self._counts = array("q", [0]) * maxsize
+            # Access count -> last slot in the list with that count
+            self._count_tails = index_cls()
+        if policy == "tinylfu":
+            self._sketch = FrequencySketch(width=maxsize, sample_size=10 * maxsize)
+            # Key of the last lookup miss, which was already counted by the sketch
+            self._missed_key = BLANK
+        if ttl is not None:
+            self._expiry_times = array("d", [0.0]) * maxsize
+
+    def _resize(self, new_capacity: int | None = None):
+        """Keeps the capacity of the cache, which is fixed by maxsize."""
+        if new_capacity is not None and new_capacity != self._capacity:
+            raise ValueError(f"The capacity of a cache is fixed by maxsize={self._capacity}.")
+
+    def compact(self):
+        """Removes every expired entry (the capacity of a cache is fixed by maxsize)."""
+        self.expire()
+
+    def reserve(self, num_elements: int):
+        """Checks that the cache can hold num_elements, which it cannot grow beyond maxsize."""
+        if num_elements > self._capacity:
+            raise ValueError(f"A cache cannot hold more than maxsize={self._capacity} entries.")
+
+    def __len__(self) -> int:
+        """Counts the unexpired entries, as items() yields them.
+
+        With a ttl, this scans every entry, since expired ones are only removed lazily.
+        """
+        if self._ttl is None:
+            return self._num_elements
+        now = self._clock()
+        return sum(
+            1
+            for slot, bucket in enumerate(self._buckets)
+            if bucket is not BLANK and self._expiry_times[slot] > now
+        )
+
+    def items(self) -> Iterable[tuple[KT, VT]]:
+        """Yields the unexpired entries, starting with the next one to be evicted."""
+        now = self._clock() if self._ttl is not None else 0.0
+        slot = self._next[self._head]
+        while slot != self._head:
+            if self._ttl is None or self._expiry_times[slot] > now:
+                yield self._buckets[slot]
+            slot = self._next[slot]
+
+    def _link_after(self, slot: int, anchor: int):
+        following = self._next[anchor]
+        self._prev[slot] = anchor
+        self._next[slot] = following
+        self._next[anchor] = slot
+        self._prev[following] = slot
+
+    def _unlink(self, slot: int):
+        previous, following = self._prev[slot], self._next[slot]
+        self._next[previous] = following
+        self._prev[following] = previous
+        if self._policy == "lfu":
+            count = self._counts[slot]
+            if self._count_tails[count] == slot:
+                if previous != self._head and self._counts[previous] == count:
+                    self._count_tails[count] = previous
+                else:
+                    del self._count_tails[count]
+
+    def _link_with_count(self, slot: int, count: int, fallback_anchor: int):
+        """Links an LFU slot at the end of its count's group, or after fallback_anchor if the group is empty."""
+        self._counts[slot] = count
+        try:
+            anchor = self._count_tails[count]
+        except KeyError:
+            anchor = fallback_anchor
+        self._link_after(slot, anchor)
+        self._count_tails[count] = slot
+
+    def _touch(self, slot: int):
+        """Records an access to the entry in the given slot."""
+        if self._policy == "lfu":
+            count = self._counts[slot]
+            # The group for count + 1 (if any) starts right after the group for count
+            anchor = self._count_tails[count]
+            if anchor == slot:
+                anchor = self._prev[slot]
+            self._unlink(slot)
+            self._link_with_count(slot, count + 1, anchor)
+        else:
+            self._unlink(slot)
+            self._link_after(slot, self._prev[self._head])
+
+    def _remove(self, slot: int):
+        key, _ = self._buckets[slot]
+        self._unlink(slot)
+        del self._index[key]
+        self._buckets[slot] = BLANK
+        self._free_slots.append(slot)
+        self._num_elements -= 1
+
+    def _is_expired(self, slot: int) -> bool:
+        return self._ttl is not None and self._expiry_times[slot] <= self._clock()
+
+    def __getitem__(self, search_key: KT) -> VT:
+        if self._policy == "tinylfu":
+            self._sketch.increment(search_key)
+        try:
+            slot = self._index[search_key]
+        except KeyError:
+            self.stats.misses += 1
+            if self._policy == "tinylfu":
+                self._missed_key = search_key
+            raise KeyError("Search key is not present.") from None
+
+        if self._is_expired(slot):
+            self._remove(slot)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            raise KeyError("Search key has expired.")
+
+        self.stats.hits += 1
+        self._touch(slot)
+        return self._buckets[slot][1]
+
+    def __contains__(self, key: object) -> bool:
+        """Checks for an unexpired entry without counting a hit or miss or recording an access."""
+        try:
+            slot = self._index[key]
+        except KeyError:
+            return False
+        return not self._is_expired(slot)
+
+    def __setitem__(self, input_key: KT, input_value: VT):
+        try:
+            slot = self._index[input_key]
+        except KeyError:
+            slot = -1
+
+        if slot >= 0:
+            # Update an existing entry
+            self._buckets[slot] = (input_key, input_value)
+            self._touch(slot)
+        else:
+            if self._policy == "tinylfu":
+                # Filling in a key after a lookup miss (read-through) is a single access
+                if self._missed_key is BLANK or self._missed_key != input_key:
+                    self._sketch.increment(input_key)
+                self._missed_key = BLANK
+            if self._num_elements == self._capacity:
+                victim = self._next[self._head]
+                if self._is_expired(victim):
+                    self.stats.expirations += 1
+                else:
+                    if self._policy == "tinylfu":
+                        victim_key, _ = self._buckets[victim]
+                        if self._sketch.estimate(input_key) <= self._sketch.estimate(victim_key):
+                            self.stats.rejections += 1
+                            return
+                    self.stats.evictions += 1
+                self._remove(victim)
+
+            slot = self._free_slots.pop()
+            self._buckets[slot] = (input_key, input_value)
+            self._index[input_key] = slot
+            self._num_elements += 1
+            if self._policy == "lfu":
+                self._link_with_count(slot, 1, self._head)
+            else:
+                self._link_after(slot, self._prev[self._head])
+
+        if self._ttl is not None:
+            self._expiry_times[slot] = self._clock() + self._ttl
+
+    def __delitem__(self, key: KT):
+        try:
+            slot = self._index[key]
+        except KeyError:
+            raise KeyError("Key is not present.") from None
+        self._remove(slot)
+
+    def expire(self) -> int:
+        """Removes every expired entry.
+
+        Returns
+        -------
+        num_expired : int
+            Number of entries removed.
+        """
+        if self._ttl is None:
+            return 0
+        now = self._clock()
+        expired = [
+            slot
+            for slot, bucket in enumerate(self._buckets)
+            if bucket is not BLANK and self._expiry_times[slot] <= now
+        ]
+        for slot in expired:
+            self._remove(slot)
+        self.stats.expirations += len(expired)
+        return len(expired)
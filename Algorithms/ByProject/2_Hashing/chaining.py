@@ -3,14 +3,20 @@ from __future__ import annotations
 from collections import deque
 from typing import Iterable
 
-from hashtable import BLANK, KT, VT, HashTable
+from hashtable import BLANK, KT, VT, GrowthPolicy, HashTable
 
 
 class ChainingHashTable(HashTable):
     """HashTable implementation which resolves collisions by chaining."""
 
-    def __init__(self, initial_capacity: int = 8, maximum_load_factor: float = 1.0) -> None:
-        super().__init__(initial_capacity, maximum_load_factor)
+    def __init__(
+        self,
+        initial_capacity: int = 8,
+        maximum_load_factor: float = 1.0,
+        minimum_load_factor: float = 0.0,
+        growth_policy: GrowthPolicy | None = None,
+    ) -> None:
+        super().__init__(initial_capacity, maximum_load_factor, minimum_load_factor, growth_policy)
 
     def items(self) -> Iterable[tuple[KT, VT]]:
         for bucket in self._buckets:
@@ -55,3 +61,23 @@ class ChainingHashTable(HashTable):
         if self._load_factor > self._maximum_load_factor:
             # Maximum load factor exceeded, increase size of table
             self._resize()
+
+    def __delitem__(self, key: KT):
+        index = hash(key) % self._capacity
+        bucket = self._buckets[index]
+
+        for i, (bucket_key, _) in enumerate(bucket):
+            if bucket_key == key:
+                del bucket[i]
+                break
+        else:
+            raise KeyError("Key is not present.")
+
+        if not bucket:
+            # Release the empty deque
+            self._buckets[index] = BLANK
+        self._num_elements -= 1
+
+        if self._load_factor < self._minimum_load_factor:
+            # Minimum load factor reached, decrease size of table
+            self._shrink()
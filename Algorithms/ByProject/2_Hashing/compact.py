@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from array import array
+from typing import Iterable
+
+from hashtable import BLANK, KT, VT, GrowthPolicy, HashTable, PowerOfTwoGrowth
+
+# Markers stored in the sparse index array
+EMPTY = -1
+DUMMY = -2
+
+# Number of hash bits shifted into the probe sequence at each step (same as CPython)
+PERTURB_SHIFT = 5
+
+
+def _index_array(capacity: int) -> array:
+    """Creates a sparse index array using the smallest integer type able to address capacity entries.
+
+    Parameters
+    ----------
+    capacity : int
+        Number of slots in the index array.
+
+    Returns
+    -------
+    indices : array
+        An array of EMPTY markers.
+    """
+    for typecode in ("b", "h", "i", "q"):
+        if capacity < 2 ** (8 * array(typecode).itemsize - 1):
+            break
+    return array(typecode, [EMPTY]) * capacity
+
+
+class CompactHashTable(HashTable):
+    """HashTable implementation using the compact layout of CPython's dict.
+
+    The (key, value) pairs are appended to a dense entries list in insertion order,
+    and the sparse table of `capacity` slots only stores small integer indices into it.
+    The index array uses the narrowest integer type that can address the entries
+    (1 byte per slot for small tables), so a table at a low load factor costs a few
+    bytes per empty slot instead of a full pointer, and iteration walks the dense
+    entries in O(n) rather than scanning all O(capacity) slots.
+
+    Unlike the other HashTable implementations, insertion order is preserved.
+    Deleted entries leave a gap in the entries list and a DUMMY marker in the index
+    array; both are dropped the next time the table is resized.
+    """
+
+    def __init__(
+        self,
+        initial_capacity: int = 8,
+        maximum_load_factor: float = 0.6,
+        minimum_load_factor: float = 0.0,
+        growth_policy: GrowthPolicy | None = None,
+    ) -> None:
+        super().__init__(initial_capacity, maximum_load_factor, minimum_load_factor, growth_policy)
+        self._buckets = _index_array(self._capacity)
+        self._entries: list = []
+
+    def _round_capacity(self, capacity: int) -> int:
+        return PowerOfTwoGrowth().round_up(capacity)
+
+    def items(self) -> Iterable[tuple[KT, VT]]:
+        for entry in self._entries:
+            if entry is BLANK:
+                continue
+            yield entry
+
+    def _lookup(self, key: KT) -> tuple[int, int]:
+        """Probes the index array for the given key.
+
+        Parameters
+        ----------
+        key : KT
+            Key to look up.
+
+        Returns
+        -------
+        slot : int
+            Slot in the index array holding the key, or the first free slot
+            where it should be inserted if the key is not present.
+        entry_index : int
+            Position of the key in the entries list, or EMPTY if it is not present.
+        """
+        indices = self._buckets
+        entries = self._entries
+        mask = self._capacity - 1
+        perturb = hash(key) & 0xFFFFFFFFFFFFFFFF
+        slot = perturb & mask
+        free_slot = EMPTY
+        while True:
+            entry_index = indices[slot]
+            if entry_index == EMPTY:
+                return (slot if free_slot == EMPTY else free_slot), EMPTY
+            if entry_index == DUMMY:
+                if free_slot == EMPTY:
+                    free_slot = slot
+            else:
+                entry_key = entries[entry_index][0]
+                if entry_key is key or entry_key == key:
+                    return slot, entry_index
+            perturb >>= PERTURB_SHIFT
+            slot = (slot * 5 + perturb + 1) & mask
+
+    def __getitem__(self, search_key: KT) -> VT:
+        _, entry_index = self._lookup(search_key)
+        if entry_index == EMPTY:
+            raise KeyError("Search key is not present.")
+        return self._entries[entry_index][1]
+
+    def __setitem__(self, input_key: KT, input_value: VT):
+        slot, entry_index = self._lookup(input_key)
+        if entry_index != EMPTY:
+            self._entries[entry_index] = (input_key, input_value)
+            return
+
+        self._buckets[slot] = len(self._entries)
+        self._entries.append((input_key, input_value))
+        self._num_elements += 1
+
+        # Gaps left by deleted entries count towards the load: this bounds both the
+        # number of used/DUMMY slots and the largest entry index the array must hold
+        if len(self._entries) / self._capacity > self._maximum_load_factor:
+            if self._load_factor > self._maximum_load_factor / 2:
+                self._resize()
+            else:
+                # Mostly gaps: rebuild at the same size to drop them
+                self._resize(self._capacity)
+
+    def __delitem__(self, key: KT):
+        slot, entry_index = self._lookup(key)
+        if entry_index == EMPTY:
+            raise KeyError("Key is not present.")
+        self._buckets[slot] = DUMMY
+        self._entries[entry_index] = BLANK
+        self._num_elements -= 1
+
+        if self._load_factor < self._minimum_load_factor:
+            # Minimum load factor reached, decrease size of table
+            self._shrink()
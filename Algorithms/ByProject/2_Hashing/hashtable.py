@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from abc import abstractmethod
+import math
+from abc import ABC, abstractmethod
 from collections.abc import Iterable, Iterator
 from typing import Any, Generator, Hashable, MutableMapping, TypeVar
 
@@ -27,35 +28,214 @@ class Blank(Iterator):
 BLANK = Blank()
 
 
+class GrowthPolicy(ABC):
+    """Abstract base class deciding which capacities a HashTable is resized to."""
+
+    @abstractmethod
+    def round_up(self, capacity: int) -> int:
+        """Returns the smallest capacity allowed by the policy which is at least `capacity`."""
+        ...
+
+    @abstractmethod
+    def grow(self, capacity: int) -> int:
+        """Returns the capacity to use when a table of the given capacity is too full."""
+        ...
+
+    @abstractmethod
+    def shrink(self, capacity: int) -> int:
+        """Returns the capacity to use when a table of the given capacity is too empty."""
+        ...
+
+
+class FactorGrowth(GrowthPolicy):
+    """Multiplies (or divides) the capacity by a constant factor."""
+
+    def __init__(self, factor: float = 2) -> None:
+        if factor <= 1:
+            raise ValueError("Growth factor must be greater than 1.")
+        self.factor = factor
+
+    def round_up(self, capacity: int) -> int:
+        return max(1, capacity)
+
+    def grow(self, capacity: int) -> int:
+        return max(capacity + 1, int(capacity * self.factor))
+
+    def shrink(self, capacity: int) -> int:
+        return max(1, int(capacity / self.factor))
+
+    def __repr__(self) -> str:
+        return f"FactorGrowth({self.factor})"
+
+
+class PowerOfTwoGrowth(GrowthPolicy):
+    """Keeps the capacity a power of two, doubling or halving it.
+
+    Triangular quadratic probing is only guaranteed to visit every slot with these capacities.
+    """
+
+    def round_up(self, capacity: int) -> int:
+        return 1 << max(0, capacity - 1).bit_length()
+
+    def grow(self, capacity: int) -> int:
+        return self.round_up(capacity + 1) if capacity & (capacity - 1) else 2 * capacity
+
+    def shrink(self, capacity: int) -> int:
+        return max(1, self.round_up(capacity) // 2)
+
+    def __repr__(self) -> str:
+        return "PowerOfTwoGrowth()"
+
+
+def _is_prime(n: int) -> bool:
+    if n < 2:
+        return False
+    if n % 2 == 0:
+        return n == 2
+    divisor = 3
+    while divisor * divisor <= n:
+        if n % divisor == 0:
+            return False
+        divisor += 2
+    return True
+
+
+class PrimeGrowth(GrowthPolicy):
+    """Keeps the capacity a prime number, scaling it by roughly a constant factor.
+
+    Prime capacities spread keys whose hashes share a common factor (such as multiples
+    of a power of two) over all the slots, at the cost of a slower modulo.
+    """
+
+    def __init__(self, factor: float = 2) -> None:
+        if factor <= 1:
+            raise ValueError("Growth factor must be greater than 1.")
+        self.factor = factor
+
+    def round_up(self, capacity: int) -> int:
+        capacity = max(2, capacity)
+        while not _is_prime(capacity):
+            capacity += 1
+        return capacity
+
+    def grow(self, capacity: int) -> int:
+        return self.round_up(max(capacity + 1, int(capacity * self.factor)))
+
+    def shrink(self, capacity: int) -> int:
+        return self.round_up(int(capacity / self.factor))
+
+    def __repr__(self) -> str:
+        return f"PrimeGrowth({self.factor})"
+
+
 class HashTable(MutableMapping[KT, VT]):
-    """Abstract base class for a hashtable."""
+    """Abstract base class for a hashtable.
+
+    Parameters
+    ----------
+    initial_capacity : int = 8
+        Number of slots the table starts with.
+    maximum_load_factor : float = 0.6
+        The table grows whenever an insertion pushes the load factor above this value.
+    minimum_load_factor : float = 0.0
+        The table shrinks whenever a deletion drops the load factor below this value.
+        The default of 0 never shrinks. To avoid resizing back and forth, keep this well
+        below maximum_load_factor divided by the growth factor.
+    growth_policy : GrowthPolicy | None = None
+        Chooses the capacities used when growing and shrinking. Defaults to FactorGrowth(2).
+    """
 
     def __init__(
         self,
         initial_capacity: int = 8,
         maximum_load_factor: float = 0.6,
+        minimum_load_factor: float = 0.0,
+        growth_policy: GrowthPolicy | None = None,
     ):
+        if not 0 <= minimum_load_factor < maximum_load_factor:
+            raise ValueError("minimum_load_factor must be in [0, maximum_load_factor).")
+        if growth_policy is None:
+            growth_policy = FactorGrowth(2)
+
+        initial_capacity = self._round_capacity(initial_capacity)
         self._capacity = initial_capacity
         self._buckets: list[Any] = [BLANK] * initial_capacity
         self._num_elements = 0
 
         self._maximum_load_factor = maximum_load_factor
-        self._growth_factor = 2
+        self._minimum_load_factor = minimum_load_factor
+        self._growth_policy = growth_policy
 
     @property
     def _load_factor(self) -> float:
         return self._num_elements / self._capacity
 
-    def _resize(self):
-        new_capacity = self._capacity * self._growth_factor
+    def _resize(self, new_capacity: int | None = None):
+        """Rebuilds the table with a new capacity, reinserting every element.
+
+        Parameters
+        ----------
+        new_capacity : int | None = None
+            Capacity of the rebuilt table. Defaults to the next capacity of the growth policy.
+        """
+        if new_capacity is None:
+            new_capacity = self._growth_policy.grow(self._capacity)
         new_table = self.__class__(
             initial_capacity=new_capacity,
             maximum_load_factor=self._maximum_load_factor,
+            minimum_load_factor=self._minimum_load_factor,
+            growth_policy=self._growth_policy,
         )
         for key, value in self.items():
             new_table[key] = value
         self.__dict__.update(new_table.__dict__)
 
+    def _round_capacity(self, capacity: int) -> int:
+        """Rounds a capacity up to one the table's layout or probing supports.
+
+        The capacity given to __init__ is rounded in the same way, so any capacity
+        chosen by the growth policy is passed through this before comparing it with
+        the current one.
+        """
+        return capacity
+
+    def _capacity_for(self, num_elements: int) -> int:
+        """Smallest capacity allowed by the growth policy that holds num_elements without growing."""
+        capacity = max(1, math.ceil(num_elements / self._maximum_load_factor))
+        while num_elements / capacity > self._maximum_load_factor:
+            capacity += 1
+        return self._round_capacity(self._growth_policy.round_up(capacity))
+
+    def _shrink(self):
+        """Shrinks the table according to the growth policy, without exceeding the maximum load factor."""
+        new_capacity = self._round_capacity(self._growth_policy.shrink(self._capacity))
+        if new_capacity >= self._capacity:
+            # Rounding undid the shrink (e.g. a factor below 2 with power-of-two
+            # capacities): shrink as far as the elements allow instead
+            new_capacity = 0
+        new_capacity = max(new_capacity, self._capacity_for(self._num_elements))
+        if new_capacity < self._capacity:
+            self._resize(new_capacity)
+
+    def compact(self):
+        """Rebuilds the table at the smallest capacity able to hold its current elements.
+
+        This also discards any deleted-slot markers left behind by open addressing.
+        """
+        self._resize(self._capacity_for(self._num_elements))
+
+    def reserve(self, num_elements: int):
+        """Grows the table so that it can hold num_elements without resizing again.
+
+        Parameters
+        ----------
+        num_elements : int
+            Total number of elements the table should be able to hold.
+        """
+        new_capacity = self._capacity_for(num_elements)
+        if new_capacity > self._capacity:
+            self._resize(new_capacity)
+
     def __repr__(self) -> str:
         pairs = []
         for key, value in self.items():
@@ -104,6 +284,28 @@ class HashTable(MutableMapping[KT, VT]):
         """
         ...
 
+    def get_many(self, search_keys: Iterable[KT]) -> list[VT]:
+        """Looks up the values associated with many search keys at once.
+
+        Subclasses may override this with a batched implementation.
+
+        Parameters
+        ----------
+        search_keys : Iterable[KT]
+            Keys to look up in the HashTable.
+
+        Returns
+        -------
+        values : list[VT]
+            Values associated with each search key, in the same order.
+
+        Raises
+        ------
+        KeyError
+            If any of the search keys is not contained in the HashTable.
+        """
+        return [self[key] for key in search_keys]
+
     @abstractmethod
     def __setitem__(self, key: KT, value: VT):
         """Inserts the given key and value into the HashTable.
@@ -117,14 +319,20 @@ class HashTable(MutableMapping[KT, VT]):
         """
         ...
 
+    @abstractmethod
     def __delitem__(self, key: KT):
         """Deletes the given key from the HashTable.
 
+        The table shrinks if the load factor drops below the minimum load factor.
+
         Parameters
         ----------
         key : KT
             Key to delete.
+
+        Raises
+        ------
+        KeyError
+            If the key is not contained in the HashTable.
         """
-        # Implementation of __delitem__ is not required.
-        # We use NotImplementedError as a placeholder.
-        raise NotImplementedError
+        ...
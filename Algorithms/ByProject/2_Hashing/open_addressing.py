@@ -6,58 +6,102 @@ from re import I
 from tracemalloc import start
 from typing import Iterable
 import itertools
-from hashtable import BLANK, KT, VT, HashTable
+from hashtable import BLANK, KT, VT, GrowthPolicy, HashTable, PowerOfTwoGrowth
+
+
+class Deleted:
+    """Placeholder representing a slot whose element was deleted (a tombstone)."""
+
+    def __repr__(self) -> str:
+        return "DELETED"
+
+
+# Probing must continue past deleted slots, so they cannot simply be reset to BLANK
+DELETED = Deleted()
 
 
 class OpenAddressingHashTable(HashTable):
     """Abstract base class for hashtables which use open addressing to resolve collisions."""
 
+    def __init__(
+        self,
+        initial_capacity: int = 8,
+        maximum_load_factor: float = 0.6,
+        minimum_load_factor: float = 0.0,
+        growth_policy: GrowthPolicy | None = None,
+    ) -> None:
+        super().__init__(initial_capacity, maximum_load_factor, minimum_load_factor, growth_policy)
+        self._num_deleted = 0
+
     def items(self) -> Iterable[tuple[KT, VT]]:
         for bucket in self._buckets:
-            if bucket is BLANK:
+            if bucket is BLANK or bucket is DELETED:
                 continue
             yield bucket
 
+    def _find(self, key: KT) -> int:
+        """Probes for the given key, returning its index or -1 if it is not present."""
+        index = hash(key) % self._capacity
+        buckets = self._buckets
+        index_sequence = iter(self._generate_indices(start_index=index))
+        next(index_sequence)
+        while buckets[index] is not BLANK:
+            if buckets[index] is not DELETED and buckets[index][0] == key:
+                return index
+            index = next(index_sequence)
+        return -1
+
     def __setitem__(self, input_key: KT, input_value: VT):
         index = hash(input_key) % self._capacity
         buckets = self._buckets
 
+        # Probe until we find a blank slot or matching key, remembering the first
+        # deleted slot on the way so that it can be reused
+        available = -1
         if buckets[index] is not BLANK:
             index_sequence = iter(self._generate_indices(start_index=index))
-            while buckets[index] is not BLANK and buckets[index][0] != input_key:
+            next(index_sequence)
+            while buckets[index] is not BLANK:
+                if buckets[index] is DELETED:
+                    if available < 0:
+                        available = index
+                elif buckets[index][0] == input_key:
+                    buckets[index] = (input_key, input_value)
+                    return
                 index = next(index_sequence)
 
-        if buckets[index] is BLANK:
-            self._num_elements += 1
-
-            # TODO: Encountered collision, probe until we find a blank slot or matching key (updating index)
-            
-        self._buckets[index] = (input_key, input_value)
-
-        if self._load_factor > self._maximum_load_factor:
-            # Maximum load factor exceeded, increase size of table
-            self._resize()
+        if available >= 0:
+            index = available
+            self._num_deleted -= 1
+        self._num_elements += 1
+        buckets[index] = (input_key, input_value)
+
+        if (self._num_elements + self._num_deleted) / self._capacity > self._maximum_load_factor:
+            # Maximum load factor exceeded (tombstones lengthen probes like elements do)
+            if self._load_factor > self._maximum_load_factor / 2:
+                # Increase size of table
+                self._resize()
+            else:
+                # Mostly tombstones: rebuild at the same size to clear them
+                self._resize(self._capacity)
 
     def __getitem__(self, search_key: KT) -> VT:
-        index = hash(search_key) % self._capacity
-        index_sequence = iter(self._generate_indices(start_index=index))
-        """
-        buckets = self._buckets
-        index_sequence = iter(self._generate_indices(start_index=index))
-        while buckets[index][0] != search_key:
-            index = next(index_sequence)
-            if self._buckets[index][0] == search_key:
-                return self._buckets[index][1]
-        """
-        while self._buckets[index] is not BLANK and self._buckets[index][0] != search_key:
-            index = next(index_sequence)
-        if self._buckets[index] is not BLANK and self._buckets[index][0] == search_key:
-            return self._buckets[index][1]
-        raise KeyError("Search key is not present.")
-
-        # TODO: Loop through the indices to find the value matching the search key
-        # Raise KeyError if the search key is not present
-        ...
+        index = self._find(search_key)
+        if index < 0:
+            raise KeyError("Search key is not present.")
+        return self._buckets[index][1]
+
+    def __delitem__(self, key: KT):
+        index = self._find(key)
+        if index < 0:
+            raise KeyError("Key is not present.")
+        self._buckets[index] = DELETED
+        self._num_elements -= 1
+        self._num_deleted += 1
+
+        if self._load_factor < self._minimum_load_factor:
+            # Minimum load factor reached, decrease size of table
+            self._shrink()
 
     @abstractmethod
     def _generate_indices(self, start_index: int) -> Iterable[int]:
@@ -92,7 +136,14 @@ class LinearProbingHashTable(OpenAddressingHashTable):
 
 
 class QuadraticProbingHashTable(OpenAddressingHashTable):
-    """OpenAddressingHashTable implementation using quadratic probing."""
+    """OpenAddressingHashTable implementation using quadratic probing.
+
+    Triangular probing only visits every slot when the capacity is a power of two, so
+    capacities chosen by the growth policy are rounded up to one.
+    """
+
+    def _round_capacity(self, capacity: int) -> int:
+        return PowerOfTwoGrowth().round_up(capacity)
 
     def _generate_indices(self, start_index: int) -> Iterable[int]:
         i = 0
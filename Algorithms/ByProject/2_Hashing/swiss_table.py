@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+
+from hashtable import BLANK, KT, VT, GrowthPolicy, HashTable, PowerOfTwoGrowth
+
+# Number of control bytes inspected at once (one SSE2 register in the C++ SwissTable)
+GROUP_WIDTH = 16
+
+# Control bytes. A full slot stores the low 7 bits of its key's hash (0b0xxxxxxx),
+# so neither of these markers can ever match a hash fragment.
+EMPTY = 0b10000000
+DELETED = 0b11111110
+
+# Number of keys processed per vectorized step in get_many
+_BATCH_SIZE = 1 << 16
+
+
+def _split_hash(key: KT) -> tuple[int, int]:
+    """Splits the hash of a key into a group selector (h1) and a 7-bit fragment (h2)."""
+    h = hash(key)
+    return h >> 7, h & 0x7F
+
+
+class SwissHashTable(HashTable):
+    """HashTable implementation modeled on Abseil's SwissTable and Folly's F14.
+
+    Alongside the bucket list, the table keeps a compact bytearray of control bytes:
+    one byte per slot holding a 7-bit fragment of the key's hash, or a marker for an
+    empty/deleted slot. Slots are probed a group of GROUP_WIDTH at a time by searching
+    the whole group of control bytes for the fragment, and full keys are only compared
+    where the fragment matches. A miss is usually resolved by looking at the control
+    bytes alone, without touching any of the tuples in the bucket list.
+
+    Single-key operations scan a group with bytearray.find (a memchr in C), while
+    get_many views the control bytes as a NumPy array and compares the first group of
+    every key in the batch with one vectorized operation.
+
+    The capacity is rounded up to a power of two which is a multiple of GROUP_WIDTH,
+    so that groups are aligned and triangular probing over groups visits every group.
+    The maximum load factor must be less than 1, so that every probe ends at an empty slot.
+    """
+
+    def __init__(
+        self,
+        initial_capacity: int = 16,
+        maximum_load_factor: float = 0.875,
+        minimum_load_factor: float = 0.0,
+        growth_policy: GrowthPolicy | None = None,
+    ) -> None:
+        if not maximum_load_factor < 1:
+            raise ValueError("maximum_load_factor must be less than 1.")
+        super().__init__(initial_capacity, maximum_load_factor, minimum_load_factor, growth_policy)
+        self._ctrl = bytearray([EMPTY]) * self._capacity
+        self._num_deleted = 0
+
+    def _round_capacity(self, capacity: int) -> int:
+        return max(GROUP_WIDTH, PowerOfTwoGrowth().round_up(capacity))
+
+    @property
+    def _num_groups(self) -> int:
+        return self._capacity // GROUP_WIDTH
+
+    def _generate_groups(self, h1: int) -> Iterable[int]:
+        """Generates the starting slot of each group in the probing sequence.
+
+        Parameters
+        ----------
+        h1 : int
+            Group selector taken from the high bits of the key's hash.
+
+        Yields
+        ------
+        starts : Iterable[int]
+            Index of the first slot in each group, using triangular (quadratic) probing.
+        """
+        mask = self._num_groups - 1
+        group = h1 & mask
+        for i in range(self._num_groups):
+            yield group * GROUP_WIDTH
+            group = (group + i + 1) & mask
+
+    def items(self) -> Iterable[tuple[KT, VT]]:
+        buckets = self._buckets
+        # Full slots are exactly those with the high bit of the control byte unset
+        ctrl = np.frombuffer(self._ctrl, dtype=np.uint8)
+        for index in np.flatnonzero(ctrl < EMPTY).tolist():
+            yield buckets[index]
+
+    def _find(self, key: KT, h1: int, h2: int, skip_groups: int = 0) -> int:
+        """Finds the slot holding the given key, or -1 if it is not present."""
+        ctrl = self._ctrl
+        buckets = self._buckets
+        for n, start in enumerate(self._generate_groups(h1)):
+            if n < skip_groups:
+                continue
+            end = start + GROUP_WIDTH
+            index = ctrl.find(h2, start, end)
+            while index >= 0:
+                bucket = buckets[index]
+                if bucket[0] is key or bucket[0] == key:
+                    return index
+                index = ctrl.find(h2, index + 1, end)
+            if ctrl.find(EMPTY, start, end) >= 0:
+                return -1
+        return -1
+
+    def __getitem__(self, search_key: KT) -> VT:
+        h1, h2 = _split_hash(search_key)
+        index = self._find(search_key, h1, h2)
+        if index < 0:
+            raise KeyError("Search key is not present.")
+        return self._buckets[index][1]
+
+    def get_many(self, search_keys: Iterable[KT]) -> list[VT]:
+        """Looks up the values associated with many search keys at once.
+
+        The first group of every key is checked with vectorized comparisons over a
+        (batch, GROUP_WIDTH) matrix of control bytes. Only keys whose first group is
+        full and holds no match fall back to the scalar probing loop.
+
+        Parameters
+        ----------
+        search_keys : Iterable[KT]
+            Keys to look up in the HashTable.
+
+        Returns
+        -------
+        values : list[VT]
+            Values associated with each search key, in the same order.
+
+        Raises
+        ------
+        KeyError
+            If any of the search keys is not contained in the HashTable.
+        """
+        search_keys = list(search_keys)
+        values: list = [BLANK] * len(search_keys)
+        for batch_start in range(0, len(search_keys), _BATCH_SIZE):
+            batch = search_keys[batch_start : batch_start + _BATCH_SIZE]
+            self._get_batch(batch, values, batch_start)
+        return values
+
+    def _get_batch(self, keys: list[KT], values: list, offset: int):
+        buckets = self._buckets
+        hashes = np.fromiter((hash(key) for key in keys), dtype=np.int64, count=len(keys))
+        h1 = hashes >> 7
+        h2 = (hashes & 0x7F).astype(np.uint8)
+        starts = (h1 & (self._num_groups - 1)) * GROUP_WIDTH
+
+        ctrl = np.frombuffer(self._ctrl, dtype=np.uint8)
+        groups = ctrl[starts[:, np.newaxis] + np.arange(GROUP_WIDTH)]
+        rows, cols = np.nonzero(groups == h2[:, np.newaxis])
+        slots = starts[rows] + cols
+
+        # Compare full keys only where the 7-bit fragment matched
+        for row, slot in zip(rows.tolist(), slots.tolist()):
+            bucket = buckets[slot]
+            key = keys[row]
+            if values[offset + row] is BLANK and (bucket[0] is key or bucket[0] == key):
+                values[offset + row] = bucket[1]
+
+        has_empty = (groups == EMPTY).any(axis=1)
+        for row, key in enumerate(keys):
+            if values[offset + row] is not BLANK:
+                continue
+            if has_empty[row]:
+                raise KeyError("Search key is not present.")
+            # First group was full, continue probing from the second group
+            index = self._find(key, int(h1[row]), int(h2[row]), skip_groups=1)
+            if index < 0:
+                raise KeyError("Search key is not present.")
+            values[offset + row] = buckets[index][1]
+
+    def __setitem__(self, input_key: KT, input_value: VT):
+        h1, h2 = _split_hash(input_key)
+        ctrl = self._ctrl
+        buckets = self._buckets
+
+        available = -1
+        for start in self._generate_groups(h1):
+            end = start + GROUP_WIDTH
+            index = ctrl.find(h2, start, end)
+            while index >= 0:
+                bucket = buckets[index]
+                if bucket[0] is input_key or bucket[0] == input_key:
+                    buckets[index] = (input_key, input_value)
+                    return
+                index = ctrl.find(h2, index + 1, end)
+
+            empty = ctrl.find(EMPTY, start, end)
+            if available < 0:
+                deleted = ctrl.find(DELETED, start, end)
+                if empty >= 0 and deleted >= 0:
+                    available = min(empty, deleted)
+                else:
+                    available = max(empty, deleted)
+            if empty >= 0:
+                break
+
+        if ctrl[available] == DELETED:
+            self._num_deleted -= 1
+        ctrl[available] = h2
+        buckets[available] = (input_key, input_value)
+        self._num_elements += 1
+
+        # Tombstones lengthen probe sequences just like full slots, so they count towards the load
+        if (self._num_elements + self._num_deleted) / self._capacity > self._maximum_load_factor:
+            if self._load_factor > self._maximum_load_factor / 2:
+                self._resize()
+            else:
+                # Mostly tombstones: rebuild at the same size to clear them
+                self._resize(self._capacity)
+
+    def __delitem__(self, key: KT):
+        h1, h2 = _split_hash(key)
+        index = self._find(key, h1, h2)
+        if index < 0:
+            raise KeyError("Key is not present.")
+
+        start = index - index % GROUP_WIDTH
+        # If the group still has an empty slot, no probe sequence continues past it,
+        # so the slot can be marked empty instead of leaving a tombstone.
+        if self._ctrl.find(EMPTY, start, start + GROUP_WIDTH) >= 0:
+            self._ctrl[index] = EMPTY
+        else:
+            self._ctrl[index] = DELETED
+            self._num_deleted += 1
+        self._buckets[index] = BLANK
+        self._num_elements -= 1
+
+        if self._load_factor < self._minimum_load_factor:
+            # Minimum load factor reached, decrease size of table
+            self._shrink()
@@ -6,9 +6,12 @@ from typing import Iterable, TypeVar
 
 import pytest
 
+from cache import CacheHashTable, FrequencySketch
 from chaining import ChainingHashTable
-from hashtable import BLANK
-from open_addressing import LinearProbingHashTable, QuadraticProbingHashTable
+from compact import DUMMY, EMPTY as COMPACT_EMPTY, CompactHashTable
+from hashtable import BLANK, FactorGrowth, PowerOfTwoGrowth, PrimeGrowth
+from open_addressing import DELETED, LinearProbingHashTable, QuadraticProbingHashTable
+from swiss_table import DELETED as SWISS_DELETED, EMPTY as SWISS_EMPTY, GROUP_WIDTH, SwissHashTable
 
 T = TypeVar("T")
 
@@ -80,6 +83,28 @@ class TestLinearProbing:
         table[3] = 101
         assert list(table) == [2, 3]
 
+    def test_deletions(self):
+        table = LinearProbingHashTable(initial_capacity=4, maximum_load_factor=0.8)
+        table[2] = 100
+        table[6] = 102
+        table[3] = 101
+        assert table._buckets == [(3, 101), BLANK, (2, 100), (6, 102)]
+
+        # Deleted slots become tombstones so that probing continues past them
+        del table[6]
+        assert table._buckets == [(3, 101), BLANK, (2, 100), DELETED]
+        assert len(table) == 2
+        assert table[3] == 101
+        with pytest.raises(KeyError):
+            _ = table[6]
+        with pytest.raises(KeyError):
+            del table[6]
+
+        # Tombstones are reused by insertions
+        table[10] = 110
+        assert table._buckets == [(3, 101), BLANK, (2, 100), (10, 110)]
+        assert list(table) == [3, 2, 10]
+
 
 class TestQuadraticProbing:
     def test_generate_indices(self):
@@ -89,6 +114,25 @@ class TestQuadraticProbing:
         expected = [6, 7, 1, 4, 0, 5, 3, 2, 2, 3, 5, 0, 4, 1, 7]
         assert indices == expected
 
+    @pytest.mark.parametrize("growth_policy", [None, FactorGrowth(1.5), PrimeGrowth()])
+    def test_capacity_is_power_of_two(self, growth_policy):
+        # Keys colliding modulo 17: probing would cycle through a few slots forever
+        # if the table was rebuilt with 17 slots
+        table = QuadraticProbingHashTable(
+            initial_capacity=10, minimum_load_factor=0.1, growth_policy=growth_policy
+        )
+        assert table._capacity == 16
+        for i in range(10):
+            table[i * 17] = i
+        table.compact()
+        assert table._capacity == 32
+        for i in range(100):
+            table[i * 17] = i
+        for i in range(95):
+            del table[i * 17]
+        assert table._capacity & (table._capacity - 1) == 0
+        assert {key: table[key] for key in table} == {i * 17: i for i in range(95, 100)}
+
     def test_insertions(self):
         table = QuadraticProbingHashTable(initial_capacity=8, maximum_load_factor=0.49)
 
@@ -198,3 +242,533 @@ class TestChaining:
         table[2] = 100
         table[3] = 101
         assert list(table) == [2, 3]
+
+    def test_deletions(self):
+        table = ChainingHashTable(initial_capacity=4, maximum_load_factor=0.9)
+        table[2] = 100
+        table[6] = 200
+        table[3] = 101
+
+        del table[2]
+        assert table._buckets == [BLANK, BLANK, deque([(6, 200)]), deque([(3, 101)])]
+        del table[3]
+        assert table._buckets == [BLANK, BLANK, deque([(6, 200)]), BLANK]
+        assert len(table) == 1
+        with pytest.raises(KeyError):
+            del table[3]
+        with pytest.raises(KeyError):
+            del table[0]
+
+
+class TestSwissTable:
+    def test_capacity(self):
+        assert SwissHashTable(initial_capacity=4)._capacity == GROUP_WIDTH
+        assert SwissHashTable(initial_capacity=40)._capacity == 4 * GROUP_WIDTH
+
+    @pytest.mark.parametrize("maximum_load_factor", [1.0, 1.5])
+    def test_maximum_load_factor(self, maximum_load_factor):
+        # A full table would leave no empty slot to end a probe
+        with pytest.raises(ValueError):
+            SwissHashTable(maximum_load_factor=maximum_load_factor)
+
+    def test_insertions(self):
+        table = SwissHashTable(initial_capacity=16, maximum_load_factor=0.875)
+
+        # Small ints hash to themselves: all land in the single group, h2 = key & 0x7F
+        table[2] = 100
+        assert table._buckets[2] is BLANK
+        assert table._buckets[0] == (2, 100)
+        assert table._ctrl[0] == 2
+        assert len(table) == 1
+
+        # Test overwrites
+        table[2] = 90
+        assert table._buckets[0] == (2, 90)
+        assert len(table) == 1
+
+        # Fragment collision: 130 & 0x7F == 2
+        table[130] = 101
+        assert table._ctrl[1] == 2
+        assert table[130] == 101
+        assert table[2] == 90
+
+        # Test resize when maximum load factor is exceeded
+        for key in range(20, 33):
+            table[key] = key
+        assert len(table) == 15
+        assert table._capacity == 32
+        assert sorted(table) == [2] + list(range(20, 33)) + [130]
+
+    def test_lookups(self):
+        table = SwissHashTable()
+        for key in range(100):
+            table[key * 128] = key
+
+        # Every key shares the same 7-bit fragment, so lookups must compare full keys
+        for key in range(100):
+            assert table[key * 128] == key
+
+        # Test missing key raises KeyError
+        with pytest.raises(KeyError):
+            _ = table[1]
+        with pytest.raises(KeyError):
+            _ = table[128 * 100]
+
+    def test_get_many(self):
+        table = SwissHashTable(maximum_load_factor=0.875)
+        keys = [f"key{i}" for i in range(1000)]
+        for i, key in enumerate(keys):
+            table[key] = i
+
+        assert table.get_many(reversed(keys)) == list(range(999, -1, -1))
+        assert table.get_many([]) == []
+        with pytest.raises(KeyError):
+            table.get_many(["key1", "missing"])
+
+    def test_get_many_full_groups(self):
+        # A high load factor with colliding groups forces the scalar fallback
+        table = SwissHashTable(initial_capacity=64, maximum_load_factor=0.95)
+        keys = [key * 1024 for key in range(60)]
+        for key in keys:
+            table[key] = -key
+        assert table.get_many(keys) == [-key for key in keys]
+
+    def test_deletions(self):
+        table = SwissHashTable(initial_capacity=16, maximum_load_factor=0.95)
+        for key in range(16):
+            table[key] = key
+
+        # The only group is full, so deleting leaves a tombstone
+        del table[3]
+        assert table._ctrl[3] == SWISS_DELETED
+        assert len(table) == 15
+        with pytest.raises(KeyError):
+            _ = table[3]
+        with pytest.raises(KeyError):
+            del table[3]
+
+        # The group now has no empty slot, so the tombstone is reused
+        table[3] = 33
+        assert table[3] == 33
+        assert table._num_deleted == 0
+
+        # With an empty slot in the group, deleted slots are marked empty
+        table = SwissHashTable(initial_capacity=16)
+        table[5] = 5
+        del table[5]
+        assert table._ctrl[0] == SWISS_EMPTY
+        assert list(table) == []
+
+    def test_iter(self):
+        table = SwissHashTable(initial_capacity=4, maximum_load_factor=0.8)
+
+        table[2] = 100
+        table[3] = 101
+        assert list(table) == [2, 3]
+
+
+class TestCompact:
+    def test_insertions(self):
+        table = CompactHashTable(initial_capacity=4, maximum_load_factor=0.8)
+
+        # Test basic insertions: the index array points into the dense entries list
+        table[2] = 100
+        assert list(table._buckets) == [COMPACT_EMPTY, COMPACT_EMPTY, 0, COMPACT_EMPTY]
+        assert table._entries == [(2, 100)]
+        assert len(table) == 1
+        table[3] = 101
+        assert list(table._buckets) == [COMPACT_EMPTY, COMPACT_EMPTY, 0, 1]
+        assert table._entries == [(2, 100), (3, 101)]
+
+        # Test collisions (perturbed probing: 6 -> 2 -> 3 -> 0)
+        table[6] = 102
+        assert list(table._buckets) == [2, COMPACT_EMPTY, 0, 1]
+        assert table._entries == [(2, 100), (3, 101), (6, 102)]
+
+        # Test overwrites keep the original position
+        table[2] = 90
+        assert table._entries == [(2, 90), (3, 101), (6, 102)]
+        assert len(table) == 3
+
+        # Test resize when maximum load factor is exceeded
+        table[5] = 75
+        assert len(table._buckets) == 8
+        assert table._entries == [(2, 90), (3, 101), (6, 102), (5, 75)]
+
+    def test_index_typecode(self):
+        assert CompactHashTable(initial_capacity=8)._buckets.itemsize == 1
+        assert CompactHashTable(initial_capacity=1024)._buckets.itemsize == 2
+        assert CompactHashTable(initial_capacity=1 << 16)._buckets.itemsize == 4
+
+    def test_lookups(self):
+        table = CompactHashTable()
+        for key in range(1000):
+            table[str(key)] = key
+        for key in range(1000):
+            assert table[str(key)] == key
+
+        # Test missing key raises KeyError
+        with pytest.raises(KeyError):
+            _ = table["missing"]
+
+    def test_deletions(self):
+        table = CompactHashTable(initial_capacity=8, maximum_load_factor=0.6)
+        table["a"] = 1
+        table["b"] = 2
+        table["c"] = 3
+
+        del table["b"]
+        assert DUMMY in table._buckets
+        assert table._entries == [("a", 1), BLANK, ("c", 3)]
+        assert len(table) == 2
+        with pytest.raises(KeyError):
+            _ = table["b"]
+        with pytest.raises(KeyError):
+            del table["b"]
+
+        # Reinserted keys move to the end, like dict
+        table["b"] = 4
+        assert list(table.items()) == [("a", 1), ("c", 3), ("b", 4)]
+
+        # Resizing drops the gaps left by deletions
+        table["d"] = 5
+        assert len(table._entries) == 4
+        assert list(table) == ["a", "c", "b", "d"]
+
+    def test_iter(self):
+        table = CompactHashTable(initial_capacity=4, maximum_load_factor=0.8)
+
+        # Insertion order is preserved
+        table[3] = 101
+        table[2] = 100
+        assert list(table) == [3, 2]
+
+        keys = [f"key{i}" for i in range(500)]
+        for key in reversed(keys):
+            table[key] = key
+        assert list(table)[2:] == keys[::-1]
+
+
+ALL_HASHTABLES = [
+    ChainingHashTable,
+    LinearProbingHashTable,
+    QuadraticProbingHashTable,
+    SwissHashTable,
+    CompactHashTable,
+]
+
+
+class TestGrowthPolicies:
+    def test_factor_growth(self):
+        policy = FactorGrowth(1.5)
+        assert policy.round_up(10) == 10
+        assert policy.grow(10) == 15
+        assert policy.grow(1) == 2
+        assert policy.shrink(15) == 10
+        assert policy.shrink(1) == 1
+        with pytest.raises(ValueError):
+            FactorGrowth(1)
+
+    def test_power_of_two_growth(self):
+        policy = PowerOfTwoGrowth()
+        assert [policy.round_up(n) for n in [0, 1, 2, 3, 5, 8, 9]] == [1, 1, 2, 4, 8, 8, 16]
+        assert policy.grow(8) == 16
+        assert policy.grow(6) == 8
+        assert policy.shrink(16) == 8
+        assert policy.shrink(1) == 1
+
+    def test_prime_growth(self):
+        policy = PrimeGrowth()
+        assert [policy.round_up(n) for n in [0, 2, 8, 14, 17]] == [2, 2, 11, 17, 17]
+        assert policy.grow(11) == 23
+        assert policy.shrink(23) == 11
+
+    def test_table_uses_policy(self):
+        table = LinearProbingHashTable(
+            initial_capacity=7, maximum_load_factor=0.5, growth_policy=PrimeGrowth()
+        )
+        for key in range(4):
+            table[key] = key
+        assert table._capacity == 17
+        assert sorted(table) == [0, 1, 2, 3]
+
+    def test_invalid_load_factors(self):
+        with pytest.raises(ValueError):
+            ChainingHashTable(maximum_load_factor=0.5, minimum_load_factor=0.5)
+        with pytest.raises(ValueError):
+            LinearProbingHashTable(minimum_load_factor=-0.1)
+
+
+@pytest.mark.parametrize("hashtable_cls", ALL_HASHTABLES)
+class TestCapacityManagement:
+    def test_shrink_on_delete(self, hashtable_cls):
+        table = hashtable_cls(maximum_load_factor=0.5, minimum_load_factor=0.1)
+        keys = [f"key{i}" for i in range(1000)]
+        for i, key in enumerate(keys):
+            table[key] = i
+        grown_capacity = table._capacity
+
+        for key in keys[:990]:
+            del table[key]
+        assert len(table) == 10
+        assert table._capacity < grown_capacity / 8
+        assert table._load_factor >= 0.1
+        assert {key: table[key] for key in table} == {key: i for i, key in enumerate(keys) if i >= 990}
+
+    def test_shrink_changes_capacity(self, hashtable_cls):
+        # With a shrink factor below 2, tables rounding their capacity up to a power
+        # of two must not be rebuilt at the same capacity on every deletion
+        table = hashtable_cls(
+            maximum_load_factor=0.5, minimum_load_factor=0.2, growth_policy=FactorGrowth(1.5)
+        )
+        for key in range(200):
+            table[key] = key
+        resizes = []
+        resize = table._resize
+
+        def record_resize(new_capacity=None):
+            capacity = table._capacity
+            resize(new_capacity)
+            resizes.append((capacity, table._capacity))
+
+        table._resize = record_resize
+        for key in range(190):
+            del table[key]
+        assert resizes
+        assert all(new_capacity < capacity for capacity, new_capacity in resizes)
+
+    def test_no_shrink_by_default(self, hashtable_cls):
+        table = hashtable_cls(maximum_load_factor=0.5)
+        for key in range(100):
+            table[key] = key
+        capacity = table._capacity
+        for key in range(100):
+            del table[key]
+        assert len(table) == 0
+        assert table._capacity == capacity
+
+    def test_compact(self, hashtable_cls):
+        table = hashtable_cls(maximum_load_factor=0.5)
+        for key in range(1000):
+            table[key] = -key
+        for key in range(0, 1000, 10):
+            del table[key]
+        for key in range(10, 1000, 10):
+            table[key] = key
+
+        table.compact()
+        assert table._load_factor > 0.2
+        assert table._load_factor <= 0.5
+        assert len(table) == 999
+        assert all(table[key] == (key if key % 10 == 0 else -key) for key in range(1, 1000))
+
+    def test_reserve(self, hashtable_cls):
+        table = hashtable_cls(maximum_load_factor=0.5)
+        table["a"] = 1
+        table.reserve(1000)
+        capacity = table._capacity
+        assert capacity >= 2000
+        assert table["a"] == 1
+
+        for key in range(999):
+            table[key] = key
+        assert table._capacity == capacity
+
+        # Reserving less than the current capacity does nothing
+        table.reserve(10)
+        assert table._capacity == capacity
+
+    def test_churn(self, hashtable_cls):
+        # Repeated insert/delete cycles must not grow the table without bound
+        table = hashtable_cls(initial_capacity=16, maximum_load_factor=0.5)
+        for i in range(5000):
+            table[i] = i
+            del table[i]
+        assert len(table) == 0
+        assert table._capacity <= 32
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCache:
+    def test_lru(self):
+        cache = CacheHashTable(maxsize=3, policy="lru")
+        cache["a"] = 1
+        cache["b"] = 2
+        cache["c"] = 3
+        assert list(cache) == ["a", "b", "c"]
+
+        # Accessing "a" makes "b" the least recently used entry
+        assert cache["a"] == 1
+        cache["d"] = 4
+        assert list(cache) == ["c", "a", "d"]
+        assert "b" not in cache
+        assert cache.stats.evictions == 1
+
+        # Overwrites count as a use
+        cache["c"] = 30
+        cache["e"] = 5
+        assert list(cache.items()) == [("d", 4), ("c", 30), ("e", 5)]
+
+    def test_lfu(self):
+        cache = CacheHashTable(maxsize=3, policy="lfu")
+        cache["a"] = 1
+        cache["b"] = 2
+        cache["c"] = 3
+        for _ in range(3):
+            _ = cache["a"]
+        _ = cache["c"]
+        _ = cache["b"]
+        # Counts: a=4, b=2, c=2 (c used before b, so c is evicted first)
+        assert list(cache) == ["c", "b", "a"]
+
+        cache["d"] = 4
+        assert list(cache) == ["d", "b", "a"]
+        cache["e"] = 5
+        assert list(cache) == ["e", "b", "a"]
+        _ = cache["e"]
+        _ = cache["e"]
+        assert list(cache) == ["b", "e", "a"]
+
+        del cache["e"]
+        cache["f"] = 6
+        assert list(cache) == ["f", "b", "a"]
+        assert len(cache) == 3
+
+    def test_tinylfu_admission(self):
+        cache = CacheHashTable(maxsize=2, policy="tinylfu")
+        cache["hot1"] = 1
+        cache["hot2"] = 2
+        for _ in range(5):
+            _ = cache["hot1"]
+            _ = cache["hot2"]
+
+        # A one-off key is less popular than the victim, so it is not admitted
+        cache["scan"] = 3
+        assert "scan" not in cache
+        assert cache.stats.rejections == 1
+        assert sorted(cache) == ["hot1", "hot2"]
+
+        # A key requested often enough is admitted
+        for _ in range(10):
+            with pytest.raises(KeyError):
+                _ = cache["rising"]
+        cache["rising"] = 4
+        assert "rising" in cache
+        assert cache.stats.evictions == 1
+
+    def test_tinylfu_read_through(self):
+        # Filling in a key after a miss counts as a single access
+        cache = CacheHashTable(maxsize=2, policy="tinylfu")
+        with pytest.raises(KeyError):
+            _ = cache["a"]
+        cache["a"] = 1
+        assert cache._sketch.estimate("a") == 1
+        cache["b"] = 2
+        assert cache._sketch.estimate("b") == 1
+
+    def test_frequency_sketch(self):
+        sketch = FrequencySketch(width=64, sample_size=1000)
+        for _ in range(20):
+            sketch.increment("a")
+        sketch.increment("b")
+        assert sketch.estimate("a") == 15
+        assert sketch.estimate("b") >= 1
+        assert sketch.estimate("c") <= 1
+
+        # Aging halves the counters
+        for i in range(1000):
+            sketch.increment(i)
+        assert sketch.estimate("a") <= 8
+
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = CacheHashTable(maxsize=4, ttl=10, clock=clock)
+        cache["a"] = 1
+        clock.now = 5
+        cache["b"] = 2
+        assert cache["a"] == 1
+
+        clock.now = 12
+        assert "a" not in cache
+        assert list(cache) == ["b"]
+        with pytest.raises(KeyError):
+            _ = cache["a"]
+        assert cache.stats.expirations == 1
+        assert len(cache) == 1
+
+        # Writing refreshes the expiry time
+        cache["b"] = 3
+        clock.now = 20
+        assert cache["b"] == 3
+        clock.now = 30
+        assert cache.expire() == 1
+        assert len(cache) == 0
+
+        # Expired entries are not counted, even before they are removed
+        cache["c"] = 3
+        cache["d"] = 4
+        clock.now = 35
+        del cache["d"]
+        cache["e"] = 5
+        clock.now = 42
+        assert list(cache) == ["e"]
+        assert len(cache) == 1
+
+    def test_stats(self):
+        cache = CacheHashTable(maxsize=2)
+        cache["a"] = 1
+        _ = cache["a"]
+        with pytest.raises(KeyError):
+            _ = cache["b"]
+        # Membership tests do not count
+        assert "a" in cache
+        assert "b" not in cache
+        assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+        assert cache.stats.hit_ratio == 0.5
+
+    def test_fixed_capacity(self):
+        clock = FakeClock()
+        cache = CacheHashTable(maxsize=8, ttl=10, clock=clock)
+        cache["a"] = 1
+        clock.now = 5
+        cache["b"] = 2
+        clock.now = 12
+        # Compacting a cache removes its expired entries, without resizing it
+        cache.compact()
+        assert cache._capacity == 8
+        assert list(cache.items()) == [("b", 2)]
+        assert cache.stats.expirations == 1
+
+        cache.reserve(8)
+        with pytest.raises(ValueError):
+            cache.reserve(9)
+        cache._resize()
+        with pytest.raises(ValueError):
+            cache._resize(16)
+        assert cache._capacity == 8
+
+    @pytest.mark.parametrize("policy", ["lru", "lfu", "tinylfu"])
+    def test_bounded(self, policy):
+        cache = CacheHashTable(maxsize=50, policy=policy)
+        for i in range(1000):
+            cache[i % 120] = i
+            _ = cache.get(i % 7)
+        assert len(cache) <= 50
+        assert len(list(cache.items())) == len(cache)
+        for key, value in cache.items():
+            assert cache[key] == value
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            CacheHashTable(maxsize=0)
+        with pytest.raises(ValueError):
+            CacheHashTable(policy="fifo")
+        with pytest.raises(KeyError):
+            del CacheHashTable()["missing"]
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+from array import array
 from collections.abc import Iterable, Mapping
 from sys import getsizeof
 
+import numpy as np
+
 from hashtable import HashTable
 
 
@@ -41,9 +44,15 @@ def _deep_getsizeof(obj: object, ids_already_counted: set[int]):
     if isinstance(obj, str) or isinstance(0, str):
         return r
 
-    # Special case for HashTable ensures that the tuple objects in nonempty buckets are counted.
+    # Flat numeric buffers: getsizeof already includes the data they own
+    if isinstance(obj, (np.ndarray, array, bytearray)):
+        return r
+
+    # Special case for HashTable ensures that the tuple objects in nonempty buckets are counted,
+    # along with the table's own storage (bucket list, control bytes, index arrays, ...).
     if isinstance(obj, HashTable):
-        return r + sum(d(x, ids_already_counted) for x in obj.items())
+        r += sum(d(x, ids_already_counted) for x in obj.items())
+        return r + d(vars(obj), ids_already_counted)
 
     if isinstance(obj, Mapping):
         return r + sum(
@@ -0,0 +1,489 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+import warnings
+from dataclasses import astuple, dataclass, fields
+
+import matplotlib.pyplot as plt
+
+from diff import ALGORITHMS, diff
+from streaming import iter_hunks
+from utils import EditScript, check_edits
+
+# Number of times each diff is repeated; the fastest run is reported
+REPEATS = 3
+
+# Engines compared by the scaling benchmarks: every algorithm of diff, and the
+# bounded-memory streaming diff (see streaming.iter_hunks)
+ENGINES = ALGORITHMS + ("stream",)
+# Default input sizes (in lines) and edit densities (edits per line) of the scaling benchmarks
+SIZES = [1000, 10000, 100000, 1000000]
+DENSITIES = [0.001, 0.01, 0.1]
+# Largest inputs (in lines) the quadratic engines are run on. The DP table takes
+# 4 bytes per pair of lines, i.e. 100 MB at 5000 lines.
+MAX_LINES = {"dp": 5000, "hirschberg": 20000}
+# Default time budget of a single diff in the scaling benchmarks, in seconds
+MAX_SECONDS = 10.0
+
+# Lines generated by source_lines, with names from _NAMES (blank and short lines
+# are repeated, so that many lines occur more than once, as in real code)
+_LINE_TEMPLATES = (
+    "",
+    "",
+    "{name} = {other}",
+    "{name} = {other}({arg})",
+    "{name} = {other}.{arg}",
+    "{name} += 1",
+    "{name}.append({arg})",
+    "return {name}",
+    "return None",
+    "pass",
+    "else:",
+    "if {name} is None:",
+    "if {name} < len({other}):",
+    "for {name} in {other}:",
+    "while {name}:",
+    "def {name}(self, {other}, {arg}=None):",
+    "# Update {name} with {other}",
+    'raise ValueError(f"Invalid {name}: {{{other}}}")',
+)
+_NAMES = tuple(
+    word + suffix
+    for word in ("count", "index", "value", "lines", "result", "key", "item", "node", "total", "buffer")
+    for suffix in ("", "s", "_1", "_2", "_next", "_map", "_list", "_size", "_id", "_old")
+)
+
+
+def source_lines(num_lines: int, seed: int = 0) -> list[str]:
+    """Generates a file of num_lines lines of Python-like source code.
+
+    Lines are drawn from _LINE_TEMPLATES, filled with names from _NAMES, and indented
+    after lines ending with a colon, so that the benchmark sees realistic line
+    lengths, indentation, blank lines and duplicates. The file only depends on the
+    seed, so results of different versions of the engines can be compared.
+
+    Parameters
+    ----------
+    num_lines : int
+        Number of lines to generate.
+    seed : int, optional
+        Seed of the random number generator, by default 0.
+
+    Returns
+    -------
+    list[str]
+        Lines of source code.
+
+    Examples
+    --------
+    >>> source_lines(5) == source_lines(5)
+    True
+    >>> len(source_lines(1000))
+    1000
+    """
+    rng = random.Random(seed)
+    # Drawing all the random choices at once is several times faster than one by one
+    templates = rng.choices(_LINE_TEMPLATES, k=num_lines)
+    names = rng.choices(_NAMES, k=3 * num_lines)
+    lines: list[str] = []
+    depth = 0
+    for n, template in enumerate(templates):
+        line = template.format(name=names[3 * n], other=names[3 * n + 1], arg=names[3 * n + 2])
+        if not line:
+            lines.append(line)
+            continue
+        lines.append("    " * depth + line)
+        if line.endswith(":"):
+            depth = min(depth + 1, 4)
+        elif depth and rng.random() < 0.25:
+            depth -= 1
+    return lines
+
+
+def edit_source(lines: list[str], num_edits: int, seed: int = 0) -> list[str]:
+    """Applies typical source-code edits to a file at random places.
+
+    Each edit either changes a line, inserts a block of 1-5 new lines, or deletes a
+    block of 1-5 lines.
+
+    Parameters
+    ----------
+    lines : list[str]
+        Lines of the original file.
+    num_edits : int
+        Number of edits to apply.
+    seed : int, optional
+        Seed of the random number generator, by default 0.
+
+    Returns
+    -------
+    list[str]
+        Lines of the edited file.
+    """
+    rng = random.Random(seed)
+    lines = list(lines)
+    for n in range(num_edits):
+        position = rng.randrange(len(lines) + 1)
+        kind = rng.random()
+        if kind < 1 / 3 and position < len(lines):
+            lines[position] = lines[position].rstrip() + f"  # edited {n}"
+        elif kind < 2 / 3:
+            lines[position:position] = [f"    new_line_{n}_{k} = {k}" for k in range(rng.randint(1, 5))]
+        else:
+            del lines[position : position + rng.randint(1, 5)]
+    return lines
+
+
+def synthetic_pair(num_lines: int, density: float, seed: int = 0) -> tuple[list[str], list[str]]:
+    """Generates a pair of files of a given size and edit density.
+
+    The original file is made of generated source code (see source_lines). Each of its lines
+    starts an edit with probability `density`, which, as in edit_source, changes the
+    line, inserts a block of 1-5 new lines before it, or deletes a block of 1-5 lines.
+    The new file is built in a single pass, so even files of millions of lines with
+    dense edits are generated in a few seconds.
+
+    Parameters
+    ----------
+    num_lines : int
+        Number of lines of the original file.
+    density : float
+        Probability that an edit starts at each line of the original file.
+    seed : int, optional
+        Seed of the random number generator, by default 0.
+
+    Returns
+    -------
+    lines1 : list[str]
+        Lines of the original file.
+    lines2 : list[str]
+        Lines of the new file.
+
+    Examples
+    --------
+    >>> lines1, lines2 = synthetic_pair(1000, 0.0)
+    >>> len(lines1), lines1 == lines2
+    (1000, True)
+    >>> lines1, lines2 = synthetic_pair(1000, 0.05)
+    >>> sum(line1 != line2 for line1, line2 in zip(lines1, lines2)) > 0
+    True
+    """
+    rng = random.Random(seed)
+    lines1 = source_lines(num_lines)
+    lines2: list[str] = []
+    position = 0
+    num_edits = 0
+    while position < num_lines:
+        if rng.random() >= density:
+            lines2.append(lines1[position])
+            position += 1
+            continue
+        num_edits += 1
+        kind = rng.random()
+        if kind < 1 / 3:
+            lines2.append(lines1[position].rstrip() + f"  # edited {num_edits}")
+            position += 1
+        elif kind < 2 / 3:
+            lines2.extend(f"    new_line_{num_edits}_{k} = {k}" for k in range(rng.randint(1, 5)))
+            lines2.append(lines1[position])
+            position += 1
+        else:
+            position += rng.randint(1, 5)
+    return lines1, lines2
+
+
+def run_engine(engine: str, str1: str, str2: str) -> EditScript:
+    """Diffs two strings with one of ENGINES."""
+    if engine == "stream":
+        hunks = iter_hunks(str1.splitlines(), str2.splitlines())
+        return EditScript.from_edits(edit for edit, _, _ in hunks)
+    return diff(str1, str2, algorithm=engine)
+
+
+@dataclass
+class BenchmarkResult:
+    """Time and memory taken by one engine on one pair of inputs."""
+
+    engine: str
+    num_lines: int
+    density: float
+    # Time taken by the fastest run, in seconds
+    time_s: float
+    # Peak memory allocated during a run, as traced by tracemalloc, in bytes
+    peak_bytes: int
+    num_edits: int
+
+
+def measure(
+    engine: str, str1: str, str2: str, num_lines: int, density: float, repeats: int = REPEATS
+) -> BenchmarkResult:
+    """Times an engine on two strings, measures its peak memory, and checks its result.
+
+    The peak memory is measured on a separate run, since tracing allocations slows
+    Python code down much more than NumPy code, which would skew the timings.
+
+    Raises
+    ------
+    AssertionError
+        If the engine produced an invalid diff.
+    """
+    times = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        edits = run_engine(engine, str1, str2)
+        times.append(time.perf_counter() - start_time)
+    del edits
+
+    tracemalloc.start()
+    try:
+        edits = run_engine(engine, str1, str2)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert check_edits(str1, str2, edits), f"{engine} produced an invalid diff"
+    return BenchmarkResult(engine, num_lines, density, min(times), peak_bytes, len(edits))
+
+
+def scaling_exponent(result1: BenchmarkResult, result2: BenchmarkResult) -> float:
+    """Estimates k such that the time taken grows as (number of lines) ** k between two results.
+
+    Examples
+    --------
+    >>> scaling_exponent(BenchmarkResult("dp", 1000, 0.01, 0.01, 0, 1), BenchmarkResult("dp", 10000, 0.01, 1.0, 0, 1))
+    2.0
+    """
+    return math.log(result2.time_s / result1.time_s) / math.log(result2.num_lines / result1.num_lines)
+
+
+def run_scaling_benchmarks(
+    sizes: list[int] = SIZES,
+    densities: list[float] = DENSITIES,
+    engines=ENGINES,
+    repeats: int = REPEATS,
+    max_seconds: float = MAX_SECONDS,
+    out=sys.stdout,
+) -> list[BenchmarkResult]:
+    """Measures how every engine scales with the input size, for several edit densities.
+
+    For each density and engine, the sizes are run in increasing order. The time of
+    the next size is extrapolated from the last ones (with the last measured scaling
+    exponent, or the expected one), and the engine stops there if that would exceed
+    max_seconds, so that quadratic engines are not run on million-line inputs.
+
+    Prints one line per run, with the time, the peak memory, the number of edits and
+    the scaling exponent since the previous size (see scaling_exponent).
+
+    Parameters
+    ----------
+    sizes : list[int], optional
+        Numbers of lines of the original files, by default SIZES.
+    densities : list[float], optional
+        Edit densities of the generated files (see synthetic_pair), by default DENSITIES.
+    engines : Iterable[str], optional
+        Engines to compare, by default ENGINES.
+    repeats : int, optional
+        Number of timed runs of each diff, by default REPEATS.
+    max_seconds : float, optional
+        Time budget of a single diff, by default MAX_SECONDS.
+    out : TextIO, optional
+        Where to print the results, by default sys.stdout.
+
+    Returns
+    -------
+    list[BenchmarkResult]
+        The results of every run.
+    """
+    results = []
+    for density in densities:
+        print(f"____Edit density {density:g} (edits per line)____", file=out)
+        pairs = {}
+        for engine in engines:
+            previous: list[BenchmarkResult] = []
+            for num_lines in sorted(sizes):
+                if num_lines > MAX_LINES.get(engine, num_lines):
+                    break
+                if previous:
+                    if len(previous) > 1:
+                        exponent = max(scaling_exponent(*previous[-2:]), 1.0)
+                    else:
+                        exponent = 2.0 if engine in MAX_LINES else 1.0
+                    predicted = previous[-1].time_s * (num_lines / previous[-1].num_lines) ** exponent
+                    if predicted > max_seconds:
+                        print(f"{num_lines:>8} lines {engine:>10}: skipped (about {predicted:.0f} s)", file=out)
+                        break
+                if num_lines not in pairs:
+                    lines1, lines2 = synthetic_pair(num_lines, density)
+                    pairs[num_lines] = ("\n".join(lines1) + "\n", "\n".join(lines2) + "\n")
+                result = measure(engine, *pairs[num_lines], num_lines, density, repeats)
+                scaling = f"  n^{scaling_exponent(previous[-1], result):.2f}" if previous else ""
+                print(
+                    f"{num_lines:>8} lines {engine:>10}: {result.time_s * 1000:10.2f} ms "
+                    f"{result.peak_bytes / 2**20:9.2f} MiB peak ({result.num_edits} edits){scaling}",
+                    file=out,
+                )
+                previous.append(result)
+                results.append(result)
+    return results
+
+
+def write_csv(results: list[BenchmarkResult], filename: str):
+    """Writes benchmark results to a CSV file, one row per run, e.g. to plot scaling curves."""
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(field.name for field in fields(BenchmarkResult))
+        writer.writerows(astuple(result) for result in results)
+
+
+def plot_scaling(results: list[BenchmarkResult], directory: str = "plots"):
+    """Plots the time and peak memory of every engine against the input size, on log-log axes.
+
+    One pair of plots is saved per edit density, as
+    `{directory}/scaling_{density}_time.png` and `{directory}/scaling_{density}_memory.png`.
+    On log-log axes, the slope of each curve is its scaling exponent.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for density in sorted({result.density for result in results}):
+        engines: dict[str, list[BenchmarkResult]] = {}
+        for result in results:
+            if result.density == density:
+                engines.setdefault(result.engine, []).append(result)
+
+        with warnings.catch_warnings():
+            # Suppress matplotlib warnings
+            warnings.simplefilter("ignore")
+
+            for name, title, ylabel, value in [
+                ("time", "Time", "Time Elapsed (seconds)", lambda result: result.time_s),
+                ("memory", "Peak Memory", "Peak Memory (MiB)", lambda result: result.peak_bytes / 2**20),
+            ]:
+                plt.title(f"{title} with {density:g} edits per line")
+                plt.xlabel("Number of Lines")
+                plt.ylabel(ylabel)
+                for engine, engine_results in engines.items():
+                    plt.loglog(
+                        [result.num_lines for result in engine_results],
+                        [value(result) for result in engine_results],
+                        marker="o",
+                        label=engine,
+                    )
+                plt.legend()
+                plt.savefig(os.path.join(directory, f"scaling_{density:g}_{name}.png"))
+                plt.close()
+
+
+def benchmark(str1: str, str2: str, algorithm: str) -> tuple[float, int]:
+    """Times diff on two strings, and checks the result.
+
+    Parameters
+    ----------
+    str1 : str
+        The original string.
+    str2 : str
+        The new string.
+    algorithm : str
+        Algorithm passed to diff.
+
+    Returns
+    -------
+    time_s : float
+        Time taken by the fastest of REPEATS runs, in seconds.
+    num_edits : int
+        Number of edits found.
+    """
+    times = []
+    for _ in range(REPEATS):
+        start_time = time.perf_counter()
+        edits = diff(str1, str2, algorithm=algorithm)
+        times.append(time.perf_counter() - start_time)
+    assert check_edits(str1, str2, edits), f"{algorithm} produced an invalid diff"
+    return min(times), len(edits)
+
+
+def run_source_edit_benchmarks(file_sizes: list[int], num_edits: int, algorithms=ALGORITHMS):
+    """Compares the diff algorithms on source files with a few scattered edits.
+
+    Prints one line per file size and algorithm.
+
+    Parameters
+    ----------
+    file_sizes : list[int]
+        Numbers of lines in the original files.
+    num_edits : int
+        Number of edits applied to each file.
+    algorithms : Iterable[str], optional
+        Algorithms to compare, by default all of them.
+    """
+    print(f"____Source files with {num_edits} edits____")
+    for num_lines in file_sizes:
+        lines1 = source_lines(num_lines)
+        lines2 = edit_source(lines1, num_edits)
+        str1 = "\n".join(lines1) + "\n"
+        str2 = "\n".join(lines2) + "\n"
+        for algorithm in algorithms:
+            time_s, found_edits = benchmark(str1, str2, algorithm)
+            print(f"{num_lines:>8} lines {algorithm:>9}: {time_s * 1000:9.2f} ms ({found_edits} edits)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the diff engines.")
+    parser.add_argument(
+        "--suite",
+        choices=("scaling", "source"),
+        default="scaling",
+        help="scaling: time and memory of every engine on synthetic files of growing sizes "
+        "(default); source: a few edits on source files of up to 100,000 lines.",
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=SIZES, help="With --suite scaling, numbers of lines."
+    )
+    parser.add_argument(
+        "--densities",
+        type=float,
+        nargs="+",
+        default=DENSITIES,
+        help="With --suite scaling, edits per line of the generated files.",
+    )
+    parser.add_argument(
+        "--engines", nargs="+", choices=ENGINES, default=ENGINES, help="Engines to benchmark."
+    )
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="Timed runs of each diff.")
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=MAX_SECONDS,
+        help="With --suite scaling, skip the larger sizes of engines expected to take longer than this.",
+    )
+    parser.add_argument("--csv", default=None, help="With --suite scaling, also write the results to this file.")
+    parser.add_argument(
+        "--plots",
+        default="plots",
+        help="With --suite scaling, directory the scaling plots are saved to (default: plots).",
+    )
+    args = parser.parse_args()
+    REPEATS = args.repeats
+
+    if args.suite == "source":
+        algorithms = [engine for engine in args.engines if engine in ALGORITHMS]
+        # The DP table is quadratic in the file length, so it only runs on smaller files
+        run_source_edit_benchmarks(file_sizes=[200, 1000, 5000], num_edits=5, algorithms=algorithms)
+        run_source_edit_benchmarks(file_sizes=[200, 1000, 5000], num_edits=50, algorithms=algorithms)
+        run_source_edit_benchmarks(
+            file_sizes=[10000, 100000],
+            num_edits=50,
+            algorithms=[algorithm for algorithm in algorithms if algorithm not in MAX_LINES],
+        )
+    else:
+        results = run_scaling_benchmarks(
+            args.sizes, args.densities, args.engines, args.repeats, args.max_seconds
+        )
+        if args.csv is not None:
+            write_csv(results, args.csv)
+        plot_scaling(results, args.plots)
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import mmap
+import os
+from typing import Iterator, Sequence
+
+import numpy as np
+
+from diff import ALGORITHMS, _matching_blocks, _ranges_from_blocks
+from utils import EditScript
+
+# Bytes of a file scanned (for newlines) or split into lines at a time
+_CHUNK_SIZE = 1 << 24
+
+
+class MappedFile(Sequence[bytes]):
+    """The lines of a file, memory-mapped read-only and split on b"\\n".
+
+    Only the positions of the newlines are held in memory (8 bytes per line): lines
+    are sliced from the mapping when they are accessed, and never decoded. As with
+    str.splitlines, a final newline does not start an empty last line. Unlike it, only
+    b"\\n" ends a line, so a b"\\r" before it is part of the line, as in GNU diff.
+
+    Parameters
+    ----------
+    filename : str
+        The file to map.
+
+    Examples
+    --------
+    >>> import tempfile
+    >>> with tempfile.NamedTemporaryFile(delete=False) as f:
+    ...     _ = f.write(b"caf\\xe9\\nline 2\\r\\nlast")
+    >>> with MappedFile(f.name) as lines:
+    ...     print(len(lines), lines[0], lines[1:])
+    3 b'caf\\xe9' [b'line 2\\r', b'last']
+    >>> os.remove(f.name)
+    """
+
+    def __init__(self, filename: str) -> None:
+        with open(filename, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # Empty files cannot be mapped
+                self._buffer: bytes | mmap.mmap = b""
+            else:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._ends = self._find_line_ends()
+
+    def _find_line_ends(self) -> np.ndarray:
+        """Finds the offset of the end of every line, scanning the buffer one chunk at a time."""
+        size = len(self._buffer)
+        data = np.frombuffer(self._buffer, dtype=np.uint8)
+        chunks = [
+            np.flatnonzero(data[start : start + _CHUNK_SIZE] == ord("\n")) + start
+            for start in range(0, size, _CHUNK_SIZE)
+        ]
+        # The array must not outlive the mapping, which cannot be closed while it is exported
+        del data
+        ends = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+        if size and (not len(ends) or ends[-1] != size - 1):
+            ends = np.append(ends, size)
+        return ends.astype(np.int64)
+
+    def _start(self, index: int) -> int:
+        return int(self._ends[index - 1]) + 1 if index > 0 else 0
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            if start >= stop:
+                return []
+            return self._buffer[self._start(start) : int(self._ends[stop - 1])].split(b"\n")
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+        return self._buffer[self._start(index) : int(self._ends[index])]
+
+    @property
+    def final_newline(self) -> bool:
+        """Whether the file ends with a newline (False for an empty file)."""
+        return self._buffer[-1:] == b"\n"
+
+    def iter_chunks(self) -> Iterator[list[bytes]]:
+        """Yields the lines of the file in order, as lists of lines of about 16 MiB in total."""
+        start = 0
+        while start < len(self):
+            stop = int(np.searchsorted(self._ends, self._start(start) + _CHUNK_SIZE))
+            stop = min(max(stop, start + 1), len(self))
+            yield self[start:stop]
+            start = stop
+
+    def decoded(self, encoding: str = "utf-8", errors: str = "surrogateescape") -> DecodedLines:
+        """Returns a view of the lines which decodes them as they are accessed."""
+        return DecodedLines(self, encoding, errors)
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __enter__(self) -> MappedFile:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DecodedLines(Sequence[str]):
+    """A view of the lines of a MappedFile, decoded one at a time when accessed.
+
+    With the default "surrogateescape" error handler, bytes which are not valid in the
+    encoding are decoded into lone surrogates, and encoded back into the same bytes
+    when written with the same handler, so any file can be rendered losslessly.
+    """
+
+    def __init__(
+        self, lines: MappedFile, encoding: str = "utf-8", errors: str = "surrogateescape"
+    ) -> None:
+        self.lines = lines
+        self.encoding = encoding
+        self.errors = errors
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [line.decode(self.encoding, self.errors) for line in self.lines[index]]
+        return self.lines[index].decode(self.encoding, self.errors)
+
+
+def intern_mapped_lines(file1: MappedFile, file2: MappedFile) -> tuple[np.ndarray, np.ndarray]:
+    """Replaces every distinct line of two mapped files by an integer ID, as diff.intern_lines does.
+
+    The files are split into lines one chunk at a time, so only the distinct lines are
+    held in memory at once, as bytes (which are hashed without being decoded).
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The IDs of the lines of file1 and file2, as int32 arrays.
+    """
+    line_ids: dict[bytes, int] = {}
+
+    def intern_file(lines: MappedFile) -> np.ndarray:
+        chunks = [
+            np.fromiter(
+                (line_ids.setdefault(line, len(line_ids)) for line in chunk), dtype=np.int32, count=len(chunk)
+            )
+            for chunk in lines.iter_chunks()
+        ]
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+
+    return intern_file(file1), intern_file(file2)
+
+
+def diff_mapped(file1: MappedFile, file2: MappedFile, algorithm: str = "myers") -> EditScript:
+    """Finds a diff between the lines of two mapped files (see diff.diff).
+
+    Parameters
+    ----------
+    file1 : MappedFile
+        The original file.
+    file2 : MappedFile
+        The new file.
+    algorithm : str, optional
+        The algorithm used to find a longest common subsequence of lines, by default "myers".
+
+    Returns
+    -------
+    EditScript
+        The edits required to transform file1 to file2.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm {algorithm!r}, expected one of {ALGORITHMS}.")
+    ids1, ids2 = intern_mapped_lines(file1, file2)
+    return EditScript.from_ranges(_ranges_from_blocks(_matching_blocks(ids1, ids2, algorithm)))
+
+
+def diff_files_bytes(filename1: str, filename2: str, algorithm: str = "myers") -> EditScript:
+    """Finds a diff between two files of any encoding, comparing their lines as bytes.
+
+    Unlike diff.diff on the contents read by utils.read_file_contents, the files are
+    never decoded, so non-UTF-8 (or binary) files can be compared, and large files are
+    compared faster, as only the lines of the output need to be decoded (see
+    MappedFile.decoded).
+
+    Examples
+    --------
+    >>> diff_files_bytes("abc_original.txt", "abc_new.txt")
+    [4a5, 7c8, 9c10,13]
+    """
+    with MappedFile(filename1) as file1, MappedFile(filename2) as file2:
+        return diff_mapped(file1, file2, algorithm)
@@ -1,21 +1,39 @@
 from __future__ import annotations
 
+import argparse
+import io
+import os
 import sys
+from typing import Iterable, Iterator
+
 import numpy as np
-import collections
 
+import hirschberg
+import patience
+from intraline import GRANULARITIES
+from myers import Block, matching_blocks
 from utils import (
     Edit,
+    EditScript,
     Addition,
     Change,
     Deletion,
+    edit_from_ranges,
     read_file_contents,
+    hunkstr_normal,
     diffstr_normal,
+    write_context,
+    write_normal,
+    write_unified,
     check_edits,
 )
 
+# Algorithms accepted by diff(): Myers' linear-space algorithm, patience diff,
+# the full dynamic programming table, or Hirschberg's linear-space version of it
+ALGORITHMS = ("myers", "patience", "dp", "hirschberg")
+
 
-def diff(str1: str, str2: str) -> list[Edit]:
+def diff(str1: str, str2: str, algorithm: str = "myers") -> EditScript:
     """Finds a diff between two strings.
 
     Parameters
@@ -24,11 +42,20 @@ def diff(str1: str, str2: str) -> list[Edit]:
         First string to compare, with lines separated by newline (\n) characters.
     str2 : str
         Second string to compare, with lines separated by newline (\n) characters,
+    algorithm : str, optional
+        The algorithm used to find a longest common subsequence of lines, by default "myers".
+        "myers" runs Myers' O((N+M)D) algorithm in linear space, which is fast when the
+        strings are similar. "patience" anchors the diff on lines which are unique to both
+        strings (see patience.py). "dp" fills the full O(NM) dynamic programming table.
+        "hirschberg" finds the same kind of result as "dp" in O(N+M) memory (see hirschberg.py).
+        With every algorithm, the common prefix and suffix lines are matched up front.
 
     Returns
     -------
-    list[Edit]
-        A list of edits required to transform str1 to str2.
+    EditScript
+        A list of edits required to transform str1 to str2 (see iter_diff to
+        get them one at a time). It stores every edit in 16 bytes, and only
+        creates Edit objects when they are accessed.
         An Edit must be an Addition, Deletion, or Change defined by
         the starting and ending lines in each string.
         The edits should be in the same order as they would appear
@@ -60,12 +87,11 @@ def diff(str1: str, str2: str) -> list[Edit]:
     differences if there are multiple ways to minimize the number of modified lines.
 
     >>> print(diffstr_normal(str1, str2, diff_edits))
-    1d0
-    < # TODO: Refactor and add a docstring.
-    2a2,3
+    2c2
+    <     '''This is the original version of the algorithm
+    ---
     >     '''Calculate the nth Fibonacci number.
-    >     '''
-    6,9c7
+    7,10c7
     <         if i % 2 == 1:
     <             fib_nums[1] = fib_nums[0] + fib_nums[1]
     <         else:
@@ -102,70 +128,502 @@ def diff(str1: str, str2: str) -> list[Edit]:
     > y
 
     """
+    return EditScript.from_ranges(_diff_ranges(str1, str2, algorithm))
+
+
+def iter_diff(str1: str, str2: str, algorithm: str = "myers") -> Iterator[Edit]:
+    """Finds a diff between two strings, yielding the edits as they are found.
+
+    With the "myers", "patience" and "hirschberg" algorithms, the matching lines are
+    found lazily, so the first edits are available before the rest of the strings has
+    been compared, and no memory is kept for the edits already yielded.
+
+    Parameters
+    ----------
+    str1 : str
+        First string to compare, with lines separated by newline (\n) characters.
+    str2 : str
+        Second string to compare, with lines separated by newline (\n) characters.
+    algorithm : str, optional
+        The algorithm used to find a longest common subsequence of lines, by default
+        "myers". See diff for the available algorithms.
+
+    Yields
+    ------
+    Edit
+        The edits required to transform str1 to str2, in order.
+
+    Examples
+    --------
+    >>> edits = iter_diff("a\\nb\\nc\\n", "a\\nc\\nd\\n", algorithm="hirschberg")
+    >>> next(edits)
+    2d1
+    >>> list(edits)
+    [3a3]
+    """
+    for ranges in _diff_ranges(str1, str2, algorithm):
+        yield edit_from_ranges(*ranges)
+
+
+def _diff_ranges(str1: str, str2: str, algorithm: str) -> Iterator[tuple[int, int, int, int]]:
+    """Finds a diff between two strings, yielding the line ranges of the edits (see utils.edit_ranges)."""
     lines1: list[str] = str1.splitlines()
     lines2: list[str] = str2.splitlines()
 
-    # First off: creating a DP table that tracks the edits
-    dp = np.zeros((len(lines1)+1,len(lines2)+1)).astype(int)
-    # Now we find the minimum edit distance
-    for i in range(len(dp)):
-        dp[i][0] = i
-    for i in range(len(dp[0])):
-        dp[0][i] = i
-    for i in range(1,len(dp)):
-        for j in range(1,len(dp[0])):
-            if lines1[i-1] == lines2[j-1]:
-                dp[i][j] = dp[i-1][j-1]
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm {algorithm!r}, expected one of {ALGORITHMS}.")
+
+    # Compare small integers instead of (possibly long) strings
+    ids1, ids2 = intern_lines(lines1, lines2)
+    yield from _ranges_from_blocks(_matching_blocks(ids1, ids2, algorithm))
+
+
+def _matching_blocks(ids1: np.ndarray, ids2: np.ndarray, algorithm: str) -> Iterator[Block]:
+    """Finds the matching blocks of two interned files with the given algorithm.
+
+    Parameters
+    ----------
+    ids1 : np.ndarray
+        Interned IDs of the lines of the first string (see intern_lines).
+    ids2 : np.ndarray
+        Interned IDs of the lines of the second string.
+    algorithm : str
+        One of ALGORITHMS.
+
+    Yields
+    ------
+    Block
+        Matching blocks (i, j, length) in order. The first block starts at (0, 0) and
+        the last one ends at (len(ids1), len(ids2)); either may be empty.
+    """
+    # Only run the algorithm on the lines between the common prefix and suffix
+    prefix, suffix = common_affixes(ids1, ids2)
+    middle1 = ids1[prefix : len(ids1) - suffix]
+    middle2 = ids2[prefix : len(ids2) - suffix]
+
+    if algorithm == "myers":
+        # Indexing a list is much faster than indexing a NumPy array one element at a time
+        middle_blocks = matching_blocks(middle1.tolist(), middle2.tolist())
+    elif algorithm == "patience":
+        middle_blocks = patience.matching_blocks(middle1.tolist(), middle2.tolist())
+    elif algorithm == "hirschberg":
+        middle_blocks = hirschberg.matching_blocks(middle1, middle2)
+    else:
+        middle_blocks = _dp_matching_blocks(middle1, middle2)
+
+    yield 0, 0, prefix
+    for i, j, length in middle_blocks:
+        yield i + prefix, j + prefix, length
+    yield len(ids1) - suffix, len(ids2) - suffix, suffix
+
+
+def common_affixes(ids1: np.ndarray, ids2: np.ndarray) -> tuple[int, int]:
+    """Counts the lines shared at the start and at the end of two interned files.
+
+    Parameters
+    ----------
+    ids1 : np.ndarray
+        Interned IDs of the lines of the first string (see intern_lines).
+    ids2 : np.ndarray
+        Interned IDs of the lines of the second string.
+
+    Returns
+    -------
+    tuple[int, int]
+        Lengths of the common prefix and of the common suffix. They never overlap.
+
+    Examples
+    --------
+    >>> common_affixes(np.array([1, 2, 3, 4]), np.array([1, 2, 5, 4]))
+    (2, 1)
+    >>> common_affixes(np.array([1, 1]), np.array([1, 1, 1]))
+    (2, 0)
+    """
+    length = min(len(ids1), len(ids2))
+    mismatches = np.flatnonzero(ids1[:length] != ids2[:length])
+    prefix = int(mismatches[0]) if len(mismatches) else length
+
+    length -= prefix
+    mismatches = np.flatnonzero(ids1[len(ids1) - length :][::-1] != ids2[len(ids2) - length :][::-1])
+    suffix = int(mismatches[0]) if len(mismatches) else length
+    return prefix, suffix
+
+
+def intern_lines(lines1: list[str], lines2: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Replaces every distinct line by an integer ID, shared across both lists of lines.
+
+    Each line is hashed once, into a single table shared by both inputs, so that equal
+    lines in either list get the same ID. The diff algorithms then compare IDs, which
+    costs the same for every line, instead of comparing full strings.
+
+    Parameters
+    ----------
+    lines1 : list[str]
+        Lines of the first string.
+    lines2 : list[str]
+        Lines of the second string.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The IDs of lines1 and lines2, as int32 arrays. IDs are numbered from 0 in order
+        of first appearance.
+
+    Examples
+    --------
+    >>> ids1, ids2 = intern_lines(["a", "b", "a"], ["b", "c"])
+    >>> ids1.tolist(), ids2.tolist()
+    ([0, 1, 0], [1, 2])
+    """
+    line_ids: dict[str, int] = {}
+    ids1 = np.fromiter(
+        (line_ids.setdefault(line, len(line_ids)) for line in lines1), dtype=np.int32, count=len(lines1)
+    )
+    ids2 = np.fromiter(
+        (line_ids.setdefault(line, len(line_ids)) for line in lines2), dtype=np.int32, count=len(lines2)
+    )
+    return ids1, ids2
+
+
+def _dp_table(lines1: np.ndarray, lines2: np.ndarray) -> np.ndarray:
+    """Fills the dynamic programming table of minimum edit distances between two files.
+
+    dp[i, j] is the minimum number of deleted and added lines needed to turn the first
+    i lines of the first file into the first j lines of the second file (a changed line
+    counts as one deletion plus one addition).
+
+    Rather than filling one cell at a time, every row is computed from the one above it
+    with a few NumPy operations (see hirschberg.next_row).
+
+    Parameters
+    ----------
+    lines1 : np.ndarray
+        Interned IDs of the lines of the first string (see intern_lines).
+    lines2 : np.ndarray
+        Interned IDs of the lines of the second string.
+
+    Returns
+    -------
+    np.ndarray
+        The (len(lines1) + 1) x (len(lines2) + 1) table, as int32.
+
+    Examples
+    --------
+    >>> _dp_table(np.array([0, 1, 2]), np.array([0, 2, 3]))
+    array([[0, 1, 2, 3],
+           [1, 0, 1, 2],
+           [2, 1, 2, 3],
+           [3, 2, 1, 2]], dtype=int32)
+    """
+    dp = np.empty((len(lines1) + 1, len(lines2) + 1), dtype=np.int32)
+    dp[0] = np.arange(len(lines2) + 1)
+    for i, line in enumerate(lines1.tolist(), start=1):
+        hirschberg.next_row(dp[i - 1], line, lines2, out=dp[i])
+    return dp
+
+
+def _dp_matching_blocks(lines1: np.ndarray, lines2: np.ndarray) -> Iterator[Block]:
+    """Finds matching blocks with the O(nm) dynamic programming algorithm.
+
+    Parameters
+    ----------
+    lines1 : np.ndarray
+        Interned IDs of the lines of the first string (see intern_lines).
+    lines2 : np.ndarray
+        Interned IDs of the lines of the second string.
+
+    Returns
+    -------
+    Iterator[Block]
+        Matching blocks (i, j, length), in order.
+    """
+    dp = _dp_table(lines1, lines2)
+    lines1, lines2 = lines1.tolist(), lines2.tolist()
+
+    # Now we start from the lower right corner and trace back,
+    # preferring matches, then deletions, then additions
+    i, j = len(lines1), len(lines2)
+    reversed_blocks: list[Block] = []
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and lines1[i-1] == lines2[j-1] and dp[i, j] == dp[i-1, j-1]:
+            # Extend the current block if it starts right after this match
+            if reversed_blocks and reversed_blocks[-1][0] == i and reversed_blocks[-1][1] == j:
+                _, _, length = reversed_blocks.pop()
+                reversed_blocks.append((i-1, j-1, length+1))
             else:
-                dp[i][j] = min(dp[i-1][j-1]+2,dp[i][j-1]+1,dp[i-1][j]+1)
-    # Now we start from the lower right corner and trace back
-    
-    curr = (len(dp)-1,len(dp[0])-1)
-    path = [curr]
-    directions = [(-1,0),(-1,-1),(0,-1)]
-    while curr != (0,0):
-        dict_temp = {}
-        for dx,dy in directions:
-            dict_temp[(curr[0]+dx,curr[1]+dy)] = dp[curr[0]+dx][curr[1]+dy]
-        nxt = min(dict_temp, key=dict_temp.get)
-        path.append(nxt)
-        curr = nxt
-    path = collections.deque(path[::-1])
-
-    ans = []
-    while len(path) > 1:
-        # When there are matches: pop until encountering a change
-        if (len(path) > 1 and path[1][1]-path[0][1] == 1 and path[1][0]-path[0][0] == 1 
-            and dp[path[1][0]][path[1][1]] == dp[path[0][0]][path[0][1]]):
-            while (len(path) > 1 and path[1][1]-path[0][1] == 1 and path[1][0]-path[0][0] == 1 
-                   and dp[path[1][0]][path[1][1]] == dp[path[0][0]][path[0][1]]):
-                path.popleft()
+                reversed_blocks.append((i-1, j-1, 1))
+            i, j = i-1, j-1
+        elif i > 0 and dp[i, j] == dp[i-1, j]+1:
+            i -= 1
         else:
-            start = path[0]
-            while len(path) > 1 and not (path[1][1]-path[0][1] == 1 and path[1][0]-path[0][0] == 1 
-                       and dp[path[1][0]][path[1][1]] == dp[path[0][0]][path[0][1]]):
-                path.popleft()
-            end = path[0]
-            # This corresponds to an Add Operation
-            if start[0] == end[0]:
-                ans.append(Addition(start[0],(start[1]+1,end[1])) if start[1]+1 != end[1] else Addition(start[0],end[1]))
-            # This is a Delete Operation
-            elif start[1] == end[1]:
-                ans.append(Deletion(start[0],(start[1]+1,end[1])) if start[1]+1 != end[1] else Addition(start[0],end[1]))
-            # This is a Change Operation
-            else:
-                c1 = (start[0]+1,end[0]) if start[0]+1 != end[0] else end[0]
-                c2 = (start[1]+1,end[1]) if start[1]+1 != end[1] else end[1]
-                ans.append(Change(c1,c2))
-    
-    return ans
+            j -= 1
+    return iter(reversed_blocks[::-1])
+
+
+def _ranges_from_blocks(blocks: Iterable[Block]) -> Iterator[tuple[int, int, int, int]]:
+    """Converts the matching blocks of two lists of lines into the edits between them.
+
+    Parameters
+    ----------
+    blocks : Iterable[Block]
+        Matching blocks (i, j, length) in order, using 0-based line indices. Only the
+        gaps between consecutive blocks are edited, so the first block should start
+        and the last one should end where the edits are wanted (e.g. with empty blocks
+        at (0, 0) and at the end of both lists of lines).
+
+    Yields
+    ------
+    tuple[int, int, int, int]
+        The line ranges (see utils.edit_ranges) of the edits covering every gap
+        between consecutive blocks.
+
+    Examples
+    --------
+    >>> blocks = [(0, 0, 0), (1, 0, 2), (4, 3, 1), (6, 4, 0)]
+    >>> list(_ranges_from_blocks(blocks))
+    [(0, 1, 0, 0), (3, 4, 2, 3), (5, 6, 4, 4)]
+    >>> EditScript.from_ranges(_ranges_from_blocks(blocks))
+    [1d0, 4c3, 6d4]
+    """
+    blocks = iter(blocks)
+    i, j, length = next(blocks, (0, 0, 0))
+    i, j = i + length, j + length
+    for block_i, block_j, length in blocks:
+        if block_i > i or block_j > j:
+            yield i, block_i, j, block_j
+        i, j = block_i + length, block_j + length
+
 
 if __name__ == "__main__":
-    if len(sys.argv) == 3:
-        str1 = read_file_contents(sys.argv[1])
-        str2 = read_file_contents(sys.argv[2])
-        edits = diff(str1, str2)
-        print(diffstr_normal(str1, str2, edits, color=True))
+    if len(sys.argv) > 1:
+        parser = argparse.ArgumentParser(description="Compare two files line by line.")
+        parser.add_argument("file1", help="The original file (or directory, with -r).")
+        parser.add_argument("file2", help="The new file (or directory, with -r).")
+        parser.add_argument(
+            "-a",
+            "--algorithm",
+            choices=ALGORITHMS,
+            default="myers",
+            help="Algorithm used to match lines (default: myers).",
+        )
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help="Read the files line by line and print the edits as they are found, "
+            "holding a bounded number of lines in memory (for very large files).",
+        )
+        parser.add_argument(
+            "--window",
+            type=int,
+            default=None,
+            help="With --stream, the maximum number of lines of each file held in memory.",
+        )
+        output_format = parser.add_mutually_exclusive_group()
+        output_format.add_argument(
+            "-u", action="store_const", const=3, dest="unified", help="Output 3 lines of unified context."
+        )
+        output_format.add_argument(
+            "-U", "--unified", type=int, metavar="NUM", help="Output NUM lines of unified context."
+        )
+        output_format.add_argument(
+            "-c", action="store_const", const=3, dest="context", help="Output 3 lines of copied context."
+        )
+        output_format.add_argument(
+            "-C", "--context", type=int, metavar="NUM", help="Output NUM lines of copied context."
+        )
+        parser.add_argument(
+            "-r",
+            "--recursive",
+            action="store_true",
+            help="Compare two directories, recursively, file by file.",
+        )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=None,
+            help="With -r, the number of worker processes (default: one per CPU).",
+        )
+        parser.add_argument(
+            "--summary",
+            action="store_true",
+            help="With -r, only print the number of edits and changed lines of each file.",
+        )
+        parser.add_argument(
+            "--cache",
+            metavar="DIR",
+            default=None,
+            help="Reuse the results of earlier diffs of the same files, stored in DIR.",
+        )
+        parser.add_argument(
+            "--cache-size",
+            type=int,
+            default=None,
+            metavar="BYTES",
+            help="With --cache, the maximum size of the cache (default: 64 MiB).",
+        )
+        parser.add_argument(
+            "--cache-stats",
+            action="store_true",
+            help="With --cache, print the cache hits and misses to stderr.",
+        )
+        parser.add_argument(
+            "--color",
+            choices=("auto", "always", "never"),
+            default="auto",
+            help="Color the output (default: only when writing to a terminal).",
+        )
+        parser.add_argument(
+            "--bytes",
+            action="store_true",
+            help="Compare the lines as bytes, memory-mapping the files and only decoding the "
+            "printed lines (faster on large files, and works with any encoding).",
+        )
+        parser.add_argument(
+            "--encoding",
+            default="utf-8",
+            help="With --bytes, the encoding of the printed lines (default: utf-8). Bytes which "
+            "are not valid in it are printed unchanged.",
+        )
+        parser.add_argument(
+            "--refine",
+            choices=GRANULARITIES,
+            default=None,
+            help="With color, highlight only the changed words or characters of changed lines.",
+        )
+        args = parser.parse_args()
+        color = args.color == "always" or (args.color == "auto" and sys.stdout.isatty())
+        if args.bytes and (args.recursive or args.stream or args.cache is not None):
+            parser.error("--bytes cannot be combined with -r, --stream or --cache.")
+        if args.cache is not None:
+            import diffcache
+
+            cache = diffcache.DiffCache(args.cache, args.cache_size or diffcache.MAX_BYTES)
+
+        if args.recursive:
+            import dirdiff
+
+            if args.stream:
+                parser.error("--stream cannot be combined with -r.")
+            if args.unified is not None:
+                output_format, context = "unified", args.unified
+            elif args.context is not None:
+                output_format, context = "context", args.context
+            else:
+                output_format, context = "normal", 3
+            results = dirdiff.iter_dirdiff(
+                args.file1,
+                args.file2,
+                algorithm=args.algorithm,
+                output_format=None if args.summary else output_format,
+                context=context,
+                color=color,
+                refine=args.refine,
+                workers=args.jobs,
+                cache_dir=args.cache,
+                cache_size=args.cache_size,
+            )
+            num_files = lines_added = lines_deleted = 0
+            for result in results:
+                if result.status == "modified" and args.cache is not None:
+                    if result.cached:
+                        cache.stats.hits += 1
+                    else:
+                        cache.stats.misses += 1
+                if result.status == "identical":
+                    continue
+                if args.summary:
+                    print(dirdiff.format_summary_line(result))
+                    num_files += 1
+                    lines_added += result.lines_added
+                    lines_deleted += result.lines_deleted
+                elif result.status == "only_in_first" or result.status == "only_in_second":
+                    root = args.file1 if result.status == "only_in_first" else args.file2
+                    directory, name = os.path.split(os.path.join(root, result.path))
+                    print(f"Only in {directory}: {name}")
+                else:
+                    filename1 = os.path.join(args.file1, result.path)
+                    filename2 = os.path.join(args.file2, result.path)
+                    if result.status == "binary":
+                        print(f"Binary files {filename1} and {filename2} differ")
+                    else:
+                        print(f"diff {filename1} {filename2}")
+                        sys.stdout.write(result.text)
+            if args.summary:
+                print(f"{num_files} files differ, +{lines_added} -{lines_deleted}")
+        elif args.stream:
+            if args.unified is not None or args.context is not None:
+                parser.error("--stream only supports the normal output format.")
+            import streaming
+
+            hunks = streaming.iter_hunks(
+                streaming.iter_file_lines(args.file1),
+                streaming.iter_file_lines(args.file2),
+                window=args.window or streaming.WINDOW_LINES,
+                algorithm=args.algorithm,
+            )
+            for edit, original_lines, new_lines in hunks:
+                sys.stdout.write(hunkstr_normal(edit, original_lines, new_lines, color, args.refine) + "\n")
+        else:
+            out = sys.stdout
+            if args.bytes:
+                import bytesdiff
+
+                file1, file2 = bytesdiff.MappedFile(args.file1), bytesdiff.MappedFile(args.file2)
+                edits = bytesdiff.diff_mapped(file1, file2, algorithm=args.algorithm)
+                lines1, lines2 = file1.decoded(args.encoding), file2.decoded(args.encoding)
+                newline1, newline2 = file1.final_newline, file2.final_newline
+                # Encode the lines back with the same error handler, so undecodable bytes are
+                # written as they were read
+                out = io.TextIOWrapper(sys.stdout.buffer, encoding=args.encoding, errors="surrogateescape")
+            else:
+                str1 = read_file_contents(args.file1)
+                str2 = read_file_contents(args.file2)
+                lines1, lines2 = str1.splitlines(), str2.splitlines()
+                newline1, newline2 = str1.endswith("\n"), str2.endswith("\n")
+                if args.cache is not None:
+                    edits = cache.diff(str1, str2, algorithm=args.algorithm)
+                else:
+                    edits = iter_diff(str1, str2, algorithm=args.algorithm)
+            if args.unified is not None:
+                write_unified(
+                    out,
+                    lines1,
+                    lines2,
+                    edits,
+                    args.unified,
+                    args.file1,
+                    args.file2,
+                    color,
+                    args.refine,
+                    newline1,
+                    newline2,
+                )
+            elif args.context is not None:
+                write_context(
+                    out,
+                    lines1,
+                    lines2,
+                    edits,
+                    args.context,
+                    args.file1,
+                    args.file2,
+                    color,
+                    args.refine,
+                    newline1,
+                    newline2,
+                )
+            else:
+                write_normal(out, lines1, lines2, edits, color, args.refine, newline1, newline2)
+            out.flush()
+
+        if args.cache is not None and args.cache_stats:
+            print(
+                f"cache: {cache.stats.hits} hits, {cache.stats.misses} misses "
+                f"({cache.stats.hit_ratio:.0%}), {len(cache.entries())} entries, "
+                f"{cache.size()} bytes",
+                file=sys.stderr,
+            )
     else:
         import doctest
 
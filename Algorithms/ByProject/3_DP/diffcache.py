@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import tempfile
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+from diff import ALGORITHMS, diff
+from utils import EDIT_DTYPE, Edit, EditScript
+
+# Default maximum total size of the cached entries, in bytes
+MAX_BYTES = 64 * 1024 * 1024
+# Eviction deletes entries until they take at most this fraction of max_bytes, so
+# that the directory is only scanned again once enough new entries were added
+_EVICT_TO = 0.9
+
+# Every entry starts with a magic number, a format version and the number of edits,
+# followed by the EDIT_DTYPE records of the edits (see utils.EditScript)
+_MAGIC = b"DIFC"
+_VERSION = 1
+_HEADER = struct.Struct("<4sII")
+_SUFFIX = ".edits"
+
+
+@dataclass
+class DiffCacheStats:
+    """Counters describing how a DiffCache has been used."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+def encode_edits(edits: Iterable[Edit]) -> bytes:
+    """Encodes a list of edits into a compact binary string (16 bytes per edit).
+
+    Examples
+    --------
+    >>> from utils import Addition, Change
+    >>> decode_edits(encode_edits([Addition(2, (3, 4)), Change((5, 6), 7)]))
+    [2a3,4, 5,6c7]
+    """
+    ranges = EditScript.from_edits(edits).ranges
+    return _HEADER.pack(_MAGIC, _VERSION, len(ranges)) + ranges.tobytes()
+
+
+def decode_edits(data: bytes) -> EditScript:
+    """Decodes a list of edits encoded by encode_edits.
+
+    Raises
+    ------
+    ValueError
+        If data is not a valid encoding.
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("Truncated cache entry.")
+    magic, version, num_edits = _HEADER.unpack_from(data)
+    expected_size = _HEADER.size + EDIT_DTYPE.itemsize * num_edits
+    if magic != _MAGIC or version != _VERSION or len(data) != expected_size:
+        raise ValueError("Invalid cache entry.")
+    return EditScript(np.frombuffer(data, dtype=EDIT_DTYPE, offset=_HEADER.size))
+
+
+class DiffCache:
+    """An on-disk cache of diff results, shared by every process using the same directory.
+
+    Entries are keyed by the hashes of both inputs and the diff options, and stored
+    one per file in a compact binary encoding (see encode_edits). Files are written
+    atomically, so concurrent jobs can share a cache. When adding an entry makes them
+    take more than max_bytes, the least recently used ones (by modification time, which
+    is refreshed on every hit) are deleted, down to 90% of max_bytes.
+
+    Each instance keeps a running total of the size of the entries, so adding one
+    takes constant time, and the directory is only scanned when the total exceeds
+    max_bytes (which recounts the entries added by other processes). Reuse one
+    instance for many diffs, rather than creating one per diff.
+
+    Parameters
+    ----------
+    directory : str
+        Directory holding the entries. It is created if needed.
+    max_bytes : int = MAX_BYTES
+        Maximum total size of the entries, in bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = DiffCacheStats()
+        os.makedirs(directory, exist_ok=True)
+        # Running total of the size of the entries, as of the last scan plus the
+        # entries put since. Until its first scan, an instance assumes that the
+        # cache is as full as eviction leaves it, so creating one costs nothing.
+        self._total_bytes = int(_EVICT_TO * max_bytes)
+
+    @staticmethod
+    def key(str1: str, str2: str, algorithm: str = "myers") -> str:
+        """Computes the cache key of diffing str1 and str2 with the given options.
+
+        Examples
+        --------
+        >>> DiffCache.key("a", "b") == DiffCache.key("a", "b", algorithm="myers")
+        True
+        >>> DiffCache.key("a", "b") == DiffCache.key("b", "a")
+        False
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        for string in (str1, str2):
+            digest.update(hashlib.blake2b(string.encode("utf-8", "surrogatepass")).digest())
+        digest.update(algorithm.encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def get(self, key: str) -> EditScript | None:
+        """Looks up the edits stored under key.
+
+        Returns
+        -------
+        EditScript | None
+            The edits, or None if the key is not cached (or its entry is corrupted).
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                edits = decode_edits(f.read())
+            os.utime(path)
+        except FileNotFoundError:
+            self.stats.misses += 1
+            return None
+        except ValueError:
+            self._delete(path)
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return edits
+
+    def put(self, key: str, edits: Iterable[Edit]):
+        """Stores edits under key, then evicts old entries if the cache is too large."""
+        data = encode_edits(edits)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(file_descriptor, "wb") as f:
+            f.write(data)
+        path = self._path(key)
+        try:
+            replaced_size = os.stat(path).st_size
+        except FileNotFoundError:
+            replaced_size = 0
+        os.replace(temporary_path, path)
+
+        self._total_bytes += len(data) - replaced_size
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def diff(self, str1: str, str2: str, algorithm: str = "myers") -> EditScript:
+        """Finds a diff between two strings (see diff.diff), reusing a cached result if possible."""
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm {algorithm!r}, expected one of {ALGORITHMS}.")
+        key = self.key(str1, str2, algorithm)
+        edits = self.get(key)
+        if edits is None:
+            edits = diff(str1, str2, algorithm)
+            self.put(key, edits)
+        return edits
+
+    def entries(self) -> list[os.DirEntry]:
+        """Lists the files of the cached entries."""
+        with os.scandir(self.directory) as it:
+            return [entry for entry in it if entry.name.endswith(_SUFFIX)]
+
+    def size(self) -> int:
+        """Computes the total size of the cached entries, in bytes."""
+        return sum(self._entry_size(entry) for entry in self.entries())
+
+    def clear(self):
+        """Deletes every entry."""
+        for entry in self.entries():
+            self._delete(entry.path)
+        self._total_bytes = 0
+
+    def _evict(self):
+        """Scans the entries, and deletes the least recently used ones if they take more than max_bytes."""
+        entries = []
+        total_size = 0
+        for entry in self.entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Evicted by another process in the meantime
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size += stat.st_size
+        if total_size > self.max_bytes:
+            for _, size, path in sorted(entries):
+                if total_size <= _EVICT_TO * self.max_bytes:
+                    break
+                self._delete(path)
+                total_size -= size
+                self.stats.evictions += 1
+        self._total_bytes = total_size
+
+    @staticmethod
+    def _entry_size(entry: os.DirEntry) -> int:
+        try:
+            return entry.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _delete(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator
+
+from diff import diff
+from diffcache import MAX_BYTES, DiffCache
+from utils import read_file_contents, write_context, write_normal, write_unified
+
+# Possible outcomes of comparing one path of two directory trees
+STATUSES = ("identical", "modified", "binary", "only_in_first", "only_in_second")
+# Output formats which can be rendered for modified files
+FORMATS = ("normal", "unified", "context")
+
+# Bytes read at a time when hashing a file
+_CHUNK_SIZE = 1 << 20
+
+
+@dataclass
+class FileDiff:
+    """The result of comparing one path of two directory trees."""
+
+    path: str
+    status: str
+    num_edits: int = 0
+    lines_added: int = 0
+    lines_deleted: int = 0
+    # The rendered diff of a modified file, if one was requested
+    text: str = ""
+    # Whether the edits of a modified file were found in a DiffCache
+    cached: bool = False
+
+
+def file_digest(filename: str) -> bytes:
+    """Hashes the contents of a file, reading it in chunks.
+
+    Parameters
+    ----------
+    filename : str
+        The file to hash.
+
+    Returns
+    -------
+    bytes
+        The BLAKE2b digest of the file's contents.
+    """
+    digest = hashlib.blake2b()
+    with open(filename, "rb") as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def same_contents(filename1: str, filename2: str) -> bool:
+    """Checks whether two files have the same contents, comparing sizes, then hashes."""
+    if os.path.getsize(filename1) != os.path.getsize(filename2):
+        return False
+    return file_digest(filename1) == file_digest(filename2)
+
+
+def walk_files(root: str) -> list[str]:
+    """Lists the files below a directory.
+
+    Parameters
+    ----------
+    root : str
+        The directory to walk.
+
+    Returns
+    -------
+    list[str]
+        The paths of the files, relative to root, in sorted order.
+    """
+    paths = []
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            paths.append(os.path.relpath(os.path.join(directory, filename), root))
+    return sorted(paths)
+
+
+def compare_files(
+    root1: str,
+    root2: str,
+    path: str,
+    algorithm: str = "myers",
+    output_format: str | None = None,
+    context: int = 3,
+    color: bool = False,
+    refine: str | None = None,
+    cache_dir: str | None = None,
+    cache_size: int | None = None,
+) -> FileDiff:
+    """Compares the file at the same relative path in two directories, which must both exist.
+
+    Files with the same contents are detected by hashing, without reading them as text.
+
+    Parameters
+    ----------
+    root1 : str
+        The original directory.
+    root2 : str
+        The new directory.
+    path : str
+        Path of the file, relative to both directories.
+    algorithm : str, optional
+        Algorithm passed to diff.diff, by default "myers".
+    output_format : str | None, optional
+        One of FORMATS to render the diff of a modified file in, or None to only
+        count its edits, by default None.
+    context : int, optional
+        Number of context lines of the "unified" and "context" formats, by default 3.
+    color : bool, optional
+        Whether to color the rendered diff, by default False.
+    refine : str | None, optional
+        With color, highlight only the changed words ("word") or characters ("char")
+        of changed lines, by default None.
+    cache_dir : str | None, optional
+        Directory of a DiffCache to reuse earlier results from, by default None.
+    cache_size : int | None, optional
+        Maximum size of the DiffCache in bytes, by default diffcache.MAX_BYTES.
+
+    Returns
+    -------
+    FileDiff
+        The status and edit counts of the file.
+    """
+    filename1, filename2 = os.path.join(root1, path), os.path.join(root2, path)
+    if same_contents(filename1, filename2):
+        return FileDiff(path, "identical")
+    try:
+        str1 = read_file_contents(filename1)
+        str2 = read_file_contents(filename2)
+    except UnicodeDecodeError:
+        return FileDiff(path, "binary")
+
+    cached = False
+    if cache_dir is not None:
+        cache = _get_cache(cache_dir, cache_size or MAX_BYTES)
+        hits = cache.stats.hits
+        edits = cache.diff(str1, str2, algorithm)
+        cached = cache.stats.hits > hits
+    else:
+        edits = diff(str1, str2, algorithm)
+    result = FileDiff(
+        path,
+        "modified",
+        num_edits=len(edits),
+        lines_added=edits.num_lines_added,
+        lines_deleted=edits.num_lines_deleted,
+        cached=cached,
+    )
+    if output_format is not None:
+        out = io.StringIO()
+        lines1, lines2 = str1.splitlines(), str2.splitlines()
+        newline1, newline2 = str1.endswith("\n"), str2.endswith("\n")
+        if output_format == "unified":
+            write_unified(
+                out, lines1, lines2, edits, context, filename1, filename2, color, refine, newline1, newline2
+            )
+        elif output_format == "context":
+            write_context(
+                out, lines1, lines2, edits, context, filename1, filename2, color, refine, newline1, newline2
+            )
+        else:
+            write_normal(out, lines1, lines2, edits, color, refine, newline1, newline2)
+        result.text = out.getvalue()
+    return result
+
+
+# DiffCache instances of the current process, by directory and maximum size, reused
+# across files so that each keeps its running total instead of rescanning the directory
+_caches: dict[tuple[str, int], DiffCache] = {}
+
+
+def _get_cache(cache_dir: str, cache_size: int) -> DiffCache:
+    """Returns the DiffCache of the current process for a directory, creating it on first use."""
+    key = (os.path.abspath(cache_dir), cache_size)
+    if key not in _caches:
+        _caches[key] = DiffCache(cache_dir, cache_size)
+    return _caches[key]
+
+
+def _compare_files_star(args: tuple) -> FileDiff:
+    return compare_files(*args)
+
+
+def iter_dirdiff(
+    root1: str,
+    root2: str,
+    algorithm: str = "myers",
+    output_format: str | None = None,
+    context: int = 3,
+    color: bool = False,
+    refine: str | None = None,
+    workers: int | None = None,
+    cache_dir: str | None = None,
+    cache_size: int | None = None,
+) -> Iterator[FileDiff]:
+    """Compares two directory trees, file by file.
+
+    Files present in both trees are compared on a pool of worker processes (see
+    compare_files), and the results are yielded in sorted path order as soon as
+    they, and all the ones before them, are ready.
+
+    Parameters
+    ----------
+    root1 : str
+        The original directory.
+    root2 : str
+        The new directory.
+    algorithm : str, optional
+        Algorithm passed to diff.diff, by default "myers".
+    output_format : str | None, optional
+        One of FORMATS to render the diffs of modified files in, or None to only
+        count their edits, by default None.
+    context : int, optional
+        Number of context lines of the "unified" and "context" formats, by default 3.
+    color : bool, optional
+        Whether to color the rendered diffs, by default False.
+    refine : str | None, optional
+        With color, highlight only the changed words ("word") or characters ("char")
+        of changed lines, by default None.
+    workers : int | None, optional
+        Number of worker processes, by default one per CPU. With 1, the files are
+        compared in the current process, one at a time.
+    cache_dir : str | None, optional
+        Directory of a DiffCache shared by the workers, by default None.
+    cache_size : int | None, optional
+        Maximum size of the DiffCache in bytes, by default diffcache.MAX_BYTES.
+
+    Yields
+    ------
+    FileDiff
+        The result for every path found in either tree, in sorted order.
+    """
+    if output_format is not None and output_format not in FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}, expected one of {FORMATS}.")
+
+    paths1, paths2 = walk_files(root1), walk_files(root2)
+    common = sorted(set(paths1) & set(paths2))
+    jobs = [
+        (root1, root2, path, algorithm, output_format, context, color, refine, cache_dir, cache_size)
+        for path in common
+    ]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = map(_compare_files_star, jobs)
+        yield from _merge_results(paths1, paths2, results)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Executor.map keeps the order of the jobs, and batching them amortizes
+            # the inter-process communication over many small files
+            chunksize = max(1, len(jobs) // (4 * workers))
+            results = executor.map(_compare_files_star, jobs, chunksize=chunksize)
+            yield from _merge_results(paths1, paths2, results)
+
+
+def _merge_results(
+    paths1: list[str], paths2: list[str], results: Iterator[FileDiff]
+) -> Iterator[FileDiff]:
+    """Interleaves the results for common paths with the paths found in only one tree, in sorted order."""
+    only1, only2 = set(paths1) - set(paths2), set(paths2) - set(paths1)
+    for path in sorted(set(paths1) | set(paths2)):
+        if path in only1:
+            yield FileDiff(path, "only_in_first")
+        elif path in only2:
+            yield FileDiff(path, "only_in_second")
+        else:
+            yield next(results)
+
+
+def format_summary_line(file_diff: FileDiff) -> str:
+    """Formats one line of the summary of a directory diff.
+
+    Examples
+    --------
+    >>> format_summary_line(FileDiff("src/a.py", "modified", 3, 10, 2))
+    'src/a.py | 3 edits, +10 -2'
+    >>> format_summary_line(FileDiff("b.txt", "only_in_second"))
+    'b.txt | only in second'
+    """
+    if file_diff.status == "modified":
+        return (
+            f"{file_diff.path} | {file_diff.num_edits} edits, "
+            f"+{file_diff.lines_added} -{file_diff.lines_deleted}"
+        )
+    return f"{file_diff.path} | {file_diff.status.replace('_', ' ')}"
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+import numpy as np
+
+from myers import Block
+
+
+def next_row(previous: np.ndarray, line: int, b: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Computes one row of the edit distance table from the row above it.
+
+    Row i holds the minimum number of deleted and added lines needed to turn the first i
+    lines of a into the first j lines of b, for every j. Ignoring the cell to its left,
+    each cell only depends on the previous row:
+
+        best[j] = previous[j-1]                                if a[i-1] == b[j-1],
+                  min(previous[j] + 1, previous[j-1] + 2)      otherwise.
+
+    Taking the cell to the left into account gives row[j] = min over k <= j of
+    best[k] + (j - k), that is, row[j] - j is the running minimum of best[k] - k,
+    which np.minimum.accumulate computes in one pass.
+
+    Parameters
+    ----------
+    previous : np.ndarray
+        Row i - 1 of the table, of length len(b) + 1.
+    line : int
+        The line a[i - 1].
+    b : np.ndarray
+        Lines of the second sequence, as integer IDs.
+    out : np.ndarray
+        Array receiving row i. It must not be the same array as previous.
+
+    Returns
+    -------
+    np.ndarray
+        out.
+
+    Examples
+    --------
+    >>> row = np.arange(4, dtype=np.int32)
+    >>> next_row(row, 2, np.array([0, 2, 3]), np.empty(4, dtype=np.int32))
+    array([1, 2, 1, 2], dtype=int32)
+    """
+    offsets = np.arange(len(out), dtype=out.dtype)
+    out[0] = previous[0] + 1
+    np.minimum(previous[1:] + 1, previous[:-1] + 2, out=out[1:])
+    np.copyto(out[1:], previous[:-1], where=b == line)
+    out -= offsets
+    np.minimum.accumulate(out, out=out)
+    out += offsets
+    return out
+
+
+def _last_row(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Computes the last row of the edit distance table of a and b, keeping only two rows in memory."""
+    row = np.arange(len(b) + 1, dtype=np.int32)
+    spare = np.empty_like(row)
+    for line in a.tolist():
+        row, spare = next_row(row, line, b, spare), row
+    return row
+
+
+def matching_blocks(a: np.ndarray, b: np.ndarray) -> Iterator[Block]:
+    """Finds a longest common subsequence of a and b with Hirschberg's algorithm.
+
+    The lines of a are split in half, and the last rows of the edit distance tables of
+    the top half against b, and of the (reversed) bottom half against the reversed b,
+    show where an optimal path crosses from one half to the other. The two smaller
+    problems on either side of that point are then solved in turn. Only O(N + M) memory
+    is used, for about twice the time of filling the full O(NM) table, and an explicit
+    stack replaces recursion, so the blocks are produced lazily, in order.
+
+    Parameters
+    ----------
+    a : np.ndarray
+        Lines of the first sequence, as integer IDs (see diff.intern_lines).
+    b : np.ndarray
+        Lines of the second sequence, as integer IDs.
+
+    Yields
+    ------
+    Block
+        Matching blocks (i, j, length) with increasing i and j.
+
+    Examples
+    --------
+    >>> list(matching_blocks(np.array([0, 1, 2, 0, 1, 1, 0]), np.array([2, 1, 0, 1, 0, 2])))
+    [(2, 0, 1), (4, 1, 1), (5, 3, 2)]
+    >>> list(matching_blocks(np.array([], dtype=np.int32), np.array([0, 1])))
+    []
+    """
+    # The last block found, which is only emitted once the next one cannot extend it
+    pending: Block | None = None
+    # Regions (left, top, right, bottom) still to be solved, the next one last
+    stack: list[tuple[int, int, int, int]] = [(0, 0, len(a), len(b))]
+    while stack:
+        left, top, right, bottom = stack.pop()
+        if left == right or top == bottom:
+            continue
+
+        if right - left == 1:
+            matches = np.flatnonzero(b[top:bottom] == a[left])
+            if not len(matches):
+                continue
+            i, j = left, top + int(matches[0])
+            if pending is not None and pending[0] + pending[2] == i and pending[1] + pending[2] == j:
+                pending = (pending[0], pending[1], pending[2] + 1)
+            else:
+                if pending is not None:
+                    yield pending
+                pending = (i, j, 1)
+            continue
+
+        middle = (left + right) // 2
+        forward = _last_row(a[left:middle], b[top:bottom])
+        backward = _last_row(a[middle:right][::-1], b[top:bottom][::-1])
+        # Cost of an optimal path crossing the middle row at each column
+        split = top + int(np.argmin(forward + backward[::-1]))
+        stack.append((middle, split, right, bottom))
+        stack.append((left, top, middle, split))
+
+    if pending is not None:
+        yield pending
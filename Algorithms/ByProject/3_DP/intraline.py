@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import bisect
+import itertools
+import re
+from typing import Sequence
+
+from myers import matching_blocks
+
+# Units compared inside changed lines: words (and punctuation), or single characters
+GRANULARITIES = ("word", "char")
+# Hunks with more characters than this (both sides together) are not refined
+MAX_CHARS = 4000
+
+# A span (start, end) covers line[start:end]
+Span = tuple[int, int]
+
+# Words, runs of whitespace within a line, line breaks, and single other characters
+_WORD_TOKEN = re.compile(r"\w+|[^\S\n]+|\n|[^\w\s]")
+
+
+def tokenize(text: str, granularity: str = "word") -> list[str]:
+    """Splits a string into the tokens compared by refine_hunk.
+
+    Examples
+    --------
+    >>> tokenize("x = f(a_1,  b)\\n")
+    ['x', ' ', '=', ' ', 'f', '(', 'a_1', ',', '  ', 'b', ')', '\\n']
+    >>> tokenize("ab c", "char")
+    ['a', 'b', ' ', 'c']
+    """
+    if granularity == "char":
+        return list(text)
+    return _WORD_TOKEN.findall(text)
+
+
+def _changed_spans(tokens: list[str], matched: list[tuple[int, int]]) -> list[Span]:
+    """Converts the matched token ranges of a text into the character spans of its unmatched tokens.
+
+    Spans separated only by whitespace are merged, so that a run of changed words is
+    highlighted as a whole.
+    """
+    offsets = list(itertools.accumulate(map(len, tokens), initial=0))
+    spans: list[Span] = []
+    position = 0
+    for start, end in itertools.chain(matched, [(len(tokens), len(tokens))]):
+        if start > position:
+            span_start, span_end = offsets[position], offsets[start]
+            if spans and _all_space(tokens, spans[-1], offsets, position):
+                span_start = spans.pop()[0]
+            spans.append((span_start, span_end))
+        position = end
+    return spans
+
+
+def _all_space(tokens: list[str], span: Span, offsets: list[int], position: int) -> bool:
+    """Checks whether the tokens between the end of span and token `position` are all whitespace."""
+    first = bisect.bisect_left(offsets, span[1])
+    return all(token.isspace() and token != "\n" for token in tokens[first:position])
+
+
+def _split_lines(spans: list[Span], lines: Sequence[str]) -> list[list[Span]]:
+    """Splits spans of the lines joined by newlines into spans of each line."""
+    line_starts = list(itertools.accumulate((len(line) + 1 for line in lines), initial=0))
+    line_spans: list[list[Span]] = [[] for _ in lines]
+    for start, end in spans:
+        index = bisect.bisect_right(line_starts, start) - 1
+        while index < len(lines) and line_starts[index] < end:
+            line_start = line_starts[index]
+            span_start = max(start, line_start) - line_start
+            span_end = min(end, line_start + len(lines[index])) - line_start
+            if span_end > span_start:
+                line_spans[index].append((span_start, span_end))
+            index += 1
+    return line_spans
+
+
+def refine_hunk(
+    original_lines: Sequence[str],
+    new_lines: Sequence[str],
+    granularity: str = "word",
+    max_chars: int = MAX_CHARS,
+) -> tuple[list[list[Span]], list[list[Span]]] | None:
+    """Finds which parts of the lines of a Change actually changed.
+
+    The lines of each side are joined and split into tokens (see tokenize), which are
+    matched with Myers' algorithm. Tokens left unmatched make up the changed spans.
+    Since the lines of both sides are compared as a whole, the hunk does not need to
+    have the same number of lines on each side.
+
+    Parameters
+    ----------
+    original_lines : Sequence[str]
+        The lines removed by the change.
+    new_lines : Sequence[str]
+        The lines added by the change.
+    granularity : str, optional
+        One of GRANULARITIES, by default "word".
+    max_chars : int, optional
+        Hunks with more characters than this are not refined, by default MAX_CHARS.
+        Myers' algorithm takes O((N + M)D) time, so refining a large, heavily
+        rewritten hunk could take longer than diffing the whole file.
+
+    Returns
+    -------
+    tuple[list[list[Span]], list[list[Span]]] | None
+        For every original line, then for every new line, the spans (start, end) of
+        its changed characters. None if the hunk is too large to be refined.
+
+    Examples
+    --------
+    >>> refine_hunk(["x = f(a, b)"], ["x = g(a, b, c)"])
+    ([[(4, 5)]], [[(4, 5), (10, 13)]])
+    >>> refine_hunk(["return old value"], ["return new value"], "char")
+    ([[(7, 10)]], [[(7, 10)]])
+    >>> refine_hunk(["a" * 10], ["b" * 10], max_chars=15) is None
+    True
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity {granularity!r}, expected one of {GRANULARITIES}.")
+    if sum(map(len, original_lines)) + sum(map(len, new_lines)) > max_chars:
+        return None
+
+    tokens1 = tokenize("\n".join(original_lines), granularity)
+    tokens2 = tokenize("\n".join(new_lines), granularity)
+    blocks = list(matching_blocks(tokens1, tokens2))
+    spans1 = _changed_spans(tokens1, [(i, i + length) for i, _, length in blocks])
+    spans2 = _changed_spans(tokens2, [(j, j + length) for _, j, length in blocks])
+    return _split_lines(spans1, original_lines), _split_lines(spans2, new_lines)
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Sequence
+
+from diff import ALGORITHMS, diff
+from utils import read_file_contents
+
+# Possible outcomes of merging one region of the base: left alone by both sides,
+# changed by one side only, changed identically by both, or changed differently
+STATUSES = ("unchanged", "ours", "theirs", "both", "conflict")
+
+
+@dataclass
+class MergeRegion:
+    """A range of lines of the base, and what each side turned it into."""
+
+    status: str
+    # 0-based, half-open range of the region in the base
+    base_start: int
+    base_end: int
+    base_lines: Sequence[str]
+    our_lines: Sequence[str]
+    their_lines: Sequence[str]
+
+    @property
+    def merged_lines(self) -> Sequence[str]:
+        """The lines of the merge, unless the region is a conflict."""
+        if self.status == "conflict":
+            raise ValueError("A conflict has no merged lines.")
+        return self.their_lines if self.status == "theirs" else self.our_lines
+
+
+@dataclass
+class MergeResult:
+    """The result of merging two strings derived from a common base."""
+
+    text: str
+    conflicts: list[MergeRegion] = field(default_factory=list)
+
+
+def _take_edits(
+    ranges: list[tuple[int, int, int, int]], index: int, end: int
+) -> tuple[int, int]:
+    """Finds the edits starting at or before base line `end`, from `index` on.
+
+    Returns
+    -------
+    index : int
+        The index of the first edit not taken.
+    end : int
+        The end of the taken edits in the base, or of the given end if it is larger.
+    """
+    while index < len(ranges) and ranges[index][0] <= end:
+        end = max(end, ranges[index][1])
+        index += 1
+    return index, end
+
+
+def iter_merge_regions(
+    base_lines: Sequence[str],
+    our_lines: Sequence[str],
+    their_lines: Sequence[str],
+    our_ranges: Iterable[tuple[int, int, int, int]],
+    their_ranges: Iterable[tuple[int, int, int, int]],
+) -> Iterator[MergeRegion]:
+    """Splits the base into regions, according to how each side edited them.
+
+    The edits of both sides are walked together in base order. Edits of the two sides
+    which overlap or touch (e.g. both insert lines at the same place, or one inserts
+    lines right after a line the other changed) are grouped with every edit they
+    overlap into a single region, which is a conflict unless both sides turned it into
+    the same lines. This takes time linear in the number of lines and edits.
+
+    Parameters
+    ----------
+    base_lines : Sequence[str]
+        Lines of the common base.
+    our_lines : Sequence[str]
+        Lines of our version.
+    their_lines : Sequence[str]
+        Lines of their version.
+    our_ranges : Iterable[tuple[int, int, int, int]]
+        Line ranges (see utils.edit_ranges) of the edits from base to our version, in order.
+    their_ranges : Iterable[tuple[int, int, int, int]]
+        Line ranges of the edits from base to their version, in order.
+
+    Yields
+    ------
+    MergeRegion
+        Consecutive regions covering the whole base.
+
+    Examples
+    --------
+    >>> base, ours, theirs = list("abcde"), list("aXcde"), list("abcdY")
+    >>> regions = iter_merge_regions(base, ours, theirs, [(1, 2, 1, 2)], [(4, 5, 4, 5)])
+    >>> [(region.status, region.base_start, region.base_end) for region in regions]
+    [('unchanged', 0, 1), ('ours', 1, 2), ('unchanged', 2, 4), ('theirs', 4, 5)]
+    """
+    our_ranges, their_ranges = list(our_ranges), list(their_ranges)
+    our_index = their_index = 0
+    # Difference between the line numbers of each side and of the base, past the last edit
+    our_shift = their_shift = 0
+    position = 0
+
+    while our_index < len(our_ranges) or their_index < len(their_ranges):
+        starts = []
+        if our_index < len(our_ranges):
+            starts.append(our_ranges[our_index][0])
+        if their_index < len(their_ranges):
+            starts.append(their_ranges[their_index][0])
+        start = min(starts)
+        if start > position:
+            yield MergeRegion(
+                "unchanged",
+                position,
+                start,
+                base_lines[position:start],
+                our_lines[position + our_shift : start + our_shift],
+                their_lines[position + their_shift : start + their_shift],
+            )
+
+        # Grow the region until no edit of either side starts inside it or right after it
+        end = start
+        first_ours, first_theirs = our_index, their_index
+        while True:
+            our_index, end = _take_edits(our_ranges, our_index, end)
+            their_index, new_end = _take_edits(their_ranges, their_index, end)
+            if new_end == end:
+                break
+            end = new_end
+
+        our_start, our_end = start + our_shift, end + our_shift
+        if our_index > first_ours:
+            our_start = our_ranges[first_ours][2] - (our_ranges[first_ours][0] - start)
+            our_shift = our_ranges[our_index - 1][3] - our_ranges[our_index - 1][1]
+            our_end = end + our_shift
+        their_start, their_end = start + their_shift, end + their_shift
+        if their_index > first_theirs:
+            their_start = their_ranges[first_theirs][2] - (their_ranges[first_theirs][0] - start)
+            their_shift = their_ranges[their_index - 1][3] - their_ranges[their_index - 1][1]
+            their_end = end + their_shift
+
+        ours, theirs = our_lines[our_start:our_end], their_lines[their_start:their_end]
+        if their_index == first_theirs:
+            status = "ours"
+        elif our_index == first_ours:
+            status = "theirs"
+        elif ours == theirs:
+            status = "both"
+        else:
+            status = "conflict"
+        yield MergeRegion(status, start, end, base_lines[start:end], ours, theirs)
+        position = end
+
+    if position < len(base_lines):
+        yield MergeRegion(
+            "unchanged",
+            position,
+            len(base_lines),
+            base_lines[position:],
+            our_lines[position + our_shift :],
+            their_lines[position + their_shift :],
+        )
+
+
+def iter_merged_lines(
+    regions: Iterable[MergeRegion],
+    our_label: str = "ours",
+    their_label: str = "theirs",
+    base_label: str | None = None,
+) -> Iterator[str]:
+    """Renders merge regions into the lines of the merge, with markers around conflicts.
+
+    Parameters
+    ----------
+    regions : Iterable[MergeRegion]
+        The regions of the merge (see iter_merge_regions).
+    our_label : str, optional
+        The label of our side of a conflict, by default "ours".
+    their_label : str, optional
+        The label of their side of a conflict, by default "theirs".
+    base_label : str | None, optional
+        If given, the base lines of a conflict are shown too, with this label (as
+        with diff3 -m, or git's merge.conflictStyle=diff3), by default None.
+
+    Yields
+    ------
+    str
+        The merged lines.
+    """
+    for region in regions:
+        if region.status != "conflict":
+            yield from region.merged_lines
+            continue
+        yield f"<<<<<<< {our_label}"
+        yield from region.our_lines
+        if base_label is not None:
+            yield f"||||||| {base_label}"
+            yield from region.base_lines
+        yield "======="
+        yield from region.their_lines
+        yield f">>>>>>> {their_label}"
+
+
+def merge3(
+    base: str,
+    ours: str,
+    theirs: str,
+    algorithm: str = "myers",
+    our_label: str = "ours",
+    their_label: str = "theirs",
+    base_label: str | None = None,
+) -> MergeResult:
+    """Merges two strings derived from a common base.
+
+    Both sides are diffed against the base, and their edits are combined (see
+    iter_merge_regions). Since Myers' algorithm is close to linear for similar inputs,
+    merging mostly-unchanged files takes close to linear time.
+
+    Parameters
+    ----------
+    base : str
+        The common base.
+    ours : str
+        Our version of the base.
+    theirs : str
+        Their version of the base.
+    algorithm : str, optional
+        Algorithm used to diff each side against the base (see diff.diff), by default "myers".
+    our_label, their_label, base_label : str, optional
+        Labels of the conflict markers (see iter_merged_lines).
+
+    Returns
+    -------
+    MergeResult
+        The merged string, with conflict markers, and the list of conflicts.
+
+    Examples
+    --------
+    >>> result = merge3("a\\nb\\nc\\nd\\n", "a\\nB\\nc\\nd\\n", "a\\nb\\nc\\nD\\n")
+    >>> print(result.text, end="")
+    a
+    B
+    c
+    D
+    >>> result = merge3("a\\nb\\nc\\n", "a\\nX\\nc\\n", "a\\nY\\nc\\n")
+    >>> result.text.splitlines()
+    ['a', '<<<<<<< ours', 'X', '=======', 'Y', '>>>>>>> theirs', 'c']
+    >>> len(result.conflicts)
+    1
+    >>> merge3("a\\n", "a\\n", "a").text
+    'a'
+    >>> merge3("a", "a\\nb", "a").text
+    'a\\nb'
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm {algorithm!r}, expected one of {ALGORITHMS}.")
+    base_lines, our_lines, their_lines = base.splitlines(), ours.splitlines(), theirs.splitlines()
+    our_ranges = diff(base, ours, algorithm).iter_ranges()
+    their_ranges = diff(base, theirs, algorithm).iter_ranges()
+
+    conflicts = []
+
+    def record_conflicts(regions: Iterable[MergeRegion]) -> Iterator[MergeRegion]:
+        for region in regions:
+            if region.status == "conflict":
+                conflicts.append(region)
+            yield region
+
+    regions = iter_merge_regions(base_lines, our_lines, their_lines, our_ranges, their_ranges)
+    merged_lines = list(iter_merged_lines(record_conflicts(regions), our_label, their_label, base_label))
+    text = "\n".join(merged_lines)
+    # The final newline is merged like a region: a side which added or removed it
+    # wins (both sides can only differ from the base in the same way)
+    base_newline, our_newline, their_newline = (
+        string.endswith("\n") for string in (base, ours, theirs)
+    )
+    final_newline = their_newline if our_newline == base_newline else our_newline
+    if conflicts and conflicts[-1].base_end == len(base_lines) and merged_lines[-1].startswith(">>>>>>> "):
+        # A conflict marker always ends with a newline
+        final_newline = True
+    if merged_lines and final_newline:
+        text += "\n"
+    return MergeResult(text, conflicts)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        parser = argparse.ArgumentParser(
+            description="Merge the changes from a common base to two files (like git merge-file).",
+        )
+        parser.add_argument("ours", help="Our version of the file.")
+        parser.add_argument("base", help="The common base of both versions.")
+        parser.add_argument("theirs", help="Their version of the file.")
+        parser.add_argument(
+            "-a",
+            "--algorithm",
+            choices=ALGORITHMS,
+            default="myers",
+            help="Algorithm used to match lines (default: myers).",
+        )
+        parser.add_argument(
+            "-o", "--output", default=None, help="Write the merge to this file instead of stdout."
+        )
+        parser.add_argument(
+            "--diff3", action="store_true", help="Show the base lines of conflicts too."
+        )
+        args = parser.parse_args()
+        result = merge3(
+            read_file_contents(args.base),
+            read_file_contents(args.ours),
+            read_file_contents(args.theirs),
+            algorithm=args.algorithm,
+            our_label=args.ours,
+            their_label=args.theirs,
+            base_label=args.base if args.diff3 else None,
+        )
+        if args.output is not None:
+            with open(args.output, "w") as f:
+                f.write(result.text)
+        else:
+            sys.stdout.write(result.text)
+        # As with git merge-file, the exit status is the number of conflicts
+        sys.exit(min(len(result.conflicts), 127))
+    else:
+        import doctest
+
+        doctest.testmod()
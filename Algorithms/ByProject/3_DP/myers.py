@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from typing import Iterator, Sequence
+
+# A matching block (i, j, length) means a[i:i + length] == b[j:j + length]
+Block = tuple[int, int, int]
+
+
+def _middle_snake(
+    a: Sequence, b: Sequence, left: int, top: int, right: int, bottom: int
+) -> tuple[int, int, int, int]:
+    """Finds the middle snake of an optimal path through the edit graph of a[left:right] and b[top:bottom].
+
+    Runs Myers' greedy search forwards from (left, top) and backwards from (right, bottom)
+    at the same time, until the two searches overlap. Only two vectors of O(N + M) furthest
+    reaching points are kept, instead of the O(ND) history of the plain algorithm.
+
+    Returns
+    -------
+    tuple[int, int, int, int]
+        The snake's diagonal run of matches, from (x_start, y_start) to (x_end, y_end).
+        An optimal path passes through both points.
+    """
+    width = right - left
+    height = bottom - top
+    delta = width - height
+    odd = delta % 2 == 1
+    max_d = (width + height + 1) // 2
+
+    # Furthest reaching x (forwards) and y (backwards) on each diagonal. Negative
+    # diagonals wrap around to the end of the lists, which are just large enough.
+    forward = [0] * (2 * max_d + 1)
+    backward = [0] * (2 * max_d + 1)
+    forward[1] = left
+    backward[1] = bottom
+
+    for d in range(max_d + 1):
+        # Forward search along diagonals k = x - y (relative to (left, top))
+        for k in range(d, -d - 1, -2):
+            if k == -d or (k != d and forward[k - 1] < forward[k + 1]):
+                x = forward[k + 1]
+            else:
+                x = forward[k - 1] + 1
+            y = top + (x - left) - k
+            x_start, y_start = x, y
+            while x < right and y < bottom and a[x] == b[y]:
+                x += 1
+                y += 1
+            forward[k] = x
+            c = k - delta
+            if odd and -(d - 1) <= c <= d - 1 and y >= backward[c]:
+                return x_start, y_start, x, y
+
+        # Backward search along diagonals c = k - delta
+        for c in range(d, -d - 1, -2):
+            if c == -d or (c != d and backward[c - 1] > backward[c + 1]):
+                y = backward[c + 1]
+            else:
+                y = backward[c - 1] - 1
+            k = c + delta
+            x = left + (y - top) + k
+            x_end, y_end = x, y
+            while x > left and y > top and a[x - 1] == b[y - 1]:
+                x -= 1
+                y -= 1
+            backward[c] = y
+            if not odd and -d <= k <= d and x <= forward[k]:
+                return x, y, x_end, y_end
+
+    raise AssertionError("Forward and backward searches did not meet.")
+
+
+def matching_blocks(a: Sequence, b: Sequence) -> Iterator[Block]:
+    """Finds a longest common subsequence of a and b with Myers' O((N+M)D) algorithm.
+
+    Uses the linear-space refinement from Myers' paper: the middle snake of an optimal
+    path splits the problem into two smaller ones, which are solved in turn. Memory is
+    O(N + M), and near-identical inputs (small D) are handled in close to linear time.
+    An explicit stack replaces recursion, so the blocks are produced lazily, in order.
+
+    Parameters
+    ----------
+    a : Sequence
+        First sequence (e.g. lines of the original file).
+    b : Sequence
+        Second sequence (e.g. lines of the new file).
+
+    Yields
+    ------
+    Block
+        Matching blocks (i, j, length) with increasing i and j. Adjacent blocks may touch.
+
+    Examples
+    --------
+    >>> list(matching_blocks("abcabba", "cbabac"))
+    [(2, 0, 1), (4, 1, 1), (5, 3, 2)]
+    >>> list(matching_blocks("", "abc"))
+    []
+    """
+    # Each stack entry is either a region (left, top, right, bottom) still to be solved,
+    # or an already known block to emit (marked by a None in the last position).
+    stack: list[tuple] = [(0, 0, len(a), len(b))]
+    while stack:
+        entry = stack.pop()
+        if entry[3] is None:
+            yield entry[:3]
+            continue
+        left, top, right, bottom = entry
+
+        # Strip the common prefix and suffix: some optimal path always follows them
+        start_x, start_y = left, top
+        while left < right and top < bottom and a[left] == b[top]:
+            left += 1
+            top += 1
+        if left > start_x:
+            yield start_x, start_y, left - start_x
+        end_x = right
+        while left < right and top < bottom and a[right - 1] == b[bottom - 1]:
+            right -= 1
+            bottom -= 1
+        if right < end_x:
+            stack.append((right, bottom, end_x - right, None))
+
+        if left == right or top == bottom:
+            # Only insertions or only deletions remain
+            continue
+
+        x_start, y_start, x_end, y_end = _middle_snake(a, b, left, top, right, bottom)
+        stack.append((x_end, y_end, right, bottom))
+        if x_end > x_start:
+            stack.append((x_start, y_start, x_end - x_start, None))
+        stack.append((left, top, x_start, y_start))
@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+import re
+import shutil
+import sys
+import tempfile
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Sequence
+
+from utils import Edit, EditScript, edit_ranges
+
+# Header of an edit in the normal format, e.g. "3,5c7" or "2a3,4"
+_NORMAL_HEADER = re.compile(r"^(\d+)(?:,(\d+))?([acd])(\d+)(?:,(\d+))?$")
+# Header of a hunk in the unified format, e.g. "@@ -3,5 +3,6 @@"
+_UNIFIED_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchError(Exception):
+    """Raised when a diff cannot be parsed, or does not apply to the given lines."""
+
+
+@dataclass
+class Hunk:
+    """A replacement of consecutive lines: lines[start1:end1] becomes new_lines.
+
+    The line ranges are 0-based and half-open, as in utils.edit_ranges. If
+    original_lines is given, the replaced lines are checked against it.
+    no_newline_at_end is set when the diff marks the last of new_lines with
+    "\\ No newline at end of file".
+    """
+
+    start1: int
+    end1: int
+    new_lines: Sequence[str]
+    original_lines: Sequence[str] | None = None
+    no_newline_at_end: bool = False
+
+
+def apply_hunks(lines: Iterable[str], hunks: Iterable[Hunk]) -> Iterator[str]:
+    """Applies hunks to a stream of lines, in a single forward pass.
+
+    Unchanged lines are passed through as they are read, so neither the input nor
+    the output is ever held in memory as a whole.
+
+    Parameters
+    ----------
+    lines : Iterable[str]
+        The lines to patch.
+    hunks : Iterable[Hunk]
+        The hunks to apply, in order. They must not overlap.
+
+    Yields
+    ------
+    str
+        The patched lines.
+
+    Raises
+    ------
+    PatchError
+        If the hunks are out of order, reach beyond the end of the lines, or replace
+        lines which differ from their original_lines.
+
+    Examples
+    --------
+    >>> list(apply_hunks(["a", "b", "c"], [Hunk(1, 2, ["x", "y"]), Hunk(3, 3, ["d"])]))
+    ['a', 'x', 'y', 'c', 'd']
+    """
+    lines = iter(lines)
+    position = 0
+    for hunk in hunks:
+        if hunk.start1 < position or hunk.end1 < hunk.start1:
+            raise PatchError(f"Hunk at line {hunk.start1 + 1} overlaps the previous one.")
+        for _ in range(hunk.start1 - position):
+            try:
+                yield next(lines)
+            except StopIteration:
+                raise PatchError(f"Hunk at line {hunk.start1 + 1} is past the end of the file.") from None
+
+        replaced = list(itertools.islice(lines, hunk.end1 - hunk.start1))
+        if len(replaced) < hunk.end1 - hunk.start1:
+            raise PatchError(f"Hunk at line {hunk.start1 + 1} is past the end of the file.")
+        if hunk.original_lines is not None and replaced != list(hunk.original_lines):
+            raise PatchError(f"Hunk at line {hunk.start1 + 1} does not match the file.")
+        yield from hunk.new_lines
+        position = hunk.end1
+    yield from lines
+
+
+def apply_edits(lines1: Iterable[str], lines2: Sequence[str], edits: Iterable[Edit]) -> Iterator[str]:
+    """Transforms lines1 into lines2 according to a list of edits, in a single forward pass.
+
+    Parameters
+    ----------
+    lines1 : Iterable[str]
+        The lines of the original string.
+    lines2 : Sequence[str]
+        The lines of the new string, from which added and changed lines are copied.
+    edits : Iterable[Edit]
+        The edits to apply, in order (e.g. an EditScript).
+
+    Yields
+    ------
+    str
+        The transformed lines.
+
+    Raises
+    ------
+    PatchError
+        If the edits are out of order or do not fit in lines1.
+
+    Examples
+    --------
+    >>> from utils import Addition, Change
+    >>> list(apply_edits(["a", "b", "c"], ["a", "x", "c", "d"], [Change(2, 2), Addition(3, 4)]))
+    ['a', 'x', 'c', 'd']
+    """
+    if isinstance(edits, EditScript):
+        ranges = edits.iter_ranges()
+    else:
+        ranges = map(edit_ranges, edits)
+    hunks = (Hunk(start1, end1, lines2[start2:end2]) for start1, end1, start2, end2 in ranges)
+    return apply_hunks(lines1, hunks)
+
+
+def _parse_range(start: str, end: str | None) -> tuple[int, int]:
+    """Converts a 1-based inclusive range "start[,end]" of a normal diff to a 0-based half-open one."""
+    return int(start) - 1, int(end if end is not None else start)
+
+
+def parse_normal(diff_lines: Iterable[str]) -> Iterator[Hunk]:
+    """Parses a diff in the normal output format, one hunk at a time.
+
+    Parameters
+    ----------
+    diff_lines : Iterable[str]
+        The lines of the diff, without line endings.
+
+    Yields
+    ------
+    Hunk
+        The hunks of the diff, including the lines they remove.
+
+    Examples
+    --------
+    >>> for hunk in parse_normal(["2c2", "< b", "---", "> x", "3a4", "> d"]):
+    ...     print(hunk.start1, hunk.end1, hunk.original_lines, hunk.new_lines)
+    1 2 ['b'] ['x']
+    3 3 [] ['d']
+    """
+    hunk: Hunk | None = None
+    previous = ""
+    for line in diff_lines:
+        if line.startswith("< ") or line == "<":
+            if hunk is None:
+                raise PatchError(f"Unexpected line: {line!r}")
+            hunk.original_lines.append(line[2:])
+        elif line.startswith("> ") or line == ">":
+            if hunk is None:
+                raise PatchError(f"Unexpected line: {line!r}")
+            hunk.new_lines.append(line[2:])
+        elif line.startswith("\\"):
+            # "\ No newline at end of file", after the line it applies to
+            if hunk is not None and previous.startswith(">"):
+                hunk.no_newline_at_end = True
+        elif line == "---":
+            # Separator of a change
+            pass
+        else:
+            match = _NORMAL_HEADER.match(line)
+            if match is None:
+                raise PatchError(f"Invalid line: {line!r}")
+            if hunk is not None:
+                yield hunk
+            start1, end1, letter, _, _ = match.groups()
+            if letter == "a":
+                # An addition's original line number is the line before it
+                start1 = end1 = int(start1)
+            else:
+                start1, end1 = _parse_range(start1, end1)
+            hunk = Hunk(start1, end1, [], [])
+        previous = line
+    if hunk is not None:
+        yield hunk
+
+
+def parse_unified(diff_lines: Iterable[str]) -> Iterator[Hunk]:
+    """Parses a diff in the unified output format, one hunk at a time.
+
+    Parameters
+    ----------
+    diff_lines : Iterable[str]
+        The lines of the diff, without line endings. The "---" and "+++" file
+        headers are optional.
+
+    Yields
+    ------
+    Hunk
+        The hunks of the diff. Their original and new lines include the context lines.
+
+    Examples
+    --------
+    >>> list(parse_unified(["--- a", "+++ b", "@@ -1,2 +1,2 @@", " a", "-b", "+x"]))
+    [Hunk(start1=0, end1=2, new_lines=['a', 'x'], original_lines=['a', 'b'], no_newline_at_end=False)]
+    """
+    diff_lines = iter(diff_lines)
+    hunk: Hunk | None = None
+    previous = ""
+    for line in diff_lines:
+        if line.startswith("\\"):
+            # "\ No newline at end of file", after the last line of the previous hunk
+            if hunk is not None and previous[:1] in ("", " ", "+"):
+                hunk.no_newline_at_end = True
+            continue
+        if hunk is not None:
+            yield hunk
+            hunk = None
+        if line.startswith("--- ") or line.startswith("+++ ") or not line:
+            continue
+        match = _UNIFIED_HEADER.match(line)
+        if match is None:
+            raise PatchError(f"Invalid line: {line!r}")
+        start, length, _, new_length = match.groups()
+        length = int(length) if length is not None else 1
+        new_length = int(new_length) if new_length is not None else 1
+        # An empty range's start is the line before it
+        start1 = int(start) - 1 if length > 0 else int(start)
+        hunk = Hunk(start1, start1 + length, [], [])
+        previous = line
+
+        # The header tells how many lines of each file the hunk holds
+        while len(hunk.original_lines) < length or len(hunk.new_lines) < new_length:
+            try:
+                line = next(diff_lines)
+            except StopIteration:
+                raise PatchError("Truncated hunk.") from None
+            kind, text = line[:1], line[1:]
+            if kind == " " or line == "":
+                hunk.original_lines.append(text)
+                hunk.new_lines.append(text)
+            elif kind == "-":
+                hunk.original_lines.append(text)
+            elif kind == "+":
+                hunk.new_lines.append(text)
+            elif kind == "\\":
+                if previous[:1] in ("", " ", "+"):
+                    hunk.no_newline_at_end = True
+                continue
+            else:
+                raise PatchError(f"Invalid line in hunk: {line!r}")
+            previous = line
+    if hunk is not None:
+        yield hunk
+
+
+def parse_diff(diff_lines: Iterable[str]) -> Iterator[Hunk]:
+    """Parses a diff in the normal or unified output format, which is detected from its first line.
+
+    Examples
+    --------
+    >>> [hunk.start1 for hunk in parse_diff(["@@ -2 +2 @@", "-b", "+x"])]
+    [1]
+    >>> [hunk.start1 for hunk in parse_diff(["2c2", "< b", "---", "> x"])]
+    [1]
+    """
+    diff_lines = iter(diff_lines)
+    first_line = next(diff_lines, None)
+    if first_line is None:
+        return iter(())
+    diff_lines = itertools.chain([first_line], diff_lines)
+    if first_line.startswith("--- ") or first_line.startswith("@@ "):
+        return parse_unified(diff_lines)
+    return parse_normal(diff_lines)
+
+
+def _ends_with_newline(filename: str) -> bool:
+    """Checks whether a file ends with a newline (an empty file does not)."""
+    with open(filename, "rb") as f:
+        if f.seek(0, os.SEEK_END) == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def patch_file(filename: str, diff_filename: str, output_filename: str | None = None):
+    """Applies a diff (normal or unified format) to a file, reading both line by line.
+
+    The patched file keeps the permissions of the original. It ends with a newline
+    if its last line does in the original file, or, for a line written by the diff,
+    unless the diff marks it with "\\ No newline at end of file".
+
+    Parameters
+    ----------
+    filename : str
+        The file to patch.
+    diff_filename : str
+        The file holding the diff.
+    output_filename : str | None, optional
+        Where to write the patched file, by default over the original file. The
+        original is only replaced once the whole diff has been applied.
+
+    Raises
+    ------
+    PatchError
+        If the diff is invalid or does not apply; the file is then left untouched.
+    """
+    from streaming import iter_file_lines
+
+    output_filename = output_filename or filename
+    directory = os.path.dirname(os.path.abspath(output_filename))
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    num_lines = 0
+    last_hunk: Hunk | None = None
+
+    def count_lines(lines: Iterable[str]) -> Iterator[str]:
+        nonlocal num_lines
+        for line in lines:
+            num_lines += 1
+            yield line
+
+    def record_last_hunk(hunks: Iterable[Hunk]) -> Iterator[Hunk]:
+        nonlocal last_hunk
+        for hunk in hunks:
+            last_hunk = hunk
+            yield hunk
+
+    try:
+        with os.fdopen(file_descriptor, "w") as out:
+            hunks = record_last_hunk(parse_diff(iter_file_lines(diff_filename)))
+            is_empty = True
+            for line in apply_hunks(count_lines(iter_file_lines(filename)), hunks):
+                if not is_empty:
+                    out.write("\n")
+                out.write(line)
+                is_empty = False
+
+            if last_hunk is not None and last_hunk.end1 >= num_lines:
+                # The last line was written by the diff, or preceded the lines it deleted
+                final_newline = not (last_hunk.new_lines and last_hunk.no_newline_at_end)
+            else:
+                final_newline = _ends_with_newline(filename)
+            if final_newline and not is_empty:
+                out.write("\n")
+        shutil.copymode(filename, temporary_path)
+        os.replace(temporary_path, output_filename)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        parser = argparse.ArgumentParser(description="Apply a diff to a file.")
+        parser.add_argument("file", help="The file to patch.")
+        parser.add_argument("diff", help="The diff to apply, in the normal or unified format.")
+        parser.add_argument(
+            "-o", "--output", default=None, help="Write the result here instead of over the file."
+        )
+        args = parser.parse_args()
+        try:
+            patch_file(args.file, args.diff, args.output)
+        except PatchError as error:
+            sys.exit(f"patch.py: {error}")
+    else:
+        import doctest
+
+        doctest.testmod()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import bisect
+from typing import Iterator, Sequence
+
+from myers import Block, matching_blocks as myers_matching_blocks
+
+
+def _unique_common_lines(
+    a: Sequence, b: Sequence, left: int, top: int, right: int, bottom: int
+) -> list[tuple[int, int]]:
+    """Finds the lines which occur exactly once in a[left:right] and exactly once in b[top:bottom].
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        The positions (i, j) of each such line in a and b, ordered by i.
+    """
+    # line -> [count in a, index in a, count in b, index in b]
+    occurrences: dict = {}
+    for i in range(left, right):
+        entry = occurrences.setdefault(a[i], [0, i, 0, -1])
+        entry[0] += 1
+    for j in range(top, bottom):
+        entry = occurrences.get(b[j])
+        if entry is not None:
+            entry[2] += 1
+            entry[3] = j
+    return sorted(
+        (i, j) for count_a, i, count_b, j in occurrences.values() if count_a == 1 and count_b == 1
+    )
+
+
+def _longest_increasing_anchors(pairs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Selects the longest subsequence of pairs whose j positions increase, by patience sorting.
+
+    Parameters
+    ----------
+    pairs : list[tuple[int, int]]
+        Positions (i, j), ordered by i.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        The anchors, increasing in both i and j.
+
+    Examples
+    --------
+    >>> _longest_increasing_anchors([(0, 3), (1, 0), (2, 1), (3, 4), (4, 2)])
+    [(1, 0), (2, 1), (4, 2)]
+    """
+    # pile_tops[p] is the smallest j ending an increasing run of length p + 1
+    pile_tops: list[int] = []
+    pile_pairs: list[int] = []
+    previous: list[int] = []
+    for index, (_, j) in enumerate(pairs):
+        pile = bisect.bisect_left(pile_tops, j)
+        if pile == len(pile_tops):
+            pile_tops.append(j)
+            pile_pairs.append(index)
+        else:
+            pile_tops[pile] = j
+            pile_pairs[pile] = index
+        previous.append(pile_pairs[pile - 1] if pile > 0 else -1)
+
+    anchors = []
+    index = pile_pairs[-1] if pile_pairs else -1
+    while index >= 0:
+        anchors.append(pairs[index])
+        index = previous[index]
+    return anchors[::-1]
+
+
+def matching_blocks(a: Sequence, b: Sequence) -> Iterator[Block]:
+    """Finds common lines of a and b with the patience diff algorithm.
+
+    Lines which occur exactly once on each side are used as anchors: the longest run of
+    such lines appearing in the same order in a and b is matched, and the gaps between
+    consecutive anchors are solved in the same way. Gaps without any unique common line
+    fall back to Myers' algorithm.
+
+    The result is not always a longest common subsequence, but it rarely aligns
+    unrelated lines that happen to be equal (blank lines, lone braces, ...), so the
+    diffs of source files tend to follow the structure of the code more closely.
+
+    Parameters
+    ----------
+    a : Sequence
+        First sequence (e.g. lines of the original file).
+    b : Sequence
+        Second sequence (e.g. lines of the new file).
+
+    Yields
+    ------
+    Block
+        Matching blocks (i, j, length) with increasing i and j. Adjacent blocks may touch.
+
+    Examples
+    --------
+    After stripping the common suffix "bc", every line occurs once on each side, and
+    "b", "c", "d" is the longest run of them appearing in the same order.
+
+    >>> list(matching_blocks("abcdxbc", "xbcdabc"))
+    [(1, 1, 1), (2, 2, 1), (3, 3, 1), (5, 5, 2)]
+    """
+    # Each stack entry is either a region (left, top, right, bottom) still to be solved,
+    # or an already known block to emit (marked by a None in the last position).
+    stack: list[tuple] = [(0, 0, len(a), len(b))]
+    while stack:
+        entry = stack.pop()
+        if entry[3] is None:
+            yield entry[:3]
+            continue
+        left, top, right, bottom = entry
+
+        # Strip the common prefix and suffix
+        start_x, start_y = left, top
+        while left < right and top < bottom and a[left] == b[top]:
+            left += 1
+            top += 1
+        if left > start_x:
+            yield start_x, start_y, left - start_x
+        end_x = right
+        while left < right and top < bottom and a[right - 1] == b[bottom - 1]:
+            right -= 1
+            bottom -= 1
+        if right < end_x:
+            stack.append((right, bottom, end_x - right, None))
+
+        if left == right or top == bottom:
+            continue
+
+        anchors = _longest_increasing_anchors(_unique_common_lines(a, b, left, top, right, bottom))
+        if not anchors:
+            for i, j, length in myers_matching_blocks(a[left:right], b[top:bottom]):
+                yield left + i, top + j, length
+            continue
+
+        # Push the gaps and anchors in reverse, so that they are popped in order
+        stack.append((anchors[-1][0] + 1, anchors[-1][1] + 1, right, bottom))
+        for (i, j), (next_i, next_j) in zip(anchors[-2::-1], anchors[::-1]):
+            stack.append((next_i, next_j, 1, None))
+            stack.append((i + 1, j + 1, next_i, next_j))
+        stack.append((anchors[0][0], anchors[0][1], 1, None))
+        stack.append((left, top, anchors[0][0], anchors[0][1]))
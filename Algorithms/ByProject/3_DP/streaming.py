@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import itertools
+from typing import Iterable, Iterator
+
+from diff import ALGORITHMS, _matching_blocks, _ranges_from_blocks, intern_lines
+from utils import Edit, edit_from_ranges
+
+# Default number of lines of each file held in memory at once
+WINDOW_LINES = 20000
+# Number of characters read from a file at a time by iter_file_lines
+_READ_SIZE = 1 << 16
+
+
+def iter_file_lines(filename: str) -> Iterator[str]:
+    """Reads a file one line at a time, without its line endings.
+
+    The file is read in chunks, which are split with str.splitlines, so lines end
+    wherever they do in the string read by utils.read_file_contents (including at
+    "\\x0c", "\\x85" or "\\u2028"), and line numbers match those of diff.diff.
+
+    Parameters
+    ----------
+    filename : str
+        The file to read.
+
+    Yields
+    ------
+    str
+        The lines of the file, as str.splitlines would split them.
+
+    Examples
+    --------
+    >>> import os, tempfile
+    >>> with tempfile.NamedTemporaryFile("w", delete=False) as f:
+    ...     _ = f.write("a\\x0cb\\nc\\u2028\\nd")
+    >>> list(iter_file_lines(f.name)) == open(f.name).read().splitlines()
+    True
+    >>> os.remove(f.name)
+    """
+    with open(filename, "r") as f:
+        partial = ""
+        while True:
+            chunk = f.read(_READ_SIZE)
+            if not chunk:
+                break
+            lines = (partial + chunk).splitlines(keepends=True)
+            # The last line may go on in the next chunk
+            partial = lines.pop()
+            for line in lines:
+                yield from line.splitlines()
+        if partial:
+            yield from partial.splitlines()
+
+
+def iter_hunks(
+    lines1: Iterable[str],
+    lines2: Iterable[str],
+    window: int = WINDOW_LINES,
+    algorithm: str = "myers",
+) -> Iterator[tuple[Edit, list[str], list[str]]]:
+    """Diffs two streams of lines while holding at most `window` lines of each in memory.
+
+    Both streams are read into a window of lines, which is diffed as a whole. Matching
+    lines in the first half of the window act as synchronization anchors: the edits up
+    to the last of them are final, and the lines before it are dropped from the window,
+    which is then refilled. Matches in the second half are not trusted yet, since lines
+    beyond the window could still be aligned with them.
+
+    The diff is exact when both inputs fit in the window. Otherwise, an edit spanning
+    more than half a window (e.g. a long stretch without any common line) is reported
+    as several consecutive edits, and a line may be matched with a nearby copy rather
+    than the one an unbounded diff would have picked.
+
+    Parameters
+    ----------
+    lines1 : Iterable[str]
+        Lines of the original file.
+    lines2 : Iterable[str]
+        Lines of the new file.
+    window : int, optional
+        Maximum number of lines of each file held in memory, by default WINDOW_LINES.
+    algorithm : str, optional
+        Algorithm used to diff each window (see diff.diff), by default "myers".
+
+    Yields
+    ------
+    edit : Edit
+        The next edit, with line numbers counted from the start of the streams.
+    original_lines : list[str]
+        The lines of the original file removed or changed by the edit.
+    new_lines : list[str]
+        The lines of the new file added or changed by the edit.
+
+    Examples
+    --------
+    >>> lines1 = ["a", "b", "c", "d", "e", "f"]
+    >>> lines2 = ["a", "x", "c", "d", "f", "g"]
+    >>> for hunk in iter_hunks(lines1, lines2, window=4):
+    ...     print(hunk)
+    (2c2, ['b'], ['x'])
+    (5d4, ['e'], [])
+    (6a6, [], ['g'])
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm {algorithm!r}, expected one of {ALGORITHMS}.")
+    if window < 2:
+        raise ValueError("window must be at least 2.")
+
+    lines1, lines2 = iter(lines1), iter(lines2)
+    buffer1: list[str] = []
+    buffer2: list[str] = []
+    # Line number (from 0) of the first line of each buffer
+    offset1, offset2 = 0, 0
+    exhausted1, exhausted2 = False, False
+
+    while True:
+        missing1, missing2 = window - len(buffer1), window - len(buffer2)
+        buffer1.extend(itertools.islice(lines1, missing1))
+        buffer2.extend(itertools.islice(lines2, missing2))
+        exhausted1 = exhausted1 or len(buffer1) < window
+        exhausted2 = exhausted2 or len(buffer2) < window
+
+        ids1, ids2 = intern_lines(buffer1, buffer2)
+        blocks = _matching_blocks(ids1, ids2, algorithm)
+
+        if exhausted1 and exhausted2:
+            cut1, cut2 = len(buffer1), len(buffer2)
+            committed = list(blocks)
+        else:
+            # Only matches before these limits are used as anchors. A stream that has
+            # ended has no lines left beyond its window, so all of it can be used.
+            limit1 = len(buffer1) if exhausted1 else len(buffer1) - window // 2
+            limit2 = len(buffer2) if exhausted2 else len(buffer2) - window // 2
+            committed = [(0, 0, 0)]
+            for i, j, length in blocks:
+                if length == 0:
+                    continue
+                # Blocks crossing a limit are cut short, and later ones are ignored
+                length = min(length, limit1 - i, limit2 - j)
+                if length <= 0:
+                    break
+                committed.append((i, j, length))
+            _, _, length = committed[-1]
+            if length > 0:
+                cut1, cut2 = committed[-1][0] + length, committed[-1][1] + length
+            else:
+                # No common line in the first half of the window: give up aligning it
+                cut1, cut2 = limit1, limit2
+                committed.append((cut1, cut2, 0))
+
+        for start1, end1, start2, end2 in _ranges_from_blocks(committed):
+            edit = edit_from_ranges(start1 + offset1, end1 + offset1, start2 + offset2, end2 + offset2)
+            yield edit, buffer1[start1:end1], buffer2[start2:end2]
+
+        if exhausted1 and exhausted2:
+            return
+        del buffer1[:cut1]
+        del buffer2[:cut2]
+        offset1 += cut1
+        offset2 += cut2
+
+
+def iter_diff_files(
+    filename1: str, filename2: str, window: int = WINDOW_LINES, algorithm: str = "myers"
+) -> Iterator[Edit]:
+    """Diffs two files of any size, yielding the edits as they are found.
+
+    The files are read line by line, and at most `window` lines of each are held in
+    memory at once (see iter_hunks), so multi-gigabyte files can be compared.
+
+    Parameters
+    ----------
+    filename1 : str
+        The original file.
+    filename2 : str
+        The new file.
+    window : int, optional
+        Maximum number of lines of each file held in memory, by default WINDOW_LINES.
+    algorithm : str, optional
+        Algorithm used to diff each window (see diff.diff), by default "myers".
+
+    Yields
+    ------
+    Edit
+        The edits required to transform the first file into the second, in order.
+    """
+    hunks = iter_hunks(iter_file_lines(filename1), iter_file_lines(filename2), window, algorithm)
+    for edit, _, _ in hunks:
+        yield edit
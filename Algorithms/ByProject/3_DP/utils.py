@@ -1,7 +1,16 @@
 from __future__ import annotations
+import io
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
+from typing import Iterable, Iterator, Sequence, TextIO
+
+import numpy as np
+
+from intraline import Span, refine_hunk
+
+# Written after the last line of a file which does not end with a newline, as by GNU diff
+NO_NEWLINE_MARKER = "\\ No newline at end of file"
 
 
 class Color(Enum):
@@ -33,11 +42,45 @@ def color_string(string: str, color: Color) -> str:
     return f"\x1b[0;{color.value}m{string}\x1b[0;0m"
 
 
+def color_spans(string: str, spans: Iterable[Span], color: Color) -> str:
+    """Color some spans of a string, leaving the rest of it as it is.
+
+    Parameters
+    ----------
+    string : str
+        The string to add color to.
+    spans : Iterable[Span]
+        The spans (start, end) of string to color, in order and without overlaps.
+    color : Color
+        The color to use.
+
+    Returns
+    -------
+    str
+        The string, with its spans colored.
+
+    Examples
+    --------
+    >>> color_spans("x = 1", [(4, 5)], Color.RED)
+    'x = \\x1b[0;31m1\\x1b[0;0m'
+    """
+    parts = []
+    position = 0
+    for start, end in spans:
+        parts.append(string[position:start])
+        parts.append(color_string(string[start:end], color))
+        position = end
+    parts.append(string[position:])
+    return "".join(parts)
+
+
 @dataclass
 class LineNumbers(ABC):
     """An abstract class representing a selection of consecutive lines to be edited.
     """
 
+    __slots__ = ()
+
     @property
     @abstractmethod
     def start_line(self) -> int:
@@ -62,6 +105,8 @@ class LineNumberSingle(LineNumbers):
     """A concrete class representing a single line number to be edited.
     """
 
+    __slots__ = ("line_numbers",)
+
     line_numbers: int
 
     @property
@@ -81,6 +126,8 @@ class LineNumberSingleBefore(LineNumberSingle):
     """A concrete class representing the line before an addition/deletion.
     """
 
+    __slots__ = ()
+
     @property
     def end_line(self) -> int:
         return self.line_numbers - 1
@@ -94,6 +141,8 @@ class LineNumberRange(LineNumbers):
     """A concrete class representing a range of line numbers to be edited.
     """
 
+    __slots__ = ("line_numbers",)
+
     line_numbers: tuple[int, int]
 
     @property
@@ -115,34 +164,23 @@ class Edit(ABC):
     """An abstract class representing an edit to a string.
     """
 
+    __slots__ = ("original_line_nums", "new_line_nums")
+
     original_line_nums: LineNumbers
     new_line_nums: LineNumbers
 
+    # Whether the original (resp. new) line number is the line before the edit,
+    # as for an addition (resp. deletion), rather than a line covered by it
+    original_line_before = False
+    new_line_before = False
+
     def __init__(
         self,
         original_line_nums: int | tuple[int, int],
         new_line_nums: int | tuple[int, int],
     ):
-        if isinstance(original_line_nums, int):
-            self.original_line_nums = LineNumberSingle(original_line_nums)
-        elif isinstance(original_line_nums, tuple):
-            start, end = original_line_nums
-            if start == end:
-                self.original_line_nums = LineNumberSingle(start)
-            else:
-                self.original_line_nums = LineNumberRange(original_line_nums)
-        else:
-            raise Exception(f"Input is not an integer or a tuple: {original_line_nums}")
-        if isinstance(new_line_nums, int):
-            self.new_line_nums = LineNumberSingle(new_line_nums)
-        elif isinstance(new_line_nums, tuple):
-            start, end = new_line_nums
-            if start == end:
-                self.new_line_nums = LineNumberSingle(start)
-            else:
-                self.new_line_nums = LineNumberRange(new_line_nums)
-        else:
-            raise Exception(f"Input is not an integer or a tuple: {new_line_nums}")
+        self.original_line_nums = _line_numbers(original_line_nums, self.original_line_before)
+        self.new_line_nums = _line_numbers(new_line_nums, self.new_line_before)
 
     @property
     def num_lines_added(self) -> int:
@@ -211,8 +249,37 @@ class Edit(ABC):
         return f"{self.original_line_nums}{self.str_letter}{self.new_line_nums}"
 
 
+def _line_numbers(line_nums: int | tuple[int, int], before: bool = False) -> LineNumbers:
+    """Create the LineNumbers of one side of an edit.
+
+    Parameters
+    ----------
+    line_nums : int | tuple[int, int]
+        A single line number, or the first and last line numbers of a range.
+    before : bool, optional
+        Whether a single line number is the line before an addition or deletion,
+        by default False.
+
+    Returns
+    -------
+    LineNumbers
+        The line numbers.
+    """
+    if isinstance(line_nums, int):
+        return LineNumberSingleBefore(line_nums) if before else LineNumberSingle(line_nums)
+    elif isinstance(line_nums, tuple):
+        start, end = line_nums
+        if start == end:
+            return LineNumberSingle(start)
+        return LineNumberRange(line_nums)
+    else:
+        raise Exception(f"Input is not an integer or a tuple: {line_nums}")
+
+
 class Addition(Edit):
+    __slots__ = ()
     original_line_nums: LineNumberSingleBefore
+    original_line_before = True
     str_letter: str = "a"
     prefix_map_original: dict[str, str] = {}
     prefix_map_new: dict[str, str] = {
@@ -221,14 +288,9 @@ class Addition(Edit):
         "unified": "+",
     }
 
-    def __init__(
-        self, original_line_ns: int, new_line_ns: int | tuple[int, int],
-    ):
-        super().__init__(original_line_ns, new_line_ns)
-        self.original_line_nums = LineNumberSingleBefore(original_line_ns)
-
 
 class Change(Edit):
+    __slots__ = ()
     str_letter: str = "c"
     prefix_map_original: dict[str, str] = {
         "normal": "<",
@@ -243,7 +305,9 @@ class Change(Edit):
 
 
 class Deletion(Edit):
+    __slots__ = ()
     new_line_nums: LineNumberSingleBefore
+    new_line_before = True
     str_letter: str = "d"
     prefix_map_original: dict[str, str] = {
         "normal": "<",
@@ -252,11 +316,150 @@ class Deletion(Edit):
     }
     prefix_map_new: dict[str, str] = {}
 
-    def __init__(
-        self, original_line_ns: int | tuple[int, int], new_line_ns: int,
-    ):
-        super().__init__(original_line_ns, new_line_ns)
-        self.new_line_nums = LineNumberSingleBefore(new_line_ns)
+
+def edit_ranges(edit: Edit) -> tuple[int, int, int, int]:
+    """Find the lines covered by an edit, as 0-based half-open ranges.
+
+    Parameters
+    ----------
+    edit : Edit
+        The edit.
+
+    Returns
+    -------
+    tuple[int, int, int, int]
+        The start and end of the edit in the original lines, then in the new lines.
+        An addition (resp. deletion) has an empty original (resp. new) range, placed
+        where the lines are inserted (resp. removed).
+
+    Examples
+    --------
+    >>> edit_ranges(Addition(2, (3, 4))), edit_ranges(Change((5, 6), 7))
+    ((2, 2, 2, 4), (4, 6, 6, 7))
+    """
+    ranges = []
+    for line_nums in (edit.original_line_nums, edit.new_line_nums):
+        if isinstance(line_nums, LineNumberSingleBefore):
+            ranges += [line_nums.line_numbers, line_nums.line_numbers]
+        else:
+            ranges += [line_nums.start_line - 1, line_nums.end_line]
+    return tuple(ranges)
+
+
+def edit_from_ranges(start1: int, end1: int, start2: int, end2: int) -> Edit:
+    """Create the edit replacing lines1[start1:end1] by lines2[start2:end2].
+
+    This is the inverse of edit_ranges.
+
+    Parameters
+    ----------
+    start1 : int
+        First line of the original string covered by the edit (from 0).
+    end1 : int
+        End (exclusive) of the lines of the original string covered by the edit.
+    start2 : int
+        First line of the new string covered by the edit (from 0).
+    end2 : int
+        End (exclusive) of the lines of the new string covered by the edit.
+
+    Returns
+    -------
+    Edit
+        An Addition if the original range is empty, a Deletion if the new range is
+        empty, or a Change otherwise.
+
+    Examples
+    --------
+    >>> edit_from_ranges(2, 2, 2, 4), edit_from_ranges(4, 6, 6, 7)
+    (2a3,4, 5,6c7)
+    """
+    if start1 == end1:
+        return Addition(start1, (start2 + 1, end2))
+    if start2 == end2:
+        return Deletion((start1 + 1, end1), start2)
+    return Change((start1 + 1, end1), (start2 + 1, end2))
+
+
+# One record per edit: the 0-based half-open line ranges it covers in both strings
+EDIT_DTYPE = np.dtype([("start1", "<i4"), ("end1", "<i4"), ("start2", "<i4"), ("end2", "<i4")])
+
+
+class EditScript(Sequence[Edit]):
+    """A compact, read-only list of edits, stored as one structured NumPy array.
+
+    Each edit takes 16 bytes (see EDIT_DTYPE and edit_ranges), instead of three Python
+    objects. Edit objects are only created when an item is accessed, and are not kept.
+
+    Parameters
+    ----------
+    ranges : np.ndarray | None
+        Array of EDIT_DTYPE records, in order. Empty by default.
+
+    Examples
+    --------
+    >>> script = EditScript.from_edits([Deletion(1, 0), Addition(2, (2, 3)), Change((6, 9), 7)])
+    >>> script
+    [1d0, 2a2,3, 6,9c7]
+    >>> script[1], script[1:], len(script)
+    (2a2,3, [2a2,3, 6,9c7], 3)
+    >>> script.ranges["end2"]
+    array([0, 3, 7], dtype=int32)
+    """
+
+    __slots__ = ("ranges",)
+
+    def __init__(self, ranges: np.ndarray | None = None) -> None:
+        self.ranges = np.empty(0, dtype=EDIT_DTYPE) if ranges is None else ranges
+
+    @classmethod
+    def from_ranges(cls, ranges: Iterable[tuple[int, int, int, int]]) -> EditScript:
+        """Create an EditScript from the line ranges of each edit (see edit_ranges)."""
+        return cls(np.fromiter(ranges, dtype=EDIT_DTYPE))
+
+    @classmethod
+    def from_edits(cls, edits: Iterable[Edit]) -> EditScript:
+        """Create an EditScript from Edit objects."""
+        if isinstance(edits, EditScript):
+            return edits
+        return cls.from_ranges(edit_ranges(edit) for edit in edits)
+
+    def iter_ranges(self) -> Iterator[tuple[int, int, int, int]]:
+        """Yield the line ranges of each edit, without creating Edit objects."""
+        # Convert a block of records at a time, rather than the whole array at once
+        for block_start in range(0, len(self.ranges), 4096):
+            yield from self.ranges[block_start : block_start + 4096].tolist()
+
+    @property
+    def num_lines_added(self) -> int:
+        """The number of lines of the new string added or changed by the edits."""
+        return int((self.ranges["end2"] - self.ranges["start2"]).sum())
+
+    @property
+    def num_lines_deleted(self) -> int:
+        """The number of lines of the original string deleted or changed by the edits."""
+        return int((self.ranges["end1"] - self.ranges["start1"]).sum())
+
+    def __len__(self) -> int:
+        return len(self.ranges)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return EditScript(self.ranges[index])
+        return edit_from_ranges(*self.ranges[index].tolist())
+
+    def __iter__(self) -> Iterator[Edit]:
+        for ranges in self.iter_ranges():
+            yield edit_from_ranges(*ranges)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, EditScript):
+            return np.array_equal(self.ranges, other.ranges)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"[{', '.join(repr(edit) for edit in self)}]"
 
 
 def read_file_contents(filename: str) -> str:
@@ -277,7 +480,492 @@ def read_file_contents(filename: str) -> str:
     return contents
 
 
-def diffstr_normal(str1: str, str2: str, edits: list[Edit], color: bool = False) -> str:
+def _colored_lines(
+    edit: Edit,
+    original_lines: Sequence[str],
+    new_lines: Sequence[str],
+    prefix_original: str,
+    prefix_new: str,
+    refine: str | None = None,
+) -> tuple[list[str], list[str]]:
+    """Prefix and color the lines of an edit, removed lines in red and added lines in green.
+
+    If refine is given (see intraline.GRANULARITIES) and the edit is a Change small
+    enough to be refined, only the prefixes and the changed spans of the lines are colored.
+    """
+    spans = None
+    if refine is not None and isinstance(edit, Change):
+        spans = refine_hunk(original_lines, new_lines, refine)
+    if spans is None:
+        return (
+            [color_string(prefix_original + line, Color.RED) for line in original_lines],
+            [color_string(prefix_new + line, Color.GREEN) for line in new_lines],
+        )
+    spans_original, spans_new = spans
+    return (
+        [
+            color_string(prefix_original, Color.RED) + color_spans(line, line_spans, Color.RED)
+            for line, line_spans in zip(original_lines, spans_original)
+        ],
+        [
+            color_string(prefix_new, Color.GREEN) + color_spans(line, line_spans, Color.GREEN)
+            for line, line_spans in zip(new_lines, spans_new)
+        ],
+    )
+
+
+def _prefixed_lines(
+    edit: Edit,
+    original_lines: Sequence[str],
+    new_lines: Sequence[str],
+    prefix_original: str,
+    prefix_new: str,
+    color: bool = False,
+    refine: str | None = None,
+) -> tuple[list[str], list[str]]:
+    """Prefix the lines of an edit, and color them if requested (see _colored_lines)."""
+    if color:
+        return _colored_lines(edit, original_lines, new_lines, prefix_original, prefix_new, refine)
+    return [prefix_original + line for line in original_lines], [prefix_new + line for line in new_lines]
+
+
+def _final_newline_edits(
+    edits: Iterable[Edit], len1: int, len2: int, newline1: bool, newline2: bool
+) -> Iterator[Edit]:
+    """Yield the edits, changing the last lines too if they only differ by their final newline.
+
+    The lines are compared without their newline, so a last line without one can be left
+    unchanged, or kept as a line followed by others. The diff then reproduces the other
+    file byte for byte only once that line is shown as changed, as GNU diff does.
+
+    Examples
+    --------
+    >>> list(_final_newline_edits([], 2, 2, True, False))
+    [2c2]
+    >>> list(_final_newline_edits([Addition(1, 2)], 1, 2, False, False))
+    [1c1,2]
+    """
+    last = None
+    for edit in edits:
+        if last is not None:
+            yield last
+        last = edit
+    start1, end1, start2, end2 = (len1, len1, len2, len2) if last is None else edit_ranges(last)
+    if last is None or end1 < len1:
+        # The last lines match each other, but only one of them may end with a newline
+        if newline1 == newline2 or not (len1 and len2):
+            if last is not None:
+                yield last
+        elif last is not None and (end1, end2) == (len1 - 1, len2 - 1):
+            yield edit_from_ranges(start1, len1, start2, len2)
+        else:
+            if last is not None:
+                yield last
+            yield edit_from_ranges(len1 - 1, len1, len2 - 1, len2)
+    elif (start1 == end1 and len1 and not newline1) or (start2 == end2 and len2 and not newline2):
+        # The last line of one file matches a line followed by others in the other file
+        yield edit_from_ranges(start1 - 1, end1, start2 - 1, end2)
+    else:
+        yield last
+
+
+def hunkstr_normal(
+    edit: Edit,
+    original_lines: list[str],
+    new_lines: list[str],
+    color: bool = False,
+    refine: str | None = None,
+    newline_original: bool = True,
+    newline_new: bool = True,
+) -> str:
+    """Create the normal output format of a single edit.
+
+    Parameters
+    ----------
+    edit : Edit
+        The edit to display.
+    original_lines : list[str]
+        The lines of the original string removed or changed by the edit.
+    new_lines : list[str]
+        The lines of the new string added or changed by the edit.
+    color : bool, optional
+        Whether to color removed lines in red and added lines in green, by default False.
+    refine : str | None, optional
+        With color, highlight only the changed words ("word") or characters ("char")
+        of a Change's lines, by default None.
+    newline_original : bool, optional
+        Whether the last of original_lines is followed by a newline, by default True.
+        If not, it is followed by a "\\ No newline at end of file" marker.
+    newline_new : bool, optional
+        Whether the last of new_lines is followed by a newline, by default True.
+
+    Returns
+    -------
+    str
+        The edit's header line, followed by its lines.
+
+    Examples
+    --------
+    >>> print(hunkstr_normal(Change(2, (2, 3)), ["b"], ["x", "y"]))
+    2c2,3
+    < b
+    ---
+    > x
+    > y
+    >>> print(hunkstr_normal(Change(2, 2), ["b"], ["b"], newline_new=False))
+    2c2
+    < b
+    ---
+    > b
+    \\ No newline at end of file
+    """
+    prefix_original = edit.prefix_map_original.get("normal")
+    prefix_new = edit.prefix_map_new.get("normal")
+    if color and refine is not None and isinstance(edit, Change):
+        original_colored, new_colored = _colored_lines(
+            edit, original_lines, new_lines, f"{prefix_original} ", f"{prefix_new} ", refine
+        )
+        original, new = "\n".join(original_colored), "\n".join(new_colored)
+    else:
+        original = "\n".join(f"{prefix_original} {line}" for line in original_lines)
+        new = "\n".join(f"{prefix_new} {line}" for line in new_lines)
+        if color:
+            original = color_string(original, Color.RED)
+            new = color_string(new, Color.GREEN)
+    if not newline_original and original_lines:
+        original += "\n" + NO_NEWLINE_MARKER
+    if not newline_new and new_lines:
+        new += "\n" + NO_NEWLINE_MARKER
+
+    if isinstance(edit, Addition):
+        return f"{edit}\n{new}"
+    elif isinstance(edit, Deletion):
+        return f"{edit}\n{original}"
+    else:
+        return f"{edit}\n{original}\n---\n{new}"
+
+
+def write_normal(
+    out: TextIO,
+    lines1: Sequence[str],
+    lines2: Sequence[str],
+    edits: Iterable[Edit],
+    color: bool = False,
+    refine: str | None = None,
+    newline1: bool = True,
+    newline2: bool = True,
+):
+    """Write a diff (normal output format) to a file-like object, one edit at a time.
+
+    Parameters
+    ----------
+    out : TextIO
+        The file-like object to write to, e.g. sys.stdout.
+    lines1 : Sequence[str]
+        The lines of the first (original) string.
+    lines2 : Sequence[str]
+        The lines of the second (new) string.
+    edits : Iterable[Edit]
+        The edits required to transform lines1 to lines2.
+    color : bool, optional
+        Whether to color removed lines in red and added lines in green, by default False.
+    refine : str | None, optional
+        With color, highlight only the changed words ("word") or characters ("char")
+        of changed lines, by default None.
+    newline1 : bool, optional
+        Whether the first string ends with a newline, by default True. If not, its last
+        line is followed by a "\\ No newline at end of file" marker.
+    newline2 : bool, optional
+        Whether the second string ends with a newline, by default True.
+
+    Examples
+    --------
+    >>> import io
+    >>> out = io.StringIO()
+    >>> write_normal(out, ["a", "b"], ["a", "b"], [], newline2=False)
+    >>> print(out.getvalue(), end="")
+    2c2
+    < b
+    ---
+    > b
+    \\ No newline at end of file
+    """
+    len1, len2 = len(lines1), len(lines2)
+    for edit in _final_newline_edits(edits, len1, len2, newline1, newline2):
+        start1, end1, start2, end2 = edit_ranges(edit)
+        out.write(
+            hunkstr_normal(
+                edit,
+                lines1[start1:end1],
+                lines2[start2:end2],
+                color,
+                refine,
+                newline1 or end1 < len1,
+                newline2 or end2 < len2,
+            )
+        )
+        out.write("\n")
+
+
+def _group_hunks(
+    edits: Iterable[Edit], len1: int, len2: int, context: int
+) -> Iterator[tuple[tuple[int, int, int, int], list[tuple[Edit, tuple[int, int, int, int]]]]]:
+    """Group edits which are at most 2 * context lines apart into hunks.
+
+    Only the edits of the current hunk are held in memory.
+
+    Yields
+    ------
+    hunk_ranges : tuple[int, int, int, int]
+        The start and end of the hunk (including its context lines) in the original
+        lines, then in the new lines, as 0-based half-open ranges.
+    hunk_edits : list[tuple[Edit, tuple[int, int, int, int]]]
+        The edits of the hunk, with their ranges (see edit_ranges).
+    """
+
+    def hunk_ranges(hunk_edits):
+        first_start1, _, first_start2, _ = hunk_edits[0][1]
+        _, last_end1, _, last_end2 = hunk_edits[-1][1]
+        before = min(context, first_start1, first_start2)
+        after = min(context, len1 - last_end1, len2 - last_end2)
+        return first_start1 - before, last_end1 + after, first_start2 - before, last_end2 + after
+
+    hunk_edits: list = []
+    for edit in edits:
+        ranges = edit_ranges(edit)
+        if hunk_edits and ranges[0] - hunk_edits[-1][1][1] > 2 * context:
+            yield hunk_ranges(hunk_edits), hunk_edits
+            hunk_edits = []
+        hunk_edits.append((edit, ranges))
+    if hunk_edits:
+        yield hunk_ranges(hunk_edits), hunk_edits
+
+
+def _range_unified(start: int, end: int) -> str:
+    """Format a 0-based half-open range of lines as in a unified diff's hunk header."""
+    length = end - start
+    if length == 1:
+        return str(start + 1)
+    if length == 0:
+        return f"{start},0"
+    return f"{start + 1},{length}"
+
+
+def _range_context(start: int, end: int) -> str:
+    """Format a 0-based half-open range of lines as in a context diff's hunk header."""
+    if end - start <= 1:
+        return str(end)
+    return f"{start + 1},{end}"
+
+
+def _write_lines(out: TextIO, lines: Sequence[str], no_newline: bool = False):
+    """Write lines to a file-like object, followed by a NO_NEWLINE_MARKER if no_newline is set."""
+    for line in lines:
+        out.write(line + "\n")
+    if lines and no_newline:
+        out.write(NO_NEWLINE_MARKER + "\n")
+
+
+def write_unified(
+    out: TextIO,
+    lines1: Sequence[str],
+    lines2: Sequence[str],
+    edits: Iterable[Edit],
+    context: int = 3,
+    fromfile: str = "",
+    tofile: str = "",
+    color: bool = False,
+    refine: str | None = None,
+    newline1: bool = True,
+    newline2: bool = True,
+):
+    """Write a diff (unified output format) to a file-like object, one hunk at a time.
+
+    Edits separated by at most 2 * context unchanged lines are grouped into a hunk.
+
+    Parameters
+    ----------
+    out : TextIO
+        The file-like object to write to, e.g. sys.stdout.
+    lines1 : Sequence[str]
+        The lines of the first (original) string.
+    lines2 : Sequence[str]
+        The lines of the second (new) string.
+    edits : Iterable[Edit]
+        The edits required to transform lines1 to lines2.
+    context : int, optional
+        The number of unchanged lines shown around each edit, by default 3.
+    fromfile : str, optional
+        The name of the original file, shown in the header, by default "".
+    tofile : str, optional
+        The name of the new file, shown in the header, by default "".
+    color : bool, optional
+        Whether to color removed lines in red, added lines in green, and hunk
+        headers in cyan, by default False.
+    refine : str | None, optional
+        With color, highlight only the changed words ("word") or characters ("char")
+        of changed lines, by default None.
+    newline1 : bool, optional
+        Whether the first string ends with a newline, by default True. If not, its last
+        line is followed by a "\\ No newline at end of file" marker.
+    newline2 : bool, optional
+        Whether the second string ends with a newline, by default True.
+
+    Examples
+    --------
+    >>> import io
+    >>> out = io.StringIO()
+    >>> write_unified(out, ["a"], ["a"], [], fromfile="a.txt", tofile="b.txt")
+    >>> out.getvalue()
+    ''
+    >>> edits = [Addition(1, 2)]
+    >>> write_unified(out, ["a"], ["a", "b"], edits, fromfile="a", tofile="b", newline1=False, newline2=False)
+    >>> print(out.getvalue(), end="")
+    --- a
+    +++ b
+    @@ -1 +1,2 @@
+    -a
+    \\ No newline at end of file
+    +a
+    +b
+    \\ No newline at end of file
+    """
+    cyan = (lambda line: color_string(line, Color.CYAN)) if color else str
+
+    len1, len2 = len(lines1), len(lines2)
+    edits = _final_newline_edits(edits, len1, len2, newline1, newline2)
+    hunks = _group_hunks(edits, len1, len2, context)
+    for hunk_number, ((start1, end1, start2, end2), hunk_edits) in enumerate(hunks):
+        if hunk_number == 0:
+            # As with GNU diff, identical strings produce no output at all
+            out.write(f"--- {fromfile}\n+++ {tofile}\n")
+        out.write(cyan(f"@@ -{_range_unified(start1, end1)} +{_range_unified(start2, end2)} @@") + "\n")
+        position = start1
+        for edit, (edit_start1, edit_end1, edit_start2, edit_end2) in hunk_edits:
+            for line in lines1[position:edit_start1]:
+                out.write(f" {line}\n")
+            removed, added = _prefixed_lines(
+                edit,
+                lines1[edit_start1:edit_end1],
+                lines2[edit_start2:edit_end2],
+                edit.prefix_map_original.get("unified", ""),
+                edit.prefix_map_new.get("unified", ""),
+                color,
+                refine,
+            )
+            _write_lines(out, removed, edit_end1 == len1 and not newline1)
+            _write_lines(out, added, edit_end2 == len2 and not newline2)
+            position = edit_end1
+        # If these lines end both files, either both or neither end with a newline
+        _write_lines(out, [f" {line}" for line in lines1[position:end1]], end1 == len1 and not newline1)
+
+
+def write_context(
+    out: TextIO,
+    lines1: Sequence[str],
+    lines2: Sequence[str],
+    edits: Iterable[Edit],
+    context: int = 3,
+    fromfile: str = "",
+    tofile: str = "",
+    color: bool = False,
+    refine: str | None = None,
+    newline1: bool = True,
+    newline2: bool = True,
+):
+    """Write a diff (context output format) to a file-like object, one hunk at a time.
+
+    Edits separated by at most 2 * context unchanged lines are grouped into a hunk.
+    Each hunk shows its lines in the original string, then in the new string; either
+    part is left out if the hunk only adds (resp. removes) lines.
+
+    Parameters
+    ----------
+    out : TextIO
+        The file-like object to write to, e.g. sys.stdout.
+    lines1 : Sequence[str]
+        The lines of the first (original) string.
+    lines2 : Sequence[str]
+        The lines of the second (new) string.
+    edits : Iterable[Edit]
+        The edits required to transform lines1 to lines2.
+    context : int, optional
+        The number of unchanged lines shown around each edit, by default 3.
+    fromfile : str, optional
+        The name of the original file, shown in the header, by default "".
+    tofile : str, optional
+        The name of the new file, shown in the header, by default "".
+    color : bool, optional
+        Whether to color removed lines in red and added lines in green, by default False.
+    refine : str | None, optional
+        With color, highlight only the changed words ("word") or characters ("char")
+        of changed lines, by default None.
+    newline1 : bool, optional
+        Whether the first string ends with a newline, by default True. If not, its last
+        line is followed by a "\\ No newline at end of file" marker.
+    newline2 : bool, optional
+        Whether the second string ends with a newline, by default True.
+
+    Examples
+    --------
+    >>> import io
+    >>> out = io.StringIO()
+    >>> write_context(out, ["a"], ["a"], [], fromfile="a.txt", tofile="b.txt")
+    >>> out.getvalue()
+    ''
+    """
+    len1, len2 = len(lines1), len(lines2)
+    edits = _final_newline_edits(edits, len1, len2, newline1, newline2)
+    hunks = _group_hunks(edits, len1, len2, context)
+    for hunk_number, ((start1, end1, start2, end2), hunk_edits) in enumerate(hunks):
+        if hunk_number == 0:
+            # As with GNU diff, identical strings produce no output at all
+            out.write(f"*** {fromfile}\n--- {tofile}\n")
+        # Both parts of the hunk are rendered from the same prefixed (and colored) lines
+        rendered = [
+            _prefixed_lines(
+                edit,
+                lines1[edit_start1:edit_end1],
+                lines2[edit_start2:edit_end2],
+                f"{edit.prefix_map_original.get('contextual')} ",
+                f"{edit.prefix_map_new.get('contextual')} ",
+                color,
+                refine,
+            )
+            for edit, (edit_start1, edit_end1, edit_start2, edit_end2) in hunk_edits
+        ]
+        out.write("***************\n")
+        out.write(f"*** {_range_context(start1, end1)} ****\n")
+        if any(edit_end1 > edit_start1 for _, (edit_start1, edit_end1, _, _) in hunk_edits):
+            position = start1
+            for (_, (edit_start1, edit_end1, _, _)), (removed, _) in zip(hunk_edits, rendered):
+                for line in lines1[position:edit_start1]:
+                    out.write(f"  {line}\n")
+                _write_lines(out, removed, edit_end1 == len1 and not newline1)
+                position = edit_end1
+            _write_lines(out, [f"  {line}" for line in lines1[position:end1]], end1 == len1 and not newline1)
+
+        out.write(f"--- {_range_context(start2, end2)} ----\n")
+        if any(edit_end2 > edit_start2 for _, (_, _, edit_start2, edit_end2) in hunk_edits):
+            position = start2
+            for (_, (_, _, edit_start2, edit_end2)), (_, added) in zip(hunk_edits, rendered):
+                for line in lines2[position:edit_start2]:
+                    out.write(f"  {line}\n")
+                _write_lines(out, added, edit_end2 == len2 and not newline2)
+                position = edit_end2
+            _write_lines(out, [f"  {line}" for line in lines2[position:end2]], end2 == len2 and not newline2)
+
+
+def _diffstr(write, str1: str, str2: str, edits: Iterable[Edit], **kwargs) -> str:
+    """Run one of the write_* functions on two strings, and return what it wrote (without the final newline)."""
+    out = io.StringIO()
+    write(out, str1.splitlines(), str2.splitlines(), edits, **kwargs)
+    return out.getvalue().removesuffix("\n")
+
+
+def diffstr_normal(
+    str1: str, str2: str, edits: list[Edit], color: bool = False, refine: str | None = None
+) -> str:
     """Create a diff (normal output format) from a list of edits.
 
     Parameters
@@ -288,41 +976,157 @@ def diffstr_normal(str1: str, str2: str, edits: list[Edit], color: bool = False)
         The second (new) string to diff.
     changes : list[Edit]
         The list of edits required to transform str1 to str2.
+    color : bool, optional
+        Whether to color the output for a terminal, by default False.
+    refine : str | None, optional
+        With color, highlight only the changed words ("word") or characters ("char")
+        of changed lines, by default None.
 
     Returns
     -------
     str
         The diff of str1 and str2 according to the list of edits.
     """
+    return _diffstr(write_normal, str1, str2, edits, color=color, refine=refine)
 
-    lines1 = str1.splitlines()
-    lines2 = str2.splitlines()
-
-    diffstr_lines: list[str] = []
 
-    for edit in edits:
-        diffstr_lines.append(str(edit))
+def diffstr_unified(
+    str1: str,
+    str2: str,
+    edits: list[Edit],
+    context: int = 3,
+    fromfile: str = "",
+    tofile: str = "",
+    color: bool = False,
+    refine: str | None = None,
+) -> str:
+    """Create a diff (unified output format) from a list of edits.
 
-        original_lines = "\n".join(edit.original_lines(lines1))
-        new_lines = "\n".join(edit.new_lines(lines2))
+    Parameters
+    ----------
+    str1 : str
+        The first (original) string to diff.
+    str2 : str
+        The second (new) string to diff.
+    edits : list[Edit]
+        The list of edits required to transform str1 to str2.
+    context : int, optional
+        The number of unchanged lines shown around each edit, by default 3.
+    fromfile : str, optional
+        The name of the original file, shown in the header, by default "".
+    tofile : str, optional
+        The name of the new file, shown in the header, by default "".
+    color : bool, optional
+        Whether to color the output for a terminal, by default False.
+    refine : str | None, optional
+        With color, highlight only the changed words ("word") or characters ("char")
+        of changed lines, by default None.
 
-        if color:
-            original_lines = color_string(original_lines, Color.RED)
-            new_lines = color_string(new_lines, Color.GREEN)
+    Returns
+    -------
+    str
+        The diff of str1 and str2 according to the list of edits.
 
-        if isinstance(edit, Addition):
-            diffstr_lines.append(new_lines)
-        elif isinstance(edit, Deletion):
-            diffstr_lines.append(original_lines)
-        else:
-            diffstr_lines.append(original_lines)
-            diffstr_lines.append("---")
-            diffstr_lines.append(new_lines)
+    Examples
+    --------
+    >>> edits = [Change(2, 2), Addition(5, 6)]
+    >>> print(diffstr_unified("a\\nb\\nc\\nd\\ne\\n", "a\\nx\\nc\\nd\\ne\\nf\\n", edits, context=1, fromfile="a", tofile="b"))
+    --- a
+    +++ b
+    @@ -1,3 +1,3 @@
+     a
+    -b
+    +x
+     c
+    @@ -5 +5,2 @@
+     e
+    +f
+    """
+    return _diffstr(
+        write_unified,
+        str1,
+        str2,
+        edits,
+        context=context,
+        fromfile=fromfile,
+        tofile=tofile,
+        color=color,
+        refine=refine,
+    )
+
+
+def diffstr_context(
+    str1: str,
+    str2: str,
+    edits: list[Edit],
+    context: int = 3,
+    fromfile: str = "",
+    tofile: str = "",
+    color: bool = False,
+    refine: str | None = None,
+) -> str:
+    """Create a diff (context output format) from a list of edits.
 
-    return "\n".join(diffstr_lines)
+    Parameters
+    ----------
+    str1 : str
+        The first (original) string to diff.
+    str2 : str
+        The second (new) string to diff.
+    edits : list[Edit]
+        The list of edits required to transform str1 to str2.
+    context : int, optional
+        The number of unchanged lines shown around each edit, by default 3.
+    fromfile : str, optional
+        The name of the original file, shown in the header, by default "".
+    tofile : str, optional
+        The name of the new file, shown in the header, by default "".
+    color : bool, optional
+        Whether to color the output for a terminal, by default False.
+    refine : str | None, optional
+        With color, highlight only the changed words ("word") or characters ("char")
+        of changed lines, by default None.
 
+    Returns
+    -------
+    str
+        The diff of str1 and str2 according to the list of edits.
 
-def check_edits(str1: str, str2: str, edits: list[Edit]) -> bool:
+    Examples
+    --------
+    >>> edits = [Change(2, 2), Addition(5, 6)]
+    >>> print(diffstr_context("a\\nb\\nc\\nd\\ne\\n", "a\\nx\\nc\\nd\\ne\\nf\\n", edits, context=1, fromfile="a", tofile="b"))
+    *** a
+    --- b
+    ***************
+    *** 1,3 ****
+      a
+    ! b
+      c
+    --- 1,3 ----
+      a
+    ! x
+      c
+    ***************
+    *** 5 ****
+    --- 5,6 ----
+      e
+    + f
+    """
+    return _diffstr(
+        write_context,
+        str1,
+        str2,
+        edits,
+        context=context,
+        fromfile=fromfile,
+        tofile=tofile,
+        color=color,
+        refine=refine,
+    )
+
+
+def check_edits(str1: str, str2: str, edits: Iterable[Edit]) -> bool:
     """Transform str1 to str2 according to the provided list of edits
     and check whether they are equal.
 
@@ -332,35 +1136,27 @@ def check_edits(str1: str, str2: str, edits: list[Edit]) -> bool:
         The string to transform.
     str2 : str
         The string to transform str1 into.
-    edits : list[Edit]
-        The list of edits used to transform str1.
+    edits : Iterable[Edit]
+        The list of edits used to transform str1 (e.g. an EditScript), in order.
+        They are applied in a single pass by patch.apply_edits.
 
     Returns
     -------
     bool
         True if transforming str1 by the list of edits produces str2. False otherwise.
     """
-    lines1 = str1.splitlines()
-    lines2 = str2.splitlines()
+    # patch.py builds on the Edit classes of this module
+    from patch import PatchError, apply_edits
 
-    # Apply changes in reverse order to maintain line numbers
-    for edit in edits[::-1]:
-        for _ in range(
-            edit.original_line_nums.end_line,
-            edit.original_line_nums.start_line - 1,
-            -1,
-        ):
-            lines1.pop(edit.original_line_nums.start_line - 1)
-
-        insert_index = edit.original_line_nums.start_line
-        if not isinstance(edit.original_line_nums, LineNumberSingleBefore):
-            insert_index -= 1
-        for added_line_num in range(
-            edit.new_line_nums.end_line, edit.new_line_nums.start_line - 1, -1
-        ):
-            lines1.insert(insert_index, lines2[added_line_num - 1])
-
-    transformed_str = "\n".join(lines1)
-    if str1[-1] == "\n":
+    lines2 = str2.splitlines()
+    try:
+        transformed_lines = list(apply_edits(str1.splitlines(), lines2, edits))
+    except PatchError:
+        return False
+
+    # Edits don't change whether the last line ends with a newline (an empty string
+    # has no unterminated last line)
+    transformed_str = "\n".join(transformed_lines)
+    if (str1.endswith("\n") or not str1) and transformed_lines:
         transformed_str += "\n"
     return transformed_str == str2
@@ -0,0 +1,67 @@
+# First we need to read in the required packages
+import tensorflow as tf
+from tensorflow.keras import layers
+
+AUTOTUNE = tf.data.AUTOTUNE
+# Number of images read from the shards at a time
+READ_SIZE = 256
+# Number of images shuffled together when the images are cached
+SHUFFLE_BUFFER = 2048
+
+# Define a function to create the data augmentation applied to training images
+def Augmentation():
+    """
+    This function creates the data augmentation of the training images:
+    randomly flipping & rotating them
+    """
+    return tf.keras.Sequential([
+        layers.RandomFlip('horizontal'),
+        layers.RandomRotation(0.05),
+    ])
+
+# Define a function to create a tf.data pipeline reading a sharded data set
+def MakePipeline(dataset, batch_size=32, training=False, cache=None, seed=None):
+    """
+    This function creates a tf.data pipeline yielding batches of (images, targets)
+    of a ShardedDataset (or a split of it)
+    The images are read from the shards in parallel, READ_SIZE at a time, and
+    the next batches are prepared while the model trains on the current one
+    With training, the images are shuffled in each epoch and augmented (see
+    Augmentation) on the CPU, inside the pipeline, instead of inside the model
+    With cache, the images read in the first epoch are kept for the next ones:
+    in memory if cache is "", or in files starting with cache otherwise
+    The output is a tf.data.Dataset, which can be passed straight to model.fit
+    """
+    # The targets of the view are gathered once, instead of for every batch
+    target=dataset.target
+
+    def ReadImages(positions):
+        # The shards are memory-mapped numpy arrays, so they are read outside the graph
+        images, targets=tf.numpy_function(
+            lambda p: (dataset.images(p), target[p]), [positions], (tf.uint8, tf.int64)
+        )
+        images.set_shape((None,)+dataset.image_shape)
+        targets.set_shape((None,))
+        return images, targets
+
+    positions=tf.data.Dataset.range(len(dataset))
+    if cache is None:
+        # Shuffling the positions is cheap, and the images of each batch are read at once
+        if training:
+            positions=positions.shuffle(len(dataset), seed=seed, reshuffle_each_iteration=True)
+        pipeline=positions.batch(batch_size).map(ReadImages, num_parallel_calls=AUTOTUNE)
+    else:
+        # The images are cached in a fixed order, then shuffled in a bounded buffer
+        pipeline=positions.batch(READ_SIZE).map(ReadImages, num_parallel_calls=AUTOTUNE)
+        pipeline=pipeline.unbatch().cache(cache)
+        if training:
+            pipeline=pipeline.shuffle(SHUFFLE_BUFFER, seed=seed, reshuffle_each_iteration=True)
+        pipeline=pipeline.batch(batch_size)
+
+    if training:
+        augmentation=Augmentation()
+        pipeline=pipeline.map(
+            lambda images, targets: (augmentation(tf.cast(images, tf.float32), training=True), targets),
+            num_parallel_calls=AUTOTUNE,
+        )
+    return pipeline.prefetch(AUTOTUNE)
@@ -1,34 +1,43 @@
 # First we need to read in the required packages
+import argparse,os
 import matplotlib.pyplot as plt
 import matplotlib.image as mpimg
 
 # List of file names
-nomasks_list1 = ["data/without_mask/23.jpg", 
-               "data/without_mask/29.jpg", 
-               "data/without_mask/96.jpg", 
-               "data/without_mask/22.jpg",
-               "data/without_mask/0_0_zhangluyi_0082.jpg",
-               "data/without_mask/74.jpg"]
+nomasks_list1 = ["without_mask/23.jpg",
+               "without_mask/29.jpg",
+               "without_mask/96.jpg",
+               "without_mask/22.jpg",
+               "without_mask/0_0_zhangluyi_0082.jpg",
+               "without_mask/74.jpg"]
 
-# Loop through all images, display them
-for i in range(6):   
-    ax = plt.subplot(2, 3, i + 1)
-    # read the image and show it 
-    plt.imshow(mpimg.imread(nomasks_list1[i]))
-    plt.axis("off")
-    
 # List of file names
-masks_list1 = ["data/with_mask/000 copy 36.jpg", 
-               "data/with_mask/0_0_0 copy 21.jpg", 
-               "data/with_mask/2398.png", 
-               "data/with_mask/with_mask381.jpg",
-               "data/with_mask/with_mask316.jpg",
-               "data/with_mask/0502.png"]
+masks_list1 = ["with_mask/000 copy 36.jpg",
+               "with_mask/0_0_0 copy 21.jpg",
+               "with_mask/2398.png",
+               "with_mask/with_mask381.jpg",
+               "with_mask/with_mask316.jpg",
+               "with_mask/0502.png"]
 
-# Loop through all images, display them
-for i in range(6):   
-    ax = plt.subplot(2, 3, i + 1)
-    # read the image and show it 
-    plt.imshow(mpimg.imread(masks_list1[i]))
-    plt.axis("off")
-    
\ No newline at end of file
+# Define a function to display some images of the data set
+def ShowImages(img_names, data_path="data"):
+    """
+    This function displays six images of the data set in a new figure
+    The input is the names of the images in the data set, and the path to it
+    """
+    plt.figure()
+    # Loop through all images, display them
+    for i in range(6):
+        ax = plt.subplot(2, 3, i + 1)
+        # read the image and show it
+        plt.imshow(mpimg.imread(os.path.join(data_path, img_names[i])))
+        plt.axis("off")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Display some images of the data set, with and without masks.")
+    parser.add_argument("--data-path", default="data", help="The folder of the data set (default: data).")
+    args = parser.parse_args()
+    ShowImages(nomasks_list1, args.data_path)
+    ShowImages(masks_list1, args.data_path)
+    plt.show()
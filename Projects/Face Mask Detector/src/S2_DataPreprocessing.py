@@ -1,12 +1,195 @@
 # First we need to read in the required packages
-import cv2,os
+import argparse,cv2,os,json
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from ShardedDataset import SaveShards
+
+# Number of images handed to the thread pool at a time
+CHUNK_SIZE = 256
+# Name of the file listing the images stored in a preprocessing cache
+MANIFEST_NAME = "manifest.json"
+
+# Define a function to read and resize a single image
+def LoadImage(img_path, img_size=100):
+    """
+    This function reads one image and resizes it to img_size x img_size
+    The input is the path to the image
+    The output is the resized image, or None if the image could not be read
+    """
+    img=cv2.imread(img_path)
+    try:
+        # Resizing the image into 100x100
+        return cv2.resize(img,(img_size,img_size))
+    except Exception as e:
+        print(os.path.basename(img_path))
+        print('Exception:',e)
+        #if any exception rasied, the exception will be printed here.
+        return None
+
+# Define a function to create the array receiving the images
+def AllocateImages(n_images, img_size=100, out_path=None):
+    """
+    This function creates an uninitialized uint8 array of n_images color images
+    of size img_size x img_size
+    If out_path is given, the array is a memory-mapped .npy file created there,
+    so the images are written to disk instead of being held in memory
+    """
+    shape=(n_images, img_size, img_size, 3)
+    if out_path is None:
+        return np.empty(shape, dtype=np.uint8)
+    return np.lib.format.open_memmap(out_path, mode="w+", dtype=np.uint8, shape=shape)
+
+# Define a function to read and resize many images in parallel
+def ReadImages(img_paths, data, img_size=100, n_workers=None):
+    """
+    This function reads and resizes images on a pool of threads (one per CPU
+    by default), writing the i-th image into data[i]
+    The output is a boolean array telling which images could be read
+    """
+    valid=np.zeros(len(img_paths), dtype=bool)
+    # OpenCV releases the GIL while decoding and resizing, so the threads run
+    # in parallel. executor.map returns the images in the order of img_paths.
+    # The images are handed to the pool one chunk at a time, so that at most
+    # one chunk of decoded images waits to be collected.
+    with ThreadPoolExecutor(max_workers=n_workers or os.cpu_count()) as executor:
+        for start in range(0, len(img_paths), CHUNK_SIZE):
+            chunk_paths=img_paths[start:start+CHUNK_SIZE]
+            resized_images=executor.map(LoadImage, chunk_paths, [img_size]*len(chunk_paths))
+            for i, resized in enumerate(resized_images, start):
+                # the images which could not be read are left out
+                if resized is not None:
+                    data[i]=resized
+                    valid[i]=True
+    return valid
+
+# Define a function to drop the rows of the images which could not be read
+def KeepValidImages(data, valid, img_size=100, out_path=None):
+    """
+    This function moves the valid rows of data (see ReadImages) to its front
+    The output is the array of the valid rows only
+    If data is the memory-mapped file out_path, it is replaced by a smaller file
+    """
+    n_valid=int(valid.sum())
+    if n_valid == len(valid):
+        if out_path is not None:
+            data.flush()
+        return data
+    if out_path is None:
+        # The valid rows are in order, so they can be moved forward in place
+        for row, i in enumerate(np.flatnonzero(valid)):
+            data[row]=data[i]
+        return data[:n_valid]
+    # The shape of a .npy file is fixed, so copy the rows to a new file
+    valid_path=out_path+".tmp.npy"
+    valid_data=AllocateImages(n_valid, img_size, valid_path)
+    for row, i in enumerate(np.flatnonzero(valid)):
+        valid_data[row]=data[i]
+    valid_data.flush()
+    del data, valid_data
+    os.replace(valid_path, out_path)
+    return np.load(out_path, mmap_mode="r+")
+
+# Define functions to read and write the manifest of a preprocessing cache
+def LoadManifest(cache_dir, img_size=100):
+    """
+    This function reads the manifest of a preprocessing cache
+    The manifest maps the path of every cached image to its modification time
+    and size when it was read, and to the shard (a .npy file of the cache)
+    and row holding its resized version
+    A missing manifest, or one made for another image size, gives an empty cache
+    """
+    empty={"img_size": img_size, "next_shard": 0, "images": {}}
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME)) as f:
+            manifest=json.load(f)
+    except FileNotFoundError:
+        return empty
+    if manifest.get("img_size") != img_size:
+        return empty
+    return manifest
+
+def SaveManifest(cache_dir, manifest):
+    """
+    This function writes the manifest of a preprocessing cache, and deletes
+    the shards which no image refers to anymore
+    The manifest is written to a temporary file first, so an interrupted run
+    never leaves a broken manifest behind
+    """
+    manifest_path=os.path.join(cache_dir, MANIFEST_NAME)
+    with open(manifest_path+".tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_path+".tmp", manifest_path)
+    used_shards={entry["shard"] for entry in manifest["images"].values()}
+    for name in os.listdir(cache_dir):
+        if name.startswith("shard_") and name not in used_shards:
+            os.remove(os.path.join(cache_dir, name))
+
+# Define a function to read images, reusing the ones preprocessed by earlier runs
+def ReadImagesCached(img_paths, cache_dir, img_size=100, n_workers=None, out_path=None):
+    """
+    This function reads and resizes images like ReadImages, reusing the
+    resized images stored in cache_dir by earlier runs
+    An image is only read again if it is new, or if its modification time or
+    size changed; the images read are stored in a new shard of the cache
+    The output is an array of the images which could be read, in order (see
+    AllocateImages), and a boolean array telling which images could be read
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest=LoadManifest(cache_dir, img_size)
+    images=manifest["images"]
+    keys=[os.path.abspath(img_path) for img_path in img_paths]
+    stamps=[]
+    for img_path in img_paths:
+        stat=os.stat(img_path)
+        stamps.append([stat.st_mtime_ns, stat.st_size])
+
+    # Read the new and modified images into a new shard
+    new=[i for i in range(len(keys)) if keys[i] not in images or images[keys[i]]["stamp"] != stamps[i]]
+    print(len(img_paths)-len(new), "images found in the cache,", len(new), "to read")
+    if new:
+        shard_name="shard_{:05d}.npy".format(manifest["next_shard"])
+        manifest["next_shard"]+=1
+        shard=AllocateImages(len(new), img_size, os.path.join(cache_dir, shard_name))
+        shard_valid=ReadImages([img_paths[i] for i in new], shard, img_size, n_workers)
+        shard.flush()
+        del shard
+        for row, i in enumerate(new):
+            # images which could not be read are remembered too, so they are not read again
+            images[keys[i]]={"stamp": stamps[i], "shard": shard_name if shard_valid[row] else None, "row": row}
+
+    # Assemble the output from the shards, a chunk of rows at a time
+    valid=np.array([images[key]["shard"] is not None for key in keys], dtype=bool)
+    data=AllocateImages(int(valid.sum()), img_size, out_path)
+    rows_by_shard={}
+    for position, key in enumerate(key for key, is_valid in zip(keys, valid) if is_valid):
+        positions, rows=rows_by_shard.setdefault(images[key]["shard"], ([], []))
+        positions.append(position)
+        rows.append(images[key]["row"])
+    for shard_name, (positions, rows) in rows_by_shard.items():
+        shard=np.load(os.path.join(cache_dir, shard_name), mmap_mode="r")
+        for start in range(0, len(rows), CHUNK_SIZE):
+            data[positions[start:start+CHUNK_SIZE]]=shard[rows[start:start+CHUNK_SIZE]]
+        del shard
+    if out_path is not None:
+        data.flush()
+
+    # Forget the images which were deleted (the cache may be shared by several
+    # data sets, so the images of the other ones are kept)
+    for key in list(images):
+        if not os.path.exists(key):
+            del images[key]
+    SaveManifest(cache_dir, manifest)
+    return data, valid
 
 # Define a preprocessing function
-def DataPreprocess(data_path):
+def DataPreprocess(data_path, n_workers=None, out_path=None, cache_dir=None):
     """
     This function will loop through the data set, preprocess each image
-    The input is the path to the data set
+    The input is the path to the data set, the number of threads used
+    to read the images (by default one per CPU), optionally the path
+    of a .npy file to write the images to (see AllocateImages), and
+    optionally a directory caching the preprocessed images between runs
+    (see ReadImagesCached)
     We resize the image to a smaller size to speed up training
     The output will be images and targets in array form
     """
@@ -20,11 +203,10 @@ def DataPreprocess(data_path):
     print(label_dict)
     print(categories)
     print(labels)
-    # Now loop through the datasets, preprocess each image, 
-    # and append the preprocessed image to the empty dictionary created above
+    # Now list the images of each category, with their labels
     img_size=100
-    data=[]
-    target=[]
+    img_paths=[]
+    img_labels=[]
     for category in categories:
         # Construct path to each folder ('without_mask', 'with_mask')
         folder_path=os.path.join(data_path,category)
@@ -32,36 +214,63 @@ def DataPreprocess(data_path):
         # Remove ".DS_Store" from the list of image names
         if '.DS_Store' in img_names:
             img_names.remove('.DS_Store')
-        # Loop through images in each folder
         for img_name in img_names:
             img_path=os.path.join(folder_path,img_name)
-            img=cv2.imread(img_path)
-            try:                
-                # Resizing the image into 100x100         
-                resized=cv2.resize(img,(img_size,img_size))
-                # appending the image and the label(categorized) into the list (dataset)
-                data.append(resized)
-                target.append(label_dict[category])
-            except Exception as e:
+            # Only count the files OpenCV can decode (checked from their first bytes)
+            if not cv2.haveImageReader(img_path):
                 print(img_name)
-                print('Exception:',e)
-                #if any exception rasied, the exception will be printed here.
-   
-    # now in this part we convert the images and targets into array form, 
-    data=np.array(data)
-    target=np.array(target)
-    return data, target
-
+                print('Exception: not a supported image file')
+                continue
+            img_paths.append(img_path)
+            img_labels.append(label_dict[category])
 
-# Construct our data and target variable
-path = "/Users/yuchenzhang/Desktop/2021-2022/FALL/PIC16B/MasksPlease/data"
-data, target = DataPreprocess(path)
+    if cache_dir is not None:
+        data, valid=ReadImagesCached(img_paths, cache_dir, img_size, n_workers, out_path)
+    else:
+        # Each resized image is written straight into a preallocated array, instead of
+        # being appended to a list which is copied into an array at the end (which
+        # needs twice the memory of the data set)
+        data=AllocateImages(len(img_paths), img_size, out_path)
+        valid=ReadImages(img_paths, data, img_size, n_workers)
+        data=KeepValidImages(data, valid, img_size, out_path)
+    # the labels of the images which could not be read are left out too
+    target=np.array(img_labels, dtype=np.int64)[valid]
+    return data, target
 
 
-# baseline performance of our data: see what proportion is with masl
-sum(target)/len(target)
+# Define a function to preprocess the data set into a sharded data set
+def PreprocessToShards(data_path, out_dir="dataset", cache_dir="preprocess_cache", n_workers=None):
+    """
+    This function preprocesses the data set (see DataPreprocess) and saves it as
+    shards in out_dir, which the training scripts open memory-mapped (see
+    ShardedDataset)
+    The images are first written to a data.npy file in out_dir as they are read,
+    which is removed once it has been split into shards
+    Images preprocessed by earlier runs are reused from cache_dir (if not None)
+    The output is the targets of the data set
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    out_path=os.path.join(out_dir, "data.npy")
+    data, target = DataPreprocess(data_path, n_workers, out_path=out_path, cache_dir=cache_dir)
+    SaveShards(data, target, out_dir)
+    del data
+    os.remove(out_path)
+    return target
 
 
-# Saving our data and target
-np.save("data", data)
-np.save("target", target)
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preprocess the images of the data set into a sharded data set.")
+    parser.add_argument(
+        "data_path", nargs="?", default="/Users/yuchenzhang/Desktop/2021-2022/FALL/PIC16B/MasksPlease/data",
+        help="The folder of the data set, holding the without_mask and with_mask folders.",
+    )
+    parser.add_argument("--out-dir", default="dataset", help="Where to save the shards (default: dataset).")
+    parser.add_argument(
+        "--cache-dir", default="preprocess_cache",
+        help="Where to cache the preprocessed images between runs (default: preprocess_cache).",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Number of threads reading the images.")
+    args = parser.parse_args()
+    target = PreprocessToShards(args.data_path, args.out_dir, args.cache_dir, args.workers)
+    # baseline performance of our data: see what proportion is with mask
+    print("Proportion with mask:", sum(target)/len(target))
@@ -1,111 +1,156 @@
 # First we need to read in the required packages and the already defined function
+import argparse
 import matplotlib.pyplot as plt
 import numpy as np
-from sklearn.model_selection import train_test_split
 import tensorflow as tf
 from tensorflow.keras import layers
 import matplotlib.image as mpimg
 from S2_DataPreprocessing import DataPreprocess
+from ShardedDataset import ShardedDataset
+from InputPipeline import MakePipeline
 
-# loading the saved numpy arrays in the previous code
-data=np.load('data.npy')
-target=np.load('target.npy')
+BATCH_SIZE=32
+# Test sets of different racial groups
+TEST_PATHS=["data/Testing_Black", "data/Testing_Asian", "data/Testing_White"]
+categories = ['without_mask', 'with_mask']
 
-# Performing the train test split of the dataset
-train_data,test_data,train_target,test_target=train_test_split(data,target,test_size=0.1)
+# Define a function to split the data set and create its input pipelines
+def MakePipelines(dataset_dir="dataset", batch_size=BATCH_SIZE):
+    """
+    This function opens the data set saved by S2_DataPreprocessing (memory-mapped),
+    and performs the train test split of the dataset, keeping 20% of the training
+    set for validation: the splits only hold indices into the data set, not
+    copies of images
+    The output is the data set, then tf.data pipelines reading the training,
+    validation and test images from the shards: the training images are shuffled
+    and augmented there, on the CPU, while the model trains
+    None of them is cached in memory: they are read from the memory-mapped shards
+    in each epoch, so the data set does not need to fit in memory
+    """
+    dataset=ShardedDataset(dataset_dir)
+    train_set,test_set=dataset.split(test_size=0.1)
+    train_set,validation_set=train_set.split(test_size=0.2)
+    train_pipeline=MakePipeline(train_set, batch_size, training=True)
+    validation_pipeline=MakePipeline(validation_set, batch_size)
+    test_pipeline=MakePipeline(test_set, batch_size)
+    return dataset, train_pipeline, validation_pipeline, test_pipeline
 
 
 # Practice with data augmentation
-RandomFlip = tf.keras.layers.RandomFlip()
-plt.figure(figsize=(10, 10))
-image = mpimg.imread("data/without_mask/23.jpg")
-for i in range(9):
-    ax = plt.subplot(3, 3, i + 1)
-    augmented_image = RandomFlip(tf.expand_dims(image, 0))
-    plt.imshow(augmented_image[0] / 255)
-    plt.axis('off')
-
-RandomRotation = tf.keras.layers.RandomRotation(0.5)
-plt.figure(figsize=(10, 10))
-image = mpimg.imread("data/with_mask/000 copy 36.jpg")
-for i in range(9):
-    ax = plt.subplot(3, 3, i + 1)
-    augmented_image = RandomRotation(tf.expand_dims(image, 0))
-    plt.imshow(augmented_image[0] / 255)
-    plt.axis('off')
+def ShowAugmentation(data_path="data"):
+    """
+    This function displays random flips and rotations of two images of the data set
+    """
+    RandomFlip = tf.keras.layers.RandomFlip()
+    plt.figure(figsize=(10, 10))
+    image = mpimg.imread(data_path + "/without_mask/23.jpg")
+    for i in range(9):
+        ax = plt.subplot(3, 3, i + 1)
+        augmented_image = RandomFlip(tf.expand_dims(image, 0))
+        plt.imshow(augmented_image[0] / 255)
+        plt.axis('off')
 
+    RandomRotation = tf.keras.layers.RandomRotation(0.5)
+    plt.figure(figsize=(10, 10))
+    image = mpimg.imread(data_path + "/with_mask/000 copy 36.jpg")
+    for i in range(9):
+        ax = plt.subplot(3, 3, i + 1)
+        augmented_image = RandomRotation(tf.expand_dims(image, 0))
+        plt.imshow(augmented_image[0] / 255)
+        plt.axis('off')
 
 
-# Model building
-"""
-In our model we include:
-1. a preprocessor
-2. data augmentation: randomly flipping & rotating the images
-3. two convolutional 2D layers
-4. two max pooling layers
-5. two dropout layers to avoid overfitting 
-6. a flatten layer
-7. and finally two dense layers to match the number of classes in the output
-"""
 # create a preprocessing layer
-i = tf.keras.Input(shape=(100, 100, 3))
-x = tf.keras.applications.mobilenet_v2.preprocess_input(i)
-preprocessor = tf.keras.Model(inputs = [i], outputs = [x])
-
-model = tf.keras.Sequential([
-    # preprocessing
-    preprocessor,
-    # data augmentation with flip and rotation
-    layers.RandomFlip('horizontal'), 
-    layers.RandomRotation(0.05),
-    # The first CNN layer is a Convolution layer of a kernel size 3*3
-    # It learns the base features and applies'relu' nonlinear transformation.
-    # Also specifying the input shape here to be 100
-    layers.Conv2D(100,(3,3), activation=layers.LeakyReLU(), input_shape=data.shape[1:]),
-    # MaxPooling2D((2, 2)) 2*2 the size of window to find the max
-    layers.MaxPooling2D((2, 2)),
-    # layers.Dropout(0.5) force the model to not fit too closely, help relieve overfitting
-    layers.Dropout(0.5),
-    # The second convolution layer
-    layers.Conv2D(100,(3,3), activation=layers.LeakyReLU()),
-    # MaxPooling layer
-    layers.MaxPooling2D((2, 2)),
-    # Flatten layer to stack the output convolutions from second convolution layer
-    layers.Flatten(),
-    # layers.Dropout(0.5) force the model to not fit too closely, help relieve overfitting
-    layers.Dropout(0.5),
-    # Dense layer of 25 neurons
-    layers.Dense(25, activation=layers.LeakyReLU()),
-    layers.Dense(2,activation='softmax')
-])
-model.summary()
-
-# compile the model
-model.compile(optimizer='adam',
-              loss=tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True),
-              metrics=['accuracy'])
-# fit the model on 80% of the training set, evaluate on the rest
-history = model.fit(train_data,
-                     train_target, 
-                     epochs=20,
-                     validation_split=0.2)
-"""
-Our results proved to be pretty precise and there
-is no apparent sign of overfitting.
-"""
-plt.plot(history.history["accuracy"], label = "training")
-plt.plot(history.history["val_accuracy"], label = "validation")
-plt.gca().set(xlabel = "epoch", ylabel = "accuracy") # gca: get current axis 
-plt.legend()
-
-print(model.evaluate(test_data,test_target))
+def Preprocessor():
+    """
+    This function creates a model scaling the images as MobileNetV2 expects
+    """
+    i = tf.keras.Input(shape=(100, 100, 3))
+    x = tf.keras.applications.mobilenet_v2.preprocess_input(i)
+    return tf.keras.Model(inputs = [i], outputs = [x])
+
+
+# Model building
+def BuildModel(image_shape=(100, 100, 3)):
+    """
+    In our model we include:
+    1. a preprocessor
+    2. data augmentation: randomly flipping & rotating the images (done in the input
+       pipeline, see InputPipeline.Augmentation)
+    3. two convolutional 2D layers
+    4. two max pooling layers
+    5. two dropout layers to avoid overfitting
+    6. a flatten layer
+    7. and finally two dense layers to match the number of classes in the output
+    The output is the compiled model
+    """
+    model = tf.keras.Sequential([
+        # preprocessing
+        Preprocessor(),
+        # The first CNN layer is a Convolution layer of a kernel size 3*3
+        # It learns the base features and applies'relu' nonlinear transformation.
+        # Also specifying the input shape here to be 100
+        layers.Conv2D(100,(3,3), activation=layers.LeakyReLU(), input_shape=image_shape),
+        # MaxPooling2D((2, 2)) 2*2 the size of window to find the max
+        layers.MaxPooling2D((2, 2)),
+        # layers.Dropout(0.5) force the model to not fit too closely, help relieve overfitting
+        layers.Dropout(0.5),
+        # The second convolution layer
+        layers.Conv2D(100,(3,3), activation=layers.LeakyReLU()),
+        # MaxPooling layer
+        layers.MaxPooling2D((2, 2)),
+        # Flatten layer to stack the output convolutions from second convolution layer
+        layers.Flatten(),
+        # layers.Dropout(0.5) force the model to not fit too closely, help relieve overfitting
+        layers.Dropout(0.5),
+        # Dense layer of 25 neurons
+        layers.Dense(25, activation=layers.LeakyReLU()),
+        layers.Dense(2,activation='softmax')
+    ])
+    model.summary()
+
+    # compile the model
+    model.compile(optimizer='adam',
+                  loss=tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True),
+                  metrics=['accuracy'])
+    return model
+
+
+# Define a function to plot the training and validation accuracy
+def PlotHistory(history):
+    """
+    This function plots the accuracy of each epoch of a training run
+    """
+    plt.figure()
+    plt.plot(history.history["accuracy"], label = "training")
+    plt.plot(history.history["val_accuracy"], label = "validation")
+    plt.gca().set(xlabel = "epoch", ylabel = "accuracy") # gca: get current axis
+    plt.legend()
+
+
+# Define a function to train the model
+def TrainModel(dataset_dir="dataset", epochs=20, batch_size=BATCH_SIZE):
+    """
+    This function builds the model, fits it on 80% of the training set,
+    evaluates it on the rest, plots the accuracy, and evaluates it on the test set
+    The output is the trained model
+    """
+    dataset, train_pipeline, validation_pipeline, test_pipeline = MakePipelines(dataset_dir, batch_size)
+    model = BuildModel(dataset.image_shape)
+    history = model.fit(train_pipeline,
+                         epochs=epochs,
+                         validation_data=validation_pipeline)
+    # Our results proved to be pretty precise and there
+    # is no apparent sign of overfitting.
+    PlotHistory(history)
+    print(model.evaluate(test_pipeline))
+    return model
 
 
 # Testing Model on data sets of different racial group
-categories = ['without_mask', 'with_mask']
 def testing(data_path, model):
     """
-    This function will preprocess the data set, test the model on the data set, 
+    This function will preprocess the data set, test the model on the data set,
     and create visualization
     """
     # preprocess the data
@@ -131,6 +176,18 @@ def testing(data_path, model):
             plt.grid(False)
             plt.imshow(data_test[i+25])
             plt.xlabel(categories[labels_pred[i+25]])
-testing("data/Testing_Black")
-testing("data/Testing_Asian")
-testing("data/Testing_White")
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a CNN to detect face masks, and test it.")
+    parser.add_argument("--dataset", default="dataset", help="The sharded data set saved by S2 (default: dataset).")
+    parser.add_argument("--data-path", default="data", help="The folder of the images, for the augmentation plots.")
+    parser.add_argument("--epochs", type=int, default=20, help="Number of training epochs (default: 20).")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Images per batch (default: 32).")
+    parser.add_argument("--test-paths", nargs="*", default=TEST_PATHS, help="Data sets to test the model on.")
+    args = parser.parse_args()
+    ShowAugmentation(args.data_path)
+    model = TrainModel(args.dataset, args.epochs, args.batch_size)
+    for test_path in args.test_paths:
+        testing(test_path, model)
+    plt.show()
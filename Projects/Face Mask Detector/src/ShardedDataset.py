@@ -0,0 +1,103 @@
+# First we need to read in the required packages
+import json,os
+import numpy as np
+
+# Number of images per shard (about 30 MB of 100x100 color images)
+SHARD_SIZE = 1024
+# Name of the file describing the shards of a data set
+INDEX_NAME = "index.json"
+
+# Define a function to save a data set as shards
+def SaveShards(data, target, out_dir, shard_size=SHARD_SIZE):
+    """
+    This function saves images and their targets as a sharded data set:
+    fixed-size .npy files of shard_size images (the last one may be smaller),
+    the targets in target.npy, and an index file describing the shards
+    The input data can be a memory-mapped array (see DataPreprocess), which
+    is copied one shard at a time
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    shards=[]
+    for start in range(0, len(data), shard_size):
+        shard_name="data_{:05d}.npy".format(len(shards))
+        np.save(os.path.join(out_dir, shard_name), np.asarray(data[start:start+shard_size]))
+        shards.append({"name": shard_name, "size": min(shard_size, len(data)-start)})
+    np.save(os.path.join(out_dir, "target.npy"), np.asarray(target))
+    index={
+        "n_images": len(data),
+        "image_shape": list(data.shape[1:]),
+        "shard_size": shard_size,
+        "shards": shards,
+    }
+    # The index is written last, so a data set is only complete once it exists
+    with open(os.path.join(out_dir, INDEX_NAME), "w") as f:
+        json.dump(index, f, indent=1)
+
+# Define a class to read a sharded data set
+class ShardedDataset:
+    """
+    A data set saved by SaveShards, opened with its shards memory-mapped, so
+    only the images which are accessed are read from disk
+    A data set can be restricted to some of its images (see subset and split):
+    this creates a view sharing the same shards, which holds only the indices
+    of its images, instead of a copy of them
+    """
+
+    def __init__(self, directory, indices=None):
+        with open(os.path.join(directory, INDEX_NAME)) as f:
+            index=json.load(f)
+        self.directory=directory
+        self.shard_size=index["shard_size"]
+        self.image_shape=tuple(index["image_shape"])
+        self.shards=[
+            np.load(os.path.join(directory, shard["name"]), mmap_mode="r") for shard in index["shards"]
+        ]
+        self.all_targets=np.load(os.path.join(directory, "target.npy"))
+        # Indices of the images of this view in the whole data set
+        if indices is None:
+            indices=np.arange(index["n_images"])
+        self.indices=np.asarray(indices)
+
+    def __len__(self):
+        return len(self.indices)
+
+    @property
+    def target(self):
+        """The targets of the images of this view"""
+        return self.all_targets[self.indices]
+
+    def subset(self, positions):
+        """
+        This function creates a view of some of the images of this data set
+        The input is the positions of the images in this data set
+        """
+        view=object.__new__(ShardedDataset)
+        view.__dict__.update(self.__dict__)
+        view.indices=self.indices[positions]
+        return view
+
+    def split(self, test_size=0.1, seed=None):
+        """
+        This function randomly splits the data set into two views, like
+        sklearn's train_test_split, but without copying any image
+        The output is the training view, then the test view (with a
+        proportion test_size of the images)
+        """
+        positions=np.random.default_rng(seed).permutation(len(self))
+        n_test=int(np.ceil(test_size*len(self)))
+        return self.subset(np.sort(positions[n_test:])), self.subset(np.sort(positions[:n_test]))
+
+    def images(self, positions=None):
+        """
+        This function reads images of the data set into memory
+        The input is the positions of the images in this data set (by default
+        all of them), and the output is an array of those images, in order
+        """
+        indices=self.indices if positions is None else self.indices[positions]
+        images=np.empty((len(indices),)+self.image_shape, dtype=np.uint8)
+        shard_numbers=indices//self.shard_size
+        # Read the images of each shard at once
+        for shard_number in np.unique(shard_numbers):
+            in_shard=np.flatnonzero(shard_numbers == shard_number)
+            images[in_shard]=self.shards[shard_number][indices[in_shard]-shard_number*self.shard_size]
+        return images